@@ -0,0 +1,23 @@
+#!/bin/bash
+#
+# UNMM First Boot Payload: grow-rootfs
+# /opt/firstboot.d/10-grow-rootfs
+# Expande a partição e o sistema de arquivos raiz até o fim do disco.
+# A imagem é reduzida ao seu conteúdo (unmm.sh --shrink); no primeiro boot, o disco
+# virtual costuma ser maior e o espaço restante é devolvido ao sistema.
+#
+# Sob licença MIT
+#
+
+set -e
+
+ROOT_PARTITION=$(findmnt -n -o SOURCE /)
+ROOT_DISK="/dev/$(lsblk -n -o PKNAME "$ROOT_PARTITION" | head -n 1)"
+PARTITION_NUMBER=$(cat "/sys/class/block/$(basename "$ROOT_PARTITION")/partition")
+
+echo "Expandindo a partição $PARTITION_NUMBER de $ROOT_DISK..."
+# growpart retorna 1 quando a partição já ocupa todo o disco
+growpart "$ROOT_DISK" "$PARTITION_NUMBER" || [ $? -eq 1 ]
+
+echo "Expandindo o sistema de arquivos em $ROOT_PARTITION..."
+resize2fs "$ROOT_PARTITION"
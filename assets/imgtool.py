@@ -0,0 +1,226 @@
+"""
+    imgtool.py
+    ==============
+    Ferramenta de manipulação de imagens de disco RAW.
+
+    Autor: João Paulo (o Jppgmx)
+    Sob licença MIT
+"""
+
+import argparse as ap
+import os
+import sys
+import zlib
+
+from imgtool import delta, export, seekable
+
+
+def parse_target(target: str) -> tuple[str, str]:
+    """
+        Converte uma string no formato <formato>=<caminho> em uma tupla (formato, caminho).
+    """
+
+    if "=" not in target:
+        raise ap.ArgumentTypeError(f"Destino inválido: '{target}'. Deve estar no formato formato=caminho.")
+    fmt, path = target.split("=", 1)
+    if fmt not in export.WRITERS:
+        raise ap.ArgumentTypeError(
+            f"Formato desconhecido: '{fmt}'. Formatos suportados: {', '.join(export.WRITERS)}"
+        )
+    return fmt, path
+
+
+def cmd_export(args: ap.Namespace):
+    """
+        Exporta a imagem para todos os formatos pedidos a partir de uma única leitura.
+    """
+
+    if not args.targets and not args.digests:
+        print("Erro: nenhum destino ou hash especificado.", file=sys.stderr)
+        sys.exit(1)
+
+    writers = [export.WRITERS[fmt](path) for fmt, path in args.targets or []]
+    digests = [export.DigestWriter(algorithm) for algorithm in args.digests or []]
+
+    size = export.fan_out(args.input, writers + digests, args.chunk_size, args.queue_depth)
+    print(f"Imagem lida: {args.input} ({size} bytes)")
+    for writer in writers + digests:
+        print(f"  {writer.describe()}")
+
+    if args.digest_file and digests:
+        name = os.path.basename(args.input)
+        with open(args.digest_file, "w", encoding="utf-8") as f:
+            for digest in digests:
+                f.write(f"{digest.algorithm.upper()} ({name}) = {digest.hexdigest}\n")
+
+
+def cmd_restore(args: ap.Namespace):
+    """
+        Restaura uma imagem zstd seekable para uma imagem RAW esparsa.
+    """
+
+    reader = seekable.SeekableZstdReader(args.input)
+    try:
+        reader.restore(args.output)
+        print(f"Imagem restaurada: {args.output} ({reader.size} bytes, {reader.frame_count} frames)")
+    finally:
+        reader.close()
+
+
+def cmd_read(args: ap.Namespace):
+    """
+        Lê um trecho de uma imagem zstd seekable sem descomprimi-la por inteiro.
+    """
+
+    reader = seekable.SeekableZstdReader(args.input)
+    try:
+        sys.stdout.buffer.write(reader.read(args.offset, args.length))
+    finally:
+        reader.close()
+
+
+def cmd_delta(args: ap.Namespace):
+    """
+        Gera o delta em nível de bloco que transforma a imagem de origem na de destino.
+    """
+
+    try:
+        header = delta.create(args.source, args.target, args.output, args.block_size,
+                              args.level, args.workers)
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    changed = header.block_count * header.block_size
+    print(f"Delta gravado: {args.output} ({os.path.getsize(args.output)} bytes)")
+    print(f"  {header.block_count} blocos de {header.block_size} bytes alterados "
+          f"({changed} de {header.target_size} bytes)")
+    print(f"  origem: {header.source_digest.hex()}")
+    print(f"  destino: {header.target_digest.hex()}")
+
+
+def cmd_apply(args: ap.Namespace):
+    """
+        Aplica um delta sobre a imagem de origem, no local.
+    """
+
+    try:
+        header, changed = delta.apply(args.delta, args.image, args.workers)
+    except (ValueError, OSError, zlib.error) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if changed:
+        print(f"Delta aplicado: {args.image} ({header.block_count} blocos, {header.target_size} bytes)")
+    else:
+        print(f"A imagem já corresponde ao destino do delta: {args.image}")
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Ferramenta de manipulação de imagens de disco RAW.",
+        formatter_class=ap.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python imgtool.py export disk.img --to qcow2=disk.qcow2 --to gz=disk.img.gz --digest sha256
+  python imgtool.py export disk.img --to zst=disk.img.zst
+  python imgtool.py restore disk.img.zst disk.img
+  python imgtool.py read disk.img.zst --offset 1048576 --length 512 > mbr.bin
+  python imgtool.py delta old.img new.img new.img.delta
+  python imgtool.py apply new.img.delta old.img
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Exportação
+    export_parser = subparsers.add_parser("export",
+                                          help="Exporta a imagem para vários formatos em uma única leitura")
+    export_parser.add_argument("input",
+                               help="Imagem RAW de entrada")
+    export_parser.add_argument("-t", "--to",
+                               action="append",
+                               type=parse_target,
+                               dest="targets",
+                               metavar="FORMAT=PATH",
+                               help="Adicionar destino. "
+                                    f"Formatos: {', '.join(export.WRITERS)}")
+    export_parser.add_argument("--digest",
+                               action="append",
+                               dest="digests",
+                               metavar="ALGO",
+                               help="Calcular hash da imagem (ex: sha256, sha512)")
+    export_parser.add_argument("--digest-file",
+                               help="Salva os hashes calculados no caminho informado (formato BSD)")
+    export_parser.add_argument("--chunk-size",
+                               type=int,
+                               default=export.DEFAULT_CHUNK_SIZE,
+                               help="Tamanho dos blocos lidos da imagem em bytes "
+                                    f"(padrão: {export.DEFAULT_CHUNK_SIZE})")
+    export_parser.add_argument("--queue-depth",
+                               type=int,
+                               default=export.DEFAULT_QUEUE_DEPTH,
+                               help="Número máximo de blocos enfileirados por destino "
+                                    f"(padrão: {export.DEFAULT_QUEUE_DEPTH})")
+    export_parser.set_defaults(func=cmd_export)
+
+    # Restauração de imagem zstd seekable
+    restore_parser = subparsers.add_parser("restore",
+                                           help="Restaura uma imagem zstd seekable para RAW esparsa")
+    restore_parser.add_argument("input",
+                                help="Imagem zstd seekable de entrada")
+    restore_parser.add_argument("output",
+                                help="Imagem RAW de saída")
+    restore_parser.set_defaults(func=cmd_restore)
+
+    # Leitura aleatória de imagem zstd seekable
+    read_parser = subparsers.add_parser("read",
+                                        help="Lê um trecho de uma imagem zstd seekable para a saída padrão")
+    read_parser.add_argument("input",
+                             help="Imagem zstd seekable de entrada")
+    read_parser.add_argument("--offset",
+                             type=int,
+                             required=True,
+                             help="Offset do trecho na imagem descomprimida")
+    read_parser.add_argument("--length",
+                             type=int,
+                             required=True,
+                             help="Tamanho do trecho em bytes")
+    read_parser.set_defaults(func=cmd_read)
+
+    # Delta em nível de bloco entre duas imagens
+    delta_parser = subparsers.add_parser("delta",
+                                         help="Gera o delta em nível de bloco entre duas imagens RAW")
+    delta_parser.add_argument("source",
+                              help="Imagem RAW de origem (a versão anterior)")
+    delta_parser.add_argument("target",
+                              help="Imagem RAW de destino (a versão nova)")
+    delta_parser.add_argument("output",
+                              help="Arquivo de delta de saída")
+    delta_parser.add_argument("--block-size",
+                              type=int,
+                              default=delta.DEFAULT_BLOCK_SIZE,
+                              help="Tamanho dos blocos comparados em bytes "
+                                   f"(padrão: {delta.DEFAULT_BLOCK_SIZE})")
+    delta_parser.add_argument("--level",
+                              type=int,
+                              default=delta.DEFAULT_LEVEL,
+                              help=f"Nível de compressão zlib dos blocos (padrão: {delta.DEFAULT_LEVEL})")
+    delta_parser.add_argument("--workers",
+                              type=int,
+                              help="Número de threads de hashing e compressão (padrão: número de CPUs)")
+    delta_parser.set_defaults(func=cmd_delta)
+
+    # Aplicação de delta
+    apply_parser = subparsers.add_parser("apply",
+                                         help="Aplica um delta sobre a imagem de origem, no local")
+    apply_parser.add_argument("delta",
+                              help="Arquivo de delta")
+    apply_parser.add_argument("image",
+                              help="Imagem RAW de origem, atualizada no local")
+    apply_parser.add_argument("--workers",
+                              type=int,
+                              help="Número de threads de hashing (padrão: número de CPUs)")
+    apply_parser.set_defaults(func=cmd_apply)
+
+    parsed = parser.parse_args()
+    parsed.func(parsed)
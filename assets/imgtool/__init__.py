@@ -0,0 +1,14 @@
+"""
+    UNMM Image Tool
+    - Version: 1.0
+    - Description: Ferramentas de manipulação de imagens de disco RAW.
+    - Autor: João Paulo (o Jppgmx)
+    - Sob licença MIT
+"""
+
+from . import extents
+from . import delta
+from . import export
+from . import seekable
+
+__all__ = ["extents", "delta", "export", "seekable"]
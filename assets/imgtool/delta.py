@@ -0,0 +1,365 @@
+"""
+    UNMM Image Tool Delta
+    - Version: 1.0
+    - Description: Deltas em nível de bloco entre duas imagens RAW, com hashing paralelo
+                   dos blocos e aplicação no local sobre a imagem antiga.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from imgtool.extents import DEFAULT_CHUNK_SIZE, data_extents, is_zero, iter_zeros
+
+# Tamanho padrão dos blocos comparados
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# Nível padrão de compressão zlib dos blocos alterados
+DEFAULT_LEVEL = 6
+
+# Cabeçalho: magic, versão, tamanho do bloco, tamanho da origem, tamanho do destino,
+# quantidade de blocos alterados, digest da origem e digest do destino
+MAGIC = b"UNMMDLTA"
+VERSION = 1
+HEADER_FORMAT = "<8sIIQQQ32s32s"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Registro de um bloco alterado: índice, flags e tamanho dos dados comprimidos
+RECORD_FORMAT = "<QBI"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# O bloco do destino contém apenas zeros (sem dados no registro)
+FLAG_ZERO = 0x01
+
+# Arquivo de progresso da aplicação, ao lado da imagem: digests do delta, registros
+# aplicados e posição do próximo registro no delta
+PROGRESS_SUFFIX = ".delta-progress"
+
+# Quantidade de registros aplicados entre gravações do progresso
+PROGRESS_INTERVAL = 1024
+
+
+@dataclass
+class DeltaHeader:
+    """
+        Cabeçalho do arquivo de delta. Os digests são calculados por image_digest.
+    """
+
+    block_size: int
+    source_size: int
+    target_size: int
+    block_count: int
+    source_digest: bytes
+    target_digest: bytes
+
+    def pack(self) -> bytes:
+        return struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.block_size, self.source_size,
+                           self.target_size, self.block_count, self.source_digest, self.target_digest)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "DeltaHeader":
+        if len(data) < HEADER_SIZE:
+            raise ValueError("Arquivo de delta truncado.")
+        magic, version, *fields = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+        if magic != MAGIC:
+            raise ValueError("O arquivo não é um delta do imgtool.")
+        if version != VERSION:
+            raise ValueError(f"Versão de delta não suportada: {version}.")
+        header = cls(*fields)
+        if header.block_size <= 0 or header.block_size % 512 != 0:
+            raise ValueError(f"Tamanho de bloco inválido no delta: {header.block_size}.")
+        return header
+
+
+class _BlockReader:
+    """
+        Leitor de blocos de uma imagem. Blocos fora dos extents de dados não são lidos
+        (são zeros); blocos além do fim da imagem têm tamanho zero.
+    """
+
+    def __init__(self, path: str, block_size: int):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.size = os.fstat(self.fd).st_size
+        self.block_size = block_size
+        self.data_blocks = set()
+        for start, end in data_extents(self.fd, self.size):
+            self.data_blocks.update(range(start // block_size, (end + block_size - 1) // block_size))
+
+    @property
+    def block_count(self) -> int:
+        return (self.size + self.block_size - 1) // self.block_size
+
+    def length(self, index: int) -> int:
+        return max(0, min(self.block_size, self.size - index * self.block_size))
+
+    def read(self, index: int) -> bytes:
+        """
+            Lê o bloco. Retorna None se o bloco for um buraco.
+        """
+
+        if index not in self.data_blocks:
+            return None
+        return os.pread(self.fd, self.length(index), index * self.block_size)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _ZeroHashes:
+    """
+        Cache dos hashes de blocos zerados, indexado pelo tamanho do bloco.
+    """
+
+    def __init__(self):
+        self.cache = {}
+
+    def get(self, length: int) -> bytes:
+        if length not in self.cache:
+            self.cache[length] = hashlib.sha256(bytes(length)).digest()
+        return self.cache[length]
+
+
+def _block_hash(data: bytes, length: int, zeros: _ZeroHashes) -> bytes:
+    if length == 0:
+        return None
+    return zeros.get(length) if data is None else hashlib.sha256(data).digest()
+
+
+def _run_batches(worker, block_count: int, batch_size: int, workers: int):
+    """
+        Executa worker(first, last) em paralelo para lotes consecutivos de blocos e
+        entrega os resultados na ordem original, com no máximo 2 * workers lotes pendentes.
+    """
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for first in range(0, block_count, batch_size):
+            pending.append(pool.submit(worker, first, min(first + batch_size, block_count)))
+            while len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _batch_size(block_size: int) -> int:
+    return max(1, DEFAULT_CHUNK_SIZE // block_size)
+
+
+def image_digest(path: str, block_size: int = DEFAULT_BLOCK_SIZE, workers: int = None) -> bytes:
+    """
+        Calcula o digest da imagem por blocos: o sha256 da sequência dos sha256 de cada
+        bloco, precedida pelo tamanho da imagem. Os blocos são lidos e calculados em paralelo
+        (buracos não são lidos).
+    """
+
+    reader = _BlockReader(path, block_size)
+    zeros = _ZeroHashes()
+
+    def worker(first: int, last: int) -> list[bytes]:
+        return [_block_hash(reader.read(i), reader.length(i), zeros) for i in range(first, last)]
+
+    try:
+        digest = hashlib.sha256(struct.pack("<Q", reader.size))
+        for block_hash in _run_batches(worker, reader.block_count, _batch_size(block_size),
+                                       workers or os.cpu_count() or 1):
+            digest.update(block_hash)
+        return digest.digest()
+    finally:
+        reader.close()
+
+
+def create(source: str, target: str, output: str, block_size: int = DEFAULT_BLOCK_SIZE,
+           level: int = DEFAULT_LEVEL, workers: int = None) -> DeltaHeader:
+    """
+        Compara as imagens bloco a bloco e grava o delta que transforma a origem no destino.
+        Os blocos são comparados como a origem fica após ser redimensionada para o tamanho do
+        destino (o trecho acrescentado é lido como zeros). Blocos sem dados nas duas imagens
+        não são lidos. Os hashes e a compressão dos blocos alterados rodam em paralelo, e os
+        digests das duas imagens são calculados na mesma passada.
+    """
+
+    if block_size <= 0 or block_size % 512 != 0:
+        raise ValueError("O tamanho de bloco deve ser um múltiplo positivo de 512 bytes.")
+
+    src = _BlockReader(source, block_size)
+    tgt = _BlockReader(target, block_size)
+    zeros = _ZeroHashes()
+
+    def worker(first: int, last: int) -> list[tuple]:
+        results = []
+        for index in range(first, last):
+            src_data, tgt_data = src.read(index), tgt.read(index)
+            src_length, tgt_length = src.length(index), tgt.length(index)
+            src_hash = _block_hash(src_data, src_length, zeros)
+            tgt_hash = _block_hash(tgt_data, tgt_length, zeros)
+            record = None
+
+            if tgt_length and (src_data is not None or tgt_data is not None):
+                src_view = bytes(tgt_length) if src_data is None else src_data[:tgt_length]
+                if len(src_view) < tgt_length:
+                    src_view += bytes(tgt_length - len(src_view))
+                if tgt_data is None:
+                    tgt_data = bytes(tgt_length)
+
+                if src_view != tgt_data:
+                    if is_zero(tgt_data):
+                        record = (index, FLAG_ZERO, b"")
+                    else:
+                        record = (index, 0, zlib.compress(tgt_data, level))
+
+            results.append((src_hash, tgt_hash, record))
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    block_count = max(src.block_count, tgt.block_count)
+    src_digest = hashlib.sha256(struct.pack("<Q", src.size))
+    tgt_digest = hashlib.sha256(struct.pack("<Q", tgt.size))
+    changed = 0
+
+    temp = f"{output}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            f.write(bytes(HEADER_SIZE))
+            for src_hash, tgt_hash, record in _run_batches(worker, block_count,
+                                                           _batch_size(block_size), workers):
+                if src_hash is not None:
+                    src_digest.update(src_hash)
+                if tgt_hash is not None:
+                    tgt_digest.update(tgt_hash)
+                if record is not None:
+                    index, flags, payload = record
+                    f.write(struct.pack(RECORD_FORMAT, index, flags, len(payload)))
+                    f.write(payload)
+                    changed += 1
+
+            header = DeltaHeader(block_size, src.size, tgt.size, changed,
+                                 src_digest.digest(), tgt_digest.digest())
+            f.seek(0)
+            f.write(header.pack())
+        os.replace(temp, output)
+    finally:
+        src.close()
+        tgt.close()
+        if os.path.exists(temp):
+            os.remove(temp)
+
+    return header
+
+
+def read_header(path: str) -> DeltaHeader:
+    """
+        Lê o cabeçalho de um arquivo de delta.
+    """
+
+    with open(path, "rb") as f:
+        return DeltaHeader.unpack(f.read(HEADER_SIZE))
+
+
+def _progress_id(header: DeltaHeader) -> str:
+    return f"{header.source_digest.hex()}-{header.target_digest.hex()}"
+
+
+def _read_progress(image: str, header: DeltaHeader) -> tuple[int, int]:
+    """
+        Lê o progresso de uma aplicação interrompida deste delta sobre a imagem.
+        Retorna o índice e a posição do próximo registro, ou None se não houver.
+    """
+
+    try:
+        with open(image + PROGRESS_SUFFIX, "r", encoding="utf-8") as f:
+            delta_id, applied, offset = f.read().split()
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise ValueError(f"Arquivo de progresso inválido: '{image}{PROGRESS_SUFFIX}'.") from e
+
+    if delta_id != _progress_id(header):
+        raise ValueError(f"A imagem '{image}' tem uma aplicação interrompida de outro delta "
+                         f"('{image}{PROGRESS_SUFFIX}').")
+    return int(applied), int(offset)
+
+
+def _write_progress(image: str, header: DeltaHeader, applied: int, offset: int):
+    """
+        Grava o progresso da aplicação de forma atômica e durável.
+    """
+
+    path = image + PROGRESS_SUFFIX
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(f"{_progress_id(header)} {applied} {offset}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def apply(delta: str, image: str, workers: int = None) -> tuple[DeltaHeader, bool]:
+    """
+        Aplica o delta sobre a imagem de origem, no local. O digest da imagem é verificado
+        antes de qualquer escrita; se a imagem já corresponder ao destino, nada é feito.
+        Após a aplicação, o digest do destino é verificado.
+
+        O progresso é gravado ao lado da imagem (PROGRESS_SUFFIX) a cada PROGRESS_INTERVAL
+        registros, após sincronizar a imagem. Se a aplicação for interrompida, a próxima
+        chamada com o mesmo delta continua do último progresso gravado, sem verificar a
+        origem (os registros gravam blocos inteiros do destino, então reaplicá-los é seguro).
+
+        Retorna o cabeçalho e se a imagem foi alterada.
+    """
+
+    header = read_header(delta)
+    progress = _read_progress(image, header)
+    if progress is None:
+        current = image_digest(image, header.block_size, workers)
+        if current == header.target_digest:
+            return header, False
+        if current != header.source_digest:
+            raise ValueError(f"A imagem '{image}' não corresponde à origem do delta.")
+        progress = (0, HEADER_SIZE)
+        _write_progress(image, header, *progress)
+
+    first, start = progress
+    block_size = header.block_size
+    fd = os.open(image, os.O_RDWR)
+    try:
+        os.ftruncate(fd, header.target_size)
+        with open(delta, "rb") as f:
+            f.seek(start)
+            for applied in range(first, header.block_count):
+                if applied > first and applied % PROGRESS_INTERVAL == 0:
+                    os.fsync(fd)
+                    _write_progress(image, header, applied, f.tell())
+
+                record = f.read(RECORD_SIZE)
+                if len(record) < RECORD_SIZE:
+                    raise ValueError("Arquivo de delta truncado.")
+                index, flags, length = struct.unpack(RECORD_FORMAT, record)
+                offset = index * block_size
+                size = min(block_size, header.target_size - offset)
+
+                if flags & FLAG_ZERO:
+                    position = offset
+                    for zeros in iter_zeros(size, block_size):
+                        os.pwrite(fd, zeros, position)
+                        position += len(zeros)
+                    continue
+
+                payload = f.read(length)
+                if len(payload) < length:
+                    raise ValueError("Arquivo de delta truncado.")
+                data = zlib.decompress(payload)
+                if len(data) != size:
+                    raise ValueError(f"Bloco {index} do delta com tamanho inválido.")
+                os.pwrite(fd, data, offset)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    if image_digest(image, block_size, workers) != header.target_digest:
+        raise ValueError(f"O digest de '{image}' após a aplicação não corresponde ao destino do delta.")
+    os.remove(image + PROGRESS_SUFFIX)
+    return header, True
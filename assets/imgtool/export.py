@@ -0,0 +1,316 @@
+"""
+    UNMM Image Tool Export
+    - Version: 1.0
+    - Description: Exportação de uma imagem RAW para vários formatos a partir de uma única leitura.
+"""
+
+import gzip
+import hashlib
+import math
+import os
+import queue
+import struct
+import threading
+
+from imgtool.extents import Chunk, DEFAULT_CHUNK_SIZE, is_zero, iter_chunks, iter_zeros
+
+# Número máximo de blocos enfileirados por escritor
+DEFAULT_QUEUE_DEPTH = 8
+
+
+class Writer:
+    """
+        Classe base dos escritores alimentados pelo leitor da imagem.
+        Os blocos chegam em ordem crescente de offset e cobrem a imagem inteira.
+    """
+
+    name = "writer"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, chunk: Chunk):
+        """
+            Consome um bloco da imagem.
+        """
+
+        if chunk.is_hole:
+            self.hole(chunk.offset, chunk.length)
+        else:
+            self.data(chunk.offset, chunk.data)
+
+    def data(self, offset: int, data: bytes):
+        """
+            Consome um bloco de dados.
+        """
+
+    def hole(self, offset: int, length: int):
+        """
+            Consome um buraco (trecho lido como zeros).
+        """
+
+    def close(self, size: int):
+        """
+            Finaliza a saída. size é o tamanho virtual da imagem.
+        """
+
+    def describe(self) -> str:
+        return f"{self.name}: {self.path}"
+
+
+class RawWriter(Writer):
+    """
+        Cópia RAW esparsa: buracos e blocos zerados não são gravados.
+    """
+
+    name = "raw"
+
+    # Granularidade da detecção de blocos zerados
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    def data(self, offset: int, data: bytes):
+        view = memoryview(data)
+        for pos in range(0, len(data), self.BLOCK_SIZE):
+            block = view[pos:pos + self.BLOCK_SIZE]
+            if not is_zero(block):
+                os.pwrite(self.fd, block, offset + pos)
+
+    def close(self, size: int):
+        os.ftruncate(self.fd, size)
+        os.close(self.fd)
+
+
+class GzipWriter(Writer):
+    """
+        Imagem RAW comprimida com gzip.
+    """
+
+    name = "gz"
+
+    def __init__(self, path: str, level: int = 6):
+        super().__init__(path)
+        self.file = gzip.open(path, "wb", compresslevel=level)
+
+    def data(self, offset: int, data: bytes):
+        self.file.write(data)
+
+    def hole(self, offset: int, length: int):
+        for zeros in iter_zeros(length):
+            self.file.write(zeros)
+
+    def close(self, size: int):
+        self.file.close()
+
+
+class Qcow2Writer(Writer):
+    """
+        Imagem QCOW2 (versão 2, sem compressão). Os clusters de dados são gravados
+        sequencialmente à medida que chegam; as tabelas L2, L1 e de refcount são
+        gravadas no final e o cabeçalho por último.
+    """
+
+    name = "qcow2"
+
+    CLUSTER_BITS = 16
+    CLUSTER_SIZE = 1 << CLUSTER_BITS
+    L2_ENTRIES = CLUSTER_SIZE // 8
+    REFCOUNT_ENTRIES = CLUSTER_SIZE // 2
+    OFLAG_COPIED = 1 << 63
+    HEADER_FORMAT = ">4sIQIIQIIQQIIQ"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self.mapping = {}
+        self.next_cluster = 1  # O cluster 0 é reservado para o cabeçalho
+
+    def data(self, offset: int, data: bytes):
+        if offset % self.CLUSTER_SIZE != 0:
+            raise ValueError("Blocos desalinhados ao tamanho de cluster do QCOW2.")
+
+        for pos in range(0, len(data), self.CLUSTER_SIZE):
+            cluster = data[pos:pos + self.CLUSTER_SIZE]
+            if is_zero(cluster):
+                continue
+            if len(cluster) < self.CLUSTER_SIZE:
+                cluster = cluster + bytes(self.CLUSTER_SIZE - len(cluster))
+            os.pwrite(self.fd, cluster, self.next_cluster * self.CLUSTER_SIZE)
+            self.mapping[(offset + pos) // self.CLUSTER_SIZE] = self.next_cluster * self.CLUSTER_SIZE
+            self.next_cluster += 1
+
+    def _write_tables(self, size: int) -> tuple[int, int, int, int]:
+        """
+            Grava as tabelas L2, L1 e de refcount. Retorna (l1_size, l1_offset,
+            refcount_table_offset, refcount_table_clusters).
+        """
+
+        cs = self.CLUSTER_SIZE
+        l1_size = max(1, math.ceil(math.ceil(size / cs) / self.L2_ENTRIES))
+        l1_table = [0] * l1_size
+
+        # Tabelas L2
+        l2_tables = {}
+        for guest_cluster, host_offset in self.mapping.items():
+            l1_index, l2_index = divmod(guest_cluster, self.L2_ENTRIES)
+            l2_tables.setdefault(l1_index, [0] * self.L2_ENTRIES)[l2_index] = host_offset | self.OFLAG_COPIED
+
+        for l1_index in sorted(l2_tables):
+            l2_offset = self.next_cluster * cs
+            os.pwrite(self.fd, struct.pack(f">{self.L2_ENTRIES}Q", *l2_tables[l1_index]), l2_offset)
+            l1_table[l1_index] = l2_offset | self.OFLAG_COPIED
+            self.next_cluster += 1
+
+        # Tabela L1
+        l1_offset = self.next_cluster * cs
+        os.pwrite(self.fd, struct.pack(f">{l1_size}Q", *l1_table), l1_offset)
+        self.next_cluster += math.ceil(l1_size * 8 / cs)
+
+        # Tabela e blocos de refcount (os próprios blocos também precisam ser contados)
+        used = self.next_cluster
+        blocks = table_clusters = 0
+        while True:
+            total = used + table_clusters + blocks
+            new_blocks = math.ceil(total / self.REFCOUNT_ENTRIES)
+            new_table_clusters = math.ceil(new_blocks * 8 / cs)
+            if (new_blocks, new_table_clusters) == (blocks, table_clusters):
+                break
+            blocks, table_clusters = new_blocks, new_table_clusters
+
+        total = used + table_clusters + blocks
+        table_offset = used * cs
+        first_block = used + table_clusters
+        table = [(first_block + i) * cs for i in range(blocks)]
+        os.pwrite(self.fd, struct.pack(f">{len(table)}Q", *table), table_offset)
+
+        for i in range(blocks):
+            count = min(self.REFCOUNT_ENTRIES, total - i * self.REFCOUNT_ENTRIES)
+            block = struct.pack(f">{count}H", *([1] * count))
+            block += bytes(cs - len(block))
+            os.pwrite(self.fd, block, (first_block + i) * cs)
+
+        self.next_cluster = total
+        return l1_size, l1_offset, table_offset, table_clusters
+
+    def close(self, size: int):
+        l1_size, l1_offset, rt_offset, rt_clusters = self._write_tables(size)
+        header = struct.pack(
+            self.HEADER_FORMAT,
+            b"QFI\xfb", 2,          # magic, versão
+            0, 0,                   # arquivo de backing (offset, tamanho)
+            self.CLUSTER_BITS,
+            size,
+            0,                      # sem criptografia
+            l1_size, l1_offset,
+            rt_offset, rt_clusters,
+            0, 0                    # sem snapshots
+        )
+        os.pwrite(self.fd, header + bytes(self.CLUSTER_SIZE - len(header)), 0)
+        os.ftruncate(self.fd, self.next_cluster * self.CLUSTER_SIZE)
+        os.close(self.fd)
+
+
+class DigestWriter(Writer):
+    """
+        Calcula o hash do conteúdo lógico da imagem (buracos contam como zeros).
+    """
+
+    name = "digest"
+
+    def __init__(self, algorithm: str, path: str = None):
+        super().__init__(path)
+        self.algorithm = algorithm
+        self.hash = hashlib.new(algorithm)
+        self.hexdigest = None
+
+    def data(self, offset: int, data: bytes):
+        self.hash.update(data)
+
+    def hole(self, offset: int, length: int):
+        for zeros in iter_zeros(length):
+            self.hash.update(zeros)
+
+    def close(self, size: int):
+        self.hexdigest = self.hash.hexdigest()
+
+    def describe(self) -> str:
+        return f"{self.algorithm}: {self.hexdigest}"
+
+
+# Formatos de saída suportados (formato -> classe do escritor)
+WRITERS = {
+    RawWriter.name: RawWriter,
+    GzipWriter.name: GzipWriter,
+    Qcow2Writer.name: Qcow2Writer,
+}
+
+
+class _WriterThread(threading.Thread):
+    """
+        Thread que alimenta um escritor a partir de uma fila limitada.
+    """
+
+    def __init__(self, writer: Writer, depth: int):
+        super().__init__(name=f"imgtool-{writer.name}", daemon=True)
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                if isinstance(item, Chunk):
+                    self.writer.write(item)
+                else:
+                    self.writer.close(item)
+            except Exception as e:  # pylint: disable=broad-except
+                self.error = e
+
+
+def fan_out(input_path: str, writers: list[Writer],
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            depth: int = DEFAULT_QUEUE_DEPTH) -> int:
+    """
+        Lê a imagem uma única vez, extent por extent, e entrega cada bloco a todos os
+        escritores concorrentemente através de filas limitadas. A memória usada fica
+        limitada a depth blocos por escritor.
+
+        Retorna o tamanho virtual da imagem.
+    """
+
+    if chunk_size % Qcow2Writer.CLUSTER_SIZE != 0:
+        raise ValueError(f"O tamanho de bloco deve ser múltiplo de {Qcow2Writer.CLUSTER_SIZE} bytes.")
+
+    threads = [_WriterThread(writer, depth) for writer in writers]
+    for thread in threads:
+        thread.start()
+
+    fd = os.open(input_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        for chunk in iter_chunks(fd, size, chunk_size):
+            for thread in threads:
+                if thread.error is not None:
+                    raise RuntimeError(f"Falha no escritor {thread.writer.describe()}: {thread.error}")
+                thread.queue.put(chunk)
+        for thread in threads:
+            thread.queue.put(size)
+    finally:
+        os.close(fd)
+        for thread in threads:
+            thread.queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    for thread in threads:
+        if thread.error is not None:
+            raise RuntimeError(f"Falha no escritor {thread.writer.describe()}: {thread.error}")
+    return size
@@ -0,0 +1,95 @@
+"""
+    UNMM Image Tool Extents
+    - Version: 1.0
+    - Description: Leitura de imagens RAW esparsas extent por extent, pulando buracos.
+"""
+
+import errno
+import os
+
+from dataclasses import dataclass
+from typing import Iterator
+
+# Tamanho padrão dos blocos entregues pelo leitor
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@dataclass
+class Chunk:
+    """
+        Trecho da imagem alinhado ao tamanho de bloco do leitor.
+        Se data for None, o trecho é um buraco (lido como zeros).
+    """
+
+    offset: int
+    length: int
+    data: bytes = None
+
+    @property
+    def is_hole(self) -> bool:
+        return self.data is None
+
+
+def data_extents(fd: int, size: int) -> Iterator[tuple[int, int]]:
+    """
+        Retorna os intervalos (início, fim) da imagem que contêm dados, usando SEEK_DATA e
+        SEEK_HOLE. Se o sistema de arquivos não suportar, a imagem inteira é considerada dados.
+    """
+
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                return
+            if e.errno in (errno.EINVAL, errno.EOPNOTSUPP):
+                yield offset, size
+                return
+            raise
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        offset = end
+
+
+def iter_chunks(fd: int, size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Chunk]:
+    """
+        Percorre a imagem em blocos alinhados a chunk_size. Apenas os blocos que contêm algum
+        extent de dados são lidos; sequências de blocos sem dados são entregues como um único
+        buraco.
+    """
+
+    position = 0
+    for start, end in data_extents(fd, size):
+        first = (start // chunk_size) * chunk_size
+        last = min(((end + chunk_size - 1) // chunk_size) * chunk_size, size)
+        first = max(first, position)
+        if first > position:
+            yield Chunk(position, first - position)
+        for offset in range(first, last, chunk_size):
+            length = min(chunk_size, size - offset)
+            yield Chunk(offset, length, os.pread(fd, length, offset))
+        position = max(position, last)
+
+    if position < size:
+        yield Chunk(position, size - position)
+
+
+def is_zero(data: bytes) -> bool:
+    """
+        Verifica se o bloco contém apenas zeros.
+    """
+
+    return not data or (data[0] == 0 and data == bytes(len(data)))
+
+
+def iter_zeros(length: int, block_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+        Gera blocos de zeros que somam o tamanho informado, reaproveitando o mesmo buffer.
+    """
+
+    zero = bytes(min(length, block_size))
+    while length > 0:
+        size = min(length, block_size)
+        yield zero if size == len(zero) else zero[:size]
+        length -= size
@@ -0,0 +1,199 @@
+"""
+    UNMM Image Tool Seekable
+    - Version: 1.0
+    - Description: Imagens RAW comprimidas no formato zstd seekable (frames independentes
+                   com tabela de busca), com compressão multi-thread e acesso aleatório.
+"""
+
+import bisect
+import os
+import struct
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from imgtool.export import WRITERS, Writer
+from imgtool.extents import is_zero
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tamanho padrão dos dados descomprimidos de cada frame
+DEFAULT_FRAME_SIZE = 4 * 1024 * 1024
+
+# Constantes do formato zstd seekable (contrib/seekable_format do zstd)
+SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+FOOTER_FORMAT = "<IBI"
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+CHECKSUM_FLAG = 0x80
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError(
+            "O módulo Python 'zstandard' é necessário para imagens zstd seekable "
+            "(instale o pacote python3-zstandard)."
+        )
+
+
+class SeekableZstdWriter(Writer):
+    """
+        Imagem RAW comprimida em frames zstd independentes seguidos de uma tabela de busca.
+        Os frames são comprimidos em paralelo e gravados na ordem original.
+    """
+
+    name = "zst"
+
+    def __init__(self, path: str, level: int = 3, frame_size: int = DEFAULT_FRAME_SIZE,
+                 workers: int = None):
+        _require_zstandard()
+        super().__init__(path)
+        self.file = open(path, "wb")
+        self.level = level
+        self.frame_size = frame_size
+        workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.max_pending = 2 * workers
+        self.pending = deque()
+        self.entries = []
+        self.zero_frames = {}
+
+    def _compress(self, data: bytes) -> bytes:
+        compressor = zstandard.ZstdCompressor(level=self.level, write_checksum=True)
+        return compressor.compress(data)
+
+    def _submit(self, future_or_frame, length: int):
+        self.pending.append((future_or_frame, length))
+        while len(self.pending) > self.max_pending:
+            self._flush_one()
+
+    def _flush_one(self):
+        item, length = self.pending.popleft()
+        frame = item if isinstance(item, bytes) else item.result()
+        self.file.write(frame)
+        self.entries.append((len(frame), length))
+
+    def data(self, offset: int, data: bytes):
+        for pos in range(0, len(data), self.frame_size):
+            frame = data[pos:pos + self.frame_size]
+            if is_zero(frame):
+                self.hole(offset + pos, len(frame))
+            else:
+                self._submit(self.pool.submit(self._compress, frame), len(frame))
+
+    def hole(self, offset: int, length: int):
+        while length > 0:
+            size = min(length, self.frame_size)
+            if size not in self.zero_frames:
+                self.zero_frames[size] = self._compress(bytes(size))
+            self._submit(self.zero_frames[size], size)
+            length -= size
+
+    def close(self, size: int):
+        while self.pending:
+            self._flush_one()
+        self.pool.shutdown()
+
+        table = b"".join(struct.pack("<II", compressed, decompressed)
+                         for compressed, decompressed in self.entries)
+        table += struct.pack(FOOTER_FORMAT, len(self.entries), 0, SEEKABLE_MAGIC)
+        self.file.write(struct.pack("<II", SKIPPABLE_MAGIC, len(table)))
+        self.file.write(table)
+        self.file.close()
+
+
+class SeekableZstdReader:
+    """
+        Leitor de imagens zstd seekable com acesso aleatório pelos offsets descomprimidos.
+    """
+
+    def __init__(self, path: str):
+        _require_zstandard()
+        self.file = open(path, "rb")
+        self.compressed_offsets, self.offsets = self._read_seek_table()
+        self.size = self.offsets[-1]
+
+    def _read_seek_table(self) -> tuple[list[int], list[int]]:
+        """
+            Lê a tabela de busca no final do arquivo. Retorna as listas de offsets
+            comprimidos e descomprimidos do início de cada frame (com o total no final).
+        """
+
+        self.file.seek(-FOOTER_SIZE, os.SEEK_END)
+        frame_count, descriptor, magic = struct.unpack(FOOTER_FORMAT, self.file.read(FOOTER_SIZE))
+        if magic != SEEKABLE_MAGIC:
+            raise ValueError("Arquivo não está no formato zstd seekable.")
+
+        entry_size = 12 if descriptor & CHECKSUM_FLAG else 8
+        table_size = frame_count * entry_size
+        self.file.seek(-(FOOTER_SIZE + table_size), os.SEEK_END)
+        table = self.file.read(table_size)
+
+        compressed_offsets = [0]
+        offsets = [0]
+        for i in range(frame_count):
+            compressed, decompressed = struct.unpack_from("<II", table, i * entry_size)
+            compressed_offsets.append(compressed_offsets[-1] + compressed)
+            offsets.append(offsets[-1] + decompressed)
+        return compressed_offsets, offsets
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def read_frame(self, index: int) -> bytes:
+        """
+            Lê e descomprime um único frame.
+        """
+
+        start = self.compressed_offsets[index]
+        length = self.compressed_offsets[index + 1] - start
+        frame = os.pread(self.file.fileno(), length, start)
+        return zstandard.ZstdDecompressor().decompress(frame)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """
+            Lê um trecho da imagem descomprimindo apenas os frames necessários.
+        """
+
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+
+        first = bisect.bisect_right(self.offsets, offset) - 1
+        result = bytearray()
+        index = first
+        while index < self.frame_count and self.offsets[index] < end:
+            result += self.read_frame(index)
+            index += 1
+        start = offset - self.offsets[first]
+        return bytes(result[start:start + (end - offset)])
+
+    def restore(self, output_path: str, workers: int = None):
+        """
+            Restaura a imagem RAW esparsa: frames zerados não são gravados e ficam como
+            buracos no arquivo de saída.
+        """
+
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            def restore_frame(index: int):
+                data = self.read_frame(index)
+                if not is_zero(data):
+                    os.pwrite(fd, data, self.offsets[index])
+
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+                for _ in pool.map(restore_frame, range(self.frame_count)):
+                    pass
+            os.ftruncate(fd, self.size)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self.file.close()
+
+
+WRITERS[SeekableZstdWriter.name] = SeekableZstdWriter
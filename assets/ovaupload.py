@@ -0,0 +1,96 @@
+"""
+    ovaupload.py
+    ==============
+    Envia o TAR do OVA para um endpoint compatível com S3 via multipart upload à medida
+    que ele é gerado, sem exigir o arquivo completo em disco.
+
+    Com arquivos informados, o próprio script executa o tar e só conclui o upload se o tar
+    terminar com sucesso. Sem arquivos, o TAR é lido da entrada padrão e o upload só é
+    concluído se o fluxo terminar com o fim de arquivo do TAR. Em ambos os casos, um TAR
+    incompleto cancela o upload.
+
+    Autor: João Paulo (o Jppgmx)
+    Sob licença MIT
+"""
+
+import argparse as ap
+import sys
+
+from ovftool import upload
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Envia a entrada padrão para um endpoint compatível com S3 (multipart upload).",
+        formatter_class=ap.RawDescriptionHelpFormatter,
+        epilog="""
+As credenciais são lidas de AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY e AWS_SESSION_TOKEN.
+Sem credenciais, as requisições são enviadas sem assinatura.
+
+Exemplos:
+  python ovaupload.py https://s3.example.com/bucket/vm.ova -C output vm.ovf vm.mf vm.vmdk
+  python ovaupload.py --output vm.ova http://127.0.0.1:9000/bucket/vm.ova vm.ovf vm.mf vm.vmdk
+  tar -cf - vm.ovf vm.mf vm.vmdk | python ovaupload.py https://s3.example.com/bucket/vm.ova
+        """
+    )
+    parser.add_argument("url",
+                        help="URL de destino no formato http[s]://host[:porta]/bucket/chave")
+    parser.add_argument("members",
+                        nargs="*",
+                        metavar="FILE",
+                        help="Arquivos empacotados pelo tar, na ordem (sem arquivos, lê o TAR da entrada padrão)")
+    parser.add_argument("-C", "--directory",
+                        default=".",
+                        help="Diretório dos arquivos empacotados (padrão: diretório atual)")
+    parser.add_argument("--output",
+                        help="Grava também uma cópia local do fluxo no caminho informado")
+    parser.add_argument("--region",
+                        help="Região usada na assinatura (padrão: AWS_REGION ou us-east-1)")
+    parser.add_argument("--part-size",
+                        type=int,
+                        default=upload.DEFAULT_PART_SIZE,
+                        help="Tamanho de cada parte em bytes "
+                             f"(padrão: {upload.DEFAULT_PART_SIZE}, mínimo: {upload.MIN_PART_SIZE})")
+    parser.add_argument("--concurrency",
+                        type=int,
+                        default=upload.DEFAULT_CONCURRENCY,
+                        help="Número de partes enviadas simultaneamente "
+                             f"(padrão: {upload.DEFAULT_CONCURRENCY})")
+    parser.add_argument("--retries",
+                        type=int,
+                        default=upload.DEFAULT_RETRIES,
+                        help=f"Número de novas tentativas por requisição (padrão: {upload.DEFAULT_RETRIES})")
+    args = parser.parse_intermixed_args()
+
+    if args.part_size < upload.MIN_PART_SIZE:
+        parser.error(f"--part-size deve ser de pelo menos {upload.MIN_PART_SIZE} bytes")
+    if args.concurrency < 1:
+        parser.error("--concurrency deve ser maior que zero")
+
+    try:
+        target = upload.MultipartUpload(
+            args.url,
+            credentials=upload.Credentials.from_environment(args.region),
+            retries=args.retries
+        )
+        producer = upload.TarProducer(args.directory, args.members) if args.members else None
+        output = open(args.output, "wb") if args.output else None
+        try:
+            size, sha256 = upload.stream_upload(
+                producer.stream if producer else sys.stdin.buffer, target,
+                part_size=args.part_size,
+                concurrency=args.concurrency,
+                output=output,
+                verify=producer.check if producer else upload.check_tar_end
+            )
+        finally:
+            if output is not None:
+                output.close()
+            if producer is not None:
+                producer.close()
+    except (OSError, ValueError, upload.UploadError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Upload concluído: {args.url} ({size} bytes, {len(target.etags)} partes)")
+    print(f"SHA256: {sha256}")
@@ -0,0 +1,437 @@
+"""
+    overlaytool.py
+    ==============
+    Construtor de pacotes de sobreposição (overlays) de assets dos add-ons.
+
+    Cada overlay copia um arquivo ou diretório dos assets para um destino no rootfs, com
+    dono e modo definidos. Os overlays de um add-on são compilados em um único TAR,
+    nomeado pelo hash do seu conteúdo e mantido em cache, que é aplicado no rootfs com
+    uma única extração (tar -xpf --numeric-owner). Os hashes dos arquivos de origem ficam
+    em um índice no cache (por caminho, tamanho e mtime), de modo que um pacote em cache é
+    reaproveitado sem reler os assets. Apenas os pacotes usados mais recentemente são
+    mantidos no cache (ver --keep).
+
+    Um mesmo arquivo repetido com o mesmo dono e modo é gravado como hardlink; cópias com
+    donos ou modos diferentes (ex: /etc/skel e /home/{user}) são gravadas separadamente.
+
+    Formato de um overlay: "origem:destino:dono:modo"
+      origem  - Caminho relativo ao diretório de assets.
+      destino - Caminho absoluto no rootfs.
+      dono    - Usuário (ou usuário.grupo) do rootfs. Se vazio, usa root.
+      modo    - Modo octal dos arquivos (ex: 0644). Se vazio, mantém o modo da origem.
+
+    O marcador {user} no destino e no dono é substituído pelo usuário informado em --user.
+    A última linha da saída é o caminho do pacote.
+
+    Autor: João Paulo (o Jppgmx)
+    Sob licença MIT
+"""
+
+import argparse as ap
+import hashlib
+import json
+import os
+import stat
+import sys
+import tarfile
+
+from dataclasses import dataclass
+
+# Versão do formato dos pacotes (faz parte do hash, invalidando o cache ao mudar)
+PACK_FORMAT = 1
+
+# Índice dos hashes dos arquivos de origem, no diretório de cache
+DIGEST_INDEX = "digests.json"
+
+# Quantidade padrão de pacotes mantidos no cache
+DEFAULT_KEEP = 16
+
+# Tamanho do bloco de leitura usado no cálculo de hashes
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Modo dos diretórios criados pelos overlays
+DIRECTORY_MODE = 0o755
+
+# Marcador substituído pelo usuário padrão
+USER_PLACEHOLDER = "{user}"
+
+
+@dataclass
+class Overlay:
+    """
+        Sobreposição de um arquivo ou diretório dos assets no rootfs.
+    """
+
+    source: str
+    dest: str
+    owner: str = "root"
+    mode: int = None
+
+
+@dataclass
+class Member:
+    """
+        Entrada do pacote. Para arquivos regulares, digest é o sha256 do conteúdo; para
+        links simbólicos, target é o destino do link.
+    """
+
+    name: str
+    kind: str
+    uid: int
+    gid: int
+    mode: int
+    mtime: int = 0
+    source: str = None
+    digest: str = None
+    target: str = None
+
+
+def parse_overlay(spec: str, user: str) -> Overlay:
+    """
+        Converte a string "origem:destino:dono:modo" em um Overlay.
+    """
+
+    fields = spec.split(":")
+    if len(fields) != 4 or not fields[0] or not fields[1]:
+        raise ValueError(f"Overlay inválido: '{spec}'. Use origem:destino:dono:modo.")
+
+    if USER_PLACEHOLDER in spec and not user:
+        raise ValueError(f"O overlay '{spec}' usa {USER_PLACEHOLDER}, mas --user não foi informado.")
+
+    source, dest, owner, mode = (field.replace(USER_PLACEHOLDER, user or "") for field in fields)
+    if not dest.startswith("/"):
+        raise ValueError(f"O destino do overlay '{spec}' deve ser um caminho absoluto.")
+
+    try:
+        parsed_mode = int(mode, 8) if mode else None
+    except ValueError as e:
+        raise ValueError(f"Modo inválido no overlay '{spec}': '{mode}'.") from e
+
+    return Overlay(source=source, dest=os.path.normpath(dest), owner=owner or "root", mode=parsed_mode)
+
+
+def read_ids(root: str) -> tuple[dict[str, tuple[int, int]], dict[str, int]]:
+    """
+        Lê os usuários (uid, gid primário) e grupos do /etc/passwd e /etc/group do rootfs.
+    """
+
+    users = {"root": (0, 0)}
+    groups = {"root": 0}
+
+    for path, table in ((os.path.join(root, "etc/passwd"), "users"),
+                        (os.path.join(root, "etc/group"), "groups")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split(":")
+                    if len(fields) < 4:
+                        continue
+                    if table == "users":
+                        users[fields[0]] = (int(fields[2]), int(fields[3]))
+                    else:
+                        groups[fields[0]] = int(fields[2])
+        except FileNotFoundError:
+            pass
+
+    return users, groups
+
+
+def resolve_owner(owner: str, users: dict, groups: dict) -> tuple[int, int]:
+    """
+        Converte "usuário" ou "usuário.grupo" em (uid, gid) do rootfs.
+    """
+
+    name, _, group = owner.partition(".")
+    if name not in users:
+        raise ValueError(f"Usuário '{name}' não existe no rootfs.")
+    uid, gid = users[name]
+
+    if group:
+        if group not in groups:
+            raise ValueError(f"Grupo '{group}' não existe no rootfs.")
+        gid = groups[group]
+    return uid, gid
+
+
+def file_digest(path: str) -> str:
+    """
+        Calcula o sha256 de um arquivo.
+    """
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_BLOCK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class DigestIndex:
+    """
+        Índice dos hashes dos arquivos de origem, indexado pelo caminho e validado pelo
+        tamanho e mtime (em nanossegundos). Arquivos sem alteração não são relidos.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries: dict[str, list] = {}
+        self.changed = False
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def digest(self, path: str, st: os.stat_result) -> str:
+        key = os.path.abspath(path)
+        entry = self.entries.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+
+        digest = file_digest(path)
+        self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+        self.changed = True
+        return digest
+
+    def save(self):
+        """
+            Grava o índice (sem as entradas de arquivos que não existem mais).
+        """
+
+        if not self.path or not self.changed:
+            return
+        entries = {key: entry for key, entry in self.entries.items() if os.path.lexists(key)}
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temp, self.path)
+
+
+def _add_directory(members: dict[str, Member], name: str, uid: int, gid: int, mtime: int):
+    if name not in members:
+        members[name] = Member(name=name, kind="dir", uid=uid, gid=gid, mode=DIRECTORY_MODE, mtime=mtime)
+
+
+def collect(overlays: list[Overlay], assets: str, root: str, users: dict, groups: dict,
+            digests: DigestIndex = None) -> list[Member]:
+    """
+        Monta a lista de entradas do pacote. Diretórios ancestrais do destino que ainda não
+        existem no rootfs são incluídos com o dono do overlay; os existentes não são tocados.
+    """
+
+    members: dict[str, Member] = {}
+    digests = digests or DigestIndex()
+
+    for overlay in overlays:
+        source = os.path.join(assets, overlay.source)
+        if not os.path.lexists(source):
+            raise ValueError(f"Origem do overlay não encontrada: '{source}'.")
+
+        uid, gid = resolve_owner(overlay.owner, users, groups)
+        dest = overlay.dest.lstrip("/")
+        mtime = int(os.lstat(source).st_mtime)
+
+        parents = []
+        parent = os.path.dirname(dest)
+        while parent and not os.path.isdir(os.path.join(root, parent)):
+            parents.append(parent)
+            parent = os.path.dirname(parent)
+        for parent in reversed(parents):
+            _add_directory(members, parent, uid, gid, mtime)
+
+        if os.path.isdir(source) and not os.path.islink(source):
+            walk = os.walk(source)
+        else:
+            walk = [(os.path.dirname(source), [], [os.path.basename(source)])]
+            source = None
+
+        for dirpath, dirnames, filenames in walk:
+            dirnames.sort()
+            if source is not None:
+                relative = os.path.relpath(dirpath, source)
+                base = dest if relative == "." else os.path.join(dest, relative)
+                _add_directory(members, base, uid, gid, int(os.lstat(dirpath).st_mtime))
+            else:
+                base = os.path.dirname(dest)
+
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                name = dest if source is None else os.path.join(base, filename)
+                st = os.lstat(path)
+
+                if stat.S_ISLNK(st.st_mode):
+                    member = Member(name=name, kind="symlink", uid=uid, gid=gid, mode=0o777,
+                                    mtime=int(st.st_mtime), target=os.readlink(path))
+                elif stat.S_ISREG(st.st_mode):
+                    mode = overlay.mode if overlay.mode is not None else stat.S_IMODE(st.st_mode)
+                    member = Member(name=name, kind="file", uid=uid, gid=gid, mode=mode,
+                                    mtime=int(st.st_mtime), source=path, digest=digests.digest(path, st))
+                else:
+                    print(f"Aviso: '{path}' não é um arquivo regular; ignorado.", file=sys.stderr)
+                    continue
+
+                members[name] = member
+
+    return list(members.values())
+
+
+def pack_digest(members: list[Member]) -> str:
+    """
+        Calcula o hash do pacote a partir das entradas (caminhos, donos, modos e conteúdo).
+    """
+
+    manifest = [PACK_FORMAT] + [
+        [m.name, m.kind, m.uid, m.gid, m.mode, m.digest, m.target] for m in members
+    ]
+    return hashlib.sha256(json.dumps(manifest).encode()).hexdigest()
+
+
+def write_pack(members: list[Member], path: str) -> int:
+    """
+        Grava o pacote TAR. Arquivos com o mesmo conteúdo, dono e modo são gravados como
+        hardlinks para a primeira ocorrência (um hardlink compartilha dono e modo, por isso
+        cópias com donos diferentes são gravadas por inteiro). Retorna a quantidade de hardlinks.
+    """
+
+    links: dict[tuple, str] = {}
+    hardlinks = 0
+
+    with tarfile.open(path, "w", format=tarfile.GNU_FORMAT) as tar:
+        for member in members:
+            info = tarfile.TarInfo(member.name)
+            info.uid, info.gid = member.uid, member.gid
+            info.uname = info.gname = ""
+            info.mode = member.mode
+            info.mtime = member.mtime
+
+            if member.kind == "dir":
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            elif member.kind == "symlink":
+                info.type = tarfile.SYMTYPE
+                info.linkname = member.target
+                tar.addfile(info)
+            else:
+                key = (member.digest, member.uid, member.gid, member.mode)
+                if key in links:
+                    info.type = tarfile.LNKTYPE
+                    info.linkname = links[key]
+                    tar.addfile(info)
+                    hardlinks += 1
+                    continue
+
+                links[key] = member.name
+                info.size = os.path.getsize(member.source)
+                with open(member.source, "rb") as f:
+                    tar.addfile(info, f)
+
+    return hardlinks
+
+
+def evict(cache: str, keep: int, current: str) -> int:
+    """
+        Remove do cache os pacotes menos recentes, mantendo os keep mais recentes (por
+        mtime, atualizado a cada uso) e o pacote atual. Retorna a quantidade removida.
+    """
+
+    packs = []
+    for entry in os.scandir(cache):
+        if entry.name.endswith(".tar") and entry.is_file(follow_symlinks=False):
+            packs.append((entry.stat(follow_symlinks=False).st_mtime_ns, entry.path))
+
+    removed = 0
+    for _, path in sorted(packs, reverse=True)[max(keep, 1):]:
+        if path == current:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def build(overlays: list[Overlay], assets: str, root: str, cache: str,
+          keep: int = DEFAULT_KEEP) -> tuple[str, bool]:
+    """
+        Monta o pacote dos overlays no diretório de cache, se ainda não existir, e remove
+        os pacotes excedentes do cache. Retorna o caminho do pacote e se ele foi
+        reaproveitado do cache.
+    """
+
+    os.makedirs(cache, exist_ok=True)
+    users, groups = read_ids(root)
+    digests = DigestIndex(os.path.join(cache, DIGEST_INDEX))
+    members = collect(overlays, assets, root, users, groups, digests)
+    digests.save()
+    path = os.path.join(cache, f"{pack_digest(members)}.tar")
+
+    cached = os.path.exists(path)
+    if cached:
+        os.utime(path)
+    else:
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            hardlinks = write_pack(members, temp)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        print(f"Pacote com {len(members)} entradas ({hardlinks} hardlinks) gravado em '{path}'.")
+
+    removed = evict(cache, keep, path)
+    if removed:
+        print(f"{removed} pacotes antigos removidos do cache.")
+    return path, cached
+
+
+def main(args: ap.Namespace):
+    if not os.path.isdir(args.root):
+        print(f"Erro: rootfs '{args.root}' não encontrado.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        overlays = [parse_overlay(spec, args.user) for spec in args.overlays]
+        path, cached = build(overlays, args.assets, args.root, args.cache, args.keep)
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if cached:
+        print(f"Pacote reaproveitado do cache: '{path}'.")
+    print(path)
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Compila overlays de assets em um pacote TAR com cache por conteúdo.",
+        formatter_class=ap.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python overlaytool.py --root /mnt/unmm --user user \\
+      "styles/wallpapers/space.jpg:/usr/share/lxqt/wallpapers/space.jpg:root:0644" \\
+      "config/openbox/rc.xml:/home/{user}/.config/openbox/rc.xml:{user}:0644"
+        """
+    )
+
+    parser.add_argument("overlays",
+                        nargs="+",
+                        metavar="OVERLAY",
+                        help="Overlay no formato origem:destino:dono:modo")
+    parser.add_argument("--root",
+                        required=True,
+                        help="Ponto de montagem do rootfs (usado para resolver usuários e grupos)")
+    parser.add_argument("--assets",
+                        default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Diretório de assets (padrão: diretório deste script)")
+    parser.add_argument("--cache",
+                        default="/var/cache/unmm/overlays",
+                        help="Diretório de cache dos pacotes (padrão: /var/cache/unmm/overlays)")
+    parser.add_argument("--keep",
+                        type=int,
+                        default=DEFAULT_KEEP,
+                        help=f"Quantidade de pacotes mantidos no cache (padrão: {DEFAULT_KEEP})")
+    parser.add_argument("--user",
+                        help="Usuário que substitui o marcador {user}")
+
+    main(parser.parse_args())
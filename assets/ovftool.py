@@ -8,53 +8,113 @@
 """
 
 import argparse as ap
+import json
+import sys
 
-from ovftool import constants, data, factory
+from ovftool import constants, data, factory, package
 
 
-def main(args: ap.Namespace):
+def read_license(args: ap.Namespace) -> str:
     """
-    Função principal para gerar OVF.
+    Retorna o texto da licença, lendo o arquivo se --license-file foi informado.
     """
 
-    ovf, env = factory.envelope()
-    refs = factory.references(ovf, env)
-    ds = factory.disk_section(ovf, env)
-    ns = factory.network_section(ovf, env)
+    license_text = args.license
+    # Se for um caminho de arquivo, ler o conteúdo
+    if args.license_file:
+        try:
+            with open(args.license, "r", encoding="utf-8") as f:
+                license_text = f.read()
+        except FileNotFoundError:
+            print(f"Aviso: Arquivo de licença '{args.license}' não encontrado. Usando como texto.")
+    return license_text
 
-    # Referências de arquivos externos
-    if args.refs:
-        for ref in data.parse_datalist(args.refs, data.File):
-            refs.appendChild(ref.to_xml(ovf))
 
-    # Discos virtuais
-    if args.disks:
-        for disk in data.parse_datalist(args.disks, data.Disk):
-            ds.appendChild(disk.to_xml(ovf))
+def load_configurations(args: ap.Namespace) -> list[data.Configuration]:
+    """
+    Carrega a matriz de dimensionamentos de --config e --config-file.
+    Se nenhuma configuração for marcada como padrão, a primeira passa a ser.
+    """
 
-    # Redes lógicas
-    if args.networks:
-        for network in data.parse_datalist(args.networks, data.Network):
-            ns.appendChild(network.to_xml(ovf))
+    configs = []
+    if args.config_file:
+        with open(args.config_file, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                configs.append(data.parse_mapping(entry, data.Configuration))
+    if args.configs:
+        configs.extend(data.parse_datalist(args.configs, data.Configuration))
+
+    ids = [config.id for config in configs]
+    duplicates = {config_id for config_id in ids if ids.count(config_id) > 1}
+    if duplicates:
+        raise ValueError(f"Configurações duplicadas: {', '.join(sorted(duplicates))}")
+
+    defaults = [config for config in configs if config.default]
+    if len(defaults) > 1:
+        raise ValueError("Apenas uma configuração pode ser marcada como padrão.")
+    if configs and not defaults:
+        configs[0].default = True
+    return configs
+
+
+def update(args: ap.Namespace):
+    """
+    Atualiza anotação, licença e versão do produto de um OVA existente sem regravar o disco.
+    """
 
-    # VirtualSystem (Content obrigatório)
+    try:
+        ovf_name, mf_name = package.update_ova(
+            args.update_ova,
+            annotation=args.annotation,
+            license_text=read_license(args) if args.license else None,
+            product_version=args.product_version
+        )
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"OVA atualizado com sucesso: {args.update_ova} ({ovf_name}"
+          f"{', ' + mf_name if mf_name else ''})")
+
+
+def metadata_sections(ovf, parent, args: ap.Namespace):
+    """
+    Adiciona as seções de anotação e de produto ao VirtualSystem ou à coleção.
+    """
+
+    # AnnotationSection (anotação customizada)
+    if args.annotation:
+        factory.annotation_section(ovf, parent, args.annotation)
+
+    # ProductSection (informações do produto)
+    if args.product or args.vendor or args.product_version:
+        factory.product_section(
+            ovf, parent,
+            product=args.product,
+            vendor=args.vendor,
+            version=args.product_version,
+            product_url=args.product_url,
+            vendor_url=args.vendor_url
+        )
+
+
+def virtual_system(ovf, parent, args: ap.Namespace, node: data.Node,
+                   configs: list[data.Configuration], license_text: str = None):
+    """
+    Cria um VirtualSystem com o seu sistema operacional e hardware virtual.
+    Os discos e redes referenciados são os mesmos para todos os VirtualSystems do pacote.
+    """
+
+    # VirtualSystem
     vs = factory.virtual_system(
-        ovf, env,
-        vs_id=args.vm_id,
-        info=args.vm_info or "A virtual machine",
-        name=args.vm_name
+        ovf, parent,
+        vs_id=node.id,
+        info=node.info or "A virtual machine",
+        name=node.name
     )
 
     # EulaSection (licença)
-    if args.license:
-        license_text = args.license
-        # Se for um caminho de arquivo, ler o conteúdo
-        if args.license_file:
-            try:
-                with open(args.license, "r", encoding="utf-8") as f:
-                    license_text = f.read()
-            except FileNotFoundError:
-                print(f"Aviso: Arquivo de licença '{args.license}' não encontrado. Usando como texto.")
+    if license_text is not None:
         factory.eula_section(ovf, vs, license_text)
 
     # OperatingSystemSection
@@ -72,7 +132,7 @@ def main(args: ap.Namespace):
     vssd = data.VSSD(
         instance_id="0",
         element_name="Virtual Hardware Family",
-        virtual_system_identifier=args.vm_id,
+        virtual_system_identifier=node.id,
         virtual_system_type=args.vs_type
     )
     vhs.appendChild(vssd.to_xml(ovf))
@@ -80,30 +140,38 @@ def main(args: ap.Namespace):
     # Contador de instâncias para RASD Items
     instance_counter = 1
 
-    # CPU
-    if args.cpu:
-        cpu_item = data.RASD(
-            instance_id=str(instance_counter),
-            resource_type=constants.RESOURCE_TYPE["PROCESSOR"],
-            element_name=f"{args.cpu} virtual CPU(s)",
-            description="Number of Virtual CPUs",
-            virtual_quantity=args.cpu
-        )
-        vhs.appendChild(cpu_item.to_xml(ovf))
-        instance_counter += 1
+    # CPU e RAM (um par de Items por configuração, se houver dimensionamentos)
+    node_cpu = node.cpu or args.cpu
+    node_ram = node.ram or args.ram
+    sizings = [(config.id, config.cpu or node_cpu, config.ram or node_ram) for config in configs]
+    if not sizings:
+        sizings = [(None, node_cpu, node_ram)]
 
-    # RAM
-    if args.ram:
-        ram_item = data.RASD(
-            instance_id=str(instance_counter),
-            resource_type=constants.RESOURCE_TYPE["MEMORY"],
-            element_name=f"{args.ram} MB of memory",
-            description="Memory Size",
-            allocation_units=constants.ALLOCATION_UNITS["MEGABYTES"],
-            virtual_quantity=args.ram
-        )
-        vhs.appendChild(ram_item.to_xml(ovf))
-        instance_counter += 1
+    for config_id, cpu, ram in sizings:
+        if cpu:
+            cpu_item = data.RASD(
+                instance_id=str(instance_counter),
+                resource_type=constants.RESOURCE_TYPE["PROCESSOR"],
+                element_name=f"{cpu} virtual CPU(s)",
+                description="Number of Virtual CPUs",
+                virtual_quantity=cpu,
+                configuration=config_id
+            )
+            vhs.appendChild(cpu_item.to_xml(ovf))
+            instance_counter += 1
+
+        if ram:
+            ram_item = data.RASD(
+                instance_id=str(instance_counter),
+                resource_type=constants.RESOURCE_TYPE["MEMORY"],
+                element_name=f"{ram} MB of memory",
+                description="Memory Size",
+                allocation_units=constants.ALLOCATION_UNITS["MEGABYTES"],
+                virtual_quantity=ram,
+                configuration=config_id
+            )
+            vhs.appendChild(ram_item.to_xml(ovf))
+            instance_counter += 1
 
     # Controlador IDE (se houver discos, precisamos de controlador)
     ide_instance = None
@@ -146,25 +214,85 @@ def main(args: ap.Namespace):
             vhs.appendChild(nic_item.to_xml(ovf))
             instance_counter += 1
 
-    # AnnotationSection (anotação customizada)
-    if args.annotation:
-        factory.annotation_section(ovf, vs, args.annotation)
+    return vs
 
-    # ProductSection (informações do produto)
-    if args.product or args.vendor or args.product_version:
-        factory.product_section(
-            ovf, vs,
-            product=args.product,
-            vendor=args.vendor,
-            version=args.product_version,
-            product_url=args.product_url,
-            vendor_url=args.vendor_url
+
+def main(args: ap.Namespace):
+    """
+    Função principal para gerar OVF.
+    """
+
+    ovf, env = factory.envelope()
+    refs = factory.references(ovf, env)
+    ds = factory.disk_section(ovf, env)
+    ns = factory.network_section(ovf, env)
+
+    # Referências de arquivos externos
+    if args.refs:
+        for ref in data.parse_datalist(args.refs, data.File):
+            refs.appendChild(ref.to_xml(ovf))
+
+    # Discos virtuais
+    if args.disks:
+        for disk in data.parse_datalist(args.disks, data.Disk):
+            ds.appendChild(disk.to_xml(ovf))
+
+    # Redes lógicas
+    if args.networks:
+        for network in data.parse_datalist(args.networks, data.Network):
+            ns.appendChild(network.to_xml(ovf))
+
+    # Opções de implantação (dimensionamentos)
+    try:
+        configs = load_configurations(args)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if configs:
+        dos = factory.deployment_option_section(ovf, env)
+        for config in configs:
+            dos.appendChild(config.to_xml(ovf))
+
+    # Content obrigatório: um VirtualSystem ou uma coleção de VirtualSystems (nós)
+    try:
+        nodes = data.parse_datalist(args.nodes, data.Node) if args.nodes else []
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if nodes:
+        # Os nós compartilham as mesmas entradas de File/Disk: o pacote contém uma única
+        # cópia do disco, independentemente do número de nós.
+        vsc = factory.virtual_system_collection(
+            ovf, env,
+            vsc_id=args.vm_id,
+            info=args.vm_info or "A collection of virtual machines",
+            name=args.vm_name
         )
 
-    # Salvar arquivo OVF
-    with open(args.output, "w", encoding="utf-8") as f:
-        ovf.writexml(f, indent="", addindent="  ", newl="\n", encoding="UTF-8")
-    
+        # Seções comuns a todos os nós (precedem os VirtualSystems)
+        if args.license:
+            factory.eula_section(ovf, vsc, read_license(args))
+        metadata_sections(ovf, vsc, args)
+
+        for node in nodes:
+            virtual_system(ovf, vsc, args, node, configs)
+    else:
+        node = data.Node(id=args.vm_id, name=args.vm_name, info=args.vm_info,
+                         cpu=args.cpu, ram=args.ram)
+        vs = virtual_system(ovf, env, args, node, configs, license_text=(
+            read_license(args) if args.license else None
+        ))
+        metadata_sections(ovf, vs, args)
+
+    # Salvar arquivo OVF (com espaço reservado para atualizações no local, se pedido)
+    content = package.serialize(ovf)
+    if args.reserve:
+        content = package.pad_descriptor(content, package.reserved_size(len(content), args.reserve))
+    with open(args.output, "wb") as f:
+        f.write(content)
+
     print(f"OVF gerado com sucesso: {args.output}")
 
 
@@ -176,16 +304,28 @@ if __name__ == "__main__":
 Exemplos:
   python ovftool.py --vm-id myvm --cpu 2 --ram 2048 -o myvm.ovf
   python ovftool.py --vm-id server1 --vm-name "Web Server" --os-id 101 --cpu 4 --ram 4096 -o server.ovf
+  python ovftool.py --vm-id myvm -o myvm.ovf --reserve 65536
+  python ovftool.py --vm-id myvm -o myvm.ovf -c id=small,label=Small,cpu=1,ram=1024 -c id=large,label=Large,cpu=4,ram=8192
+  python ovftool.py --vm-id cluster -o cluster.ovf -r id=file1,href=disk.vmdk -d disk_id=vmdisk1,capacity=8,file_ref=file1 --node id=node1 --node id=node2,cpu=4
+  python ovftool.py --update-ova myvm.ova --product-version 1.0.1 --annotation "Nova anotação"
         """
     )
 
-    # Argumentos obrigatórios
+    # Argumentos obrigatórios (exceto no modo de atualização)
     parser.add_argument("--vm-id",
-                        required=True,
                         help="ID único do VirtualSystem (obrigatório)")
     parser.add_argument("-o", "--output",
-                        required=True,
                         help="Caminho do arquivo de saída OVF")
+    parser.add_argument("--reserve",
+                        type=int,
+                        default=0,
+                        metavar="BYTES",
+                        help="Espaço em branco reservado no final do OVF para "
+                             "atualizações no local (padrão: 0)")
+    parser.add_argument("--update-ova",
+                        metavar="OVA",
+                        help="Atualiza no local a anotação, a licença e a versão do produto "
+                             "de um OVA existente, sem regravar o disco")
 
     # Informações da VM
     vm_group = parser.add_argument_group("Informações da VM")
@@ -227,6 +367,19 @@ Exemplos:
                           default=1024,
                           help="Memória RAM em MB (padrão: 1024)")
 
+    # Dimensionamentos (DeploymentOptionSection)
+    cfg_group = parser.add_argument_group("Dimensionamentos")
+    cfg_group.add_argument("-c", "--config",
+                           action="append",
+                           help="Adicionar configuração de implantação. "
+                                "Formato: id=<id>,label=<label>[,description=<desc>]"
+                                "[,cpu=<n>][,ram=<mb>][,default=true]",
+                           dest="configs",
+                           metavar="config")
+    cfg_group.add_argument("--config-file",
+                           help="Arquivo JSON com a matriz de configurações "
+                                "(lista de objetos com os mesmos campos de --config)")
+
     # Recursos
     res_group = parser.add_argument_group("Recursos")
     res_group.add_argument("-r", "--ref",
@@ -253,6 +406,16 @@ Exemplos:
     ann_group.add_argument("--annotation", "-a",
                            help="Texto de anotação customizada para a VM")
 
+    # Nós (VirtualSystemCollection)
+    node_group = parser.add_argument_group("Nós")
+    node_group.add_argument("--node",
+                            action="append",
+                            help="Adicionar nó à coleção de VirtualSystems (todos compartilham os "
+                                 "mesmos discos e redes). --vm-id passa a identificar a coleção. "
+                                 "Formato: id=<id>[,name=<nome>][,info=<info>][,cpu=<n>][,ram=<mb>]",
+                            dest="nodes",
+                            metavar="node")
+
     # Produto
     prod_group = parser.add_argument_group("Produto")
     prod_group.add_argument("--product",
@@ -266,4 +429,10 @@ Exemplos:
     prod_group.add_argument("--vendor-url",
                             help="URL do fornecedor")
 
-    main(parser.parse_args())
+    parsed = parser.parse_args()
+    if parsed.update_ova:
+        update(parsed)
+    else:
+        if not parsed.vm_id or not parsed.output:
+            parser.error("os argumentos --vm-id e -o/--output são obrigatórios")
+        main(parsed)
@@ -279,6 +279,48 @@ class RASD(OVFData):
 
         return item
 
+@dataclass
+class Configuration(OVFData):
+    """
+    Representa o elemento Configuration dentro de DeploymentOptionSection.
+    Cada configuração define um dimensionamento (CPU e memória) selecionável na importação.
+    """
+    id: str
+    label: str
+    description: str = None
+    default: bool = False
+    cpu: int = None
+    ram: int = None  # Em MB
+
+    def to_xml(self, ovf_doc: md.Document) -> md.Element:
+        config = ovf_doc.createElement("ovf:Configuration")
+        config.setAttribute("ovf:id", self.id)
+        if self.default:
+            config.setAttribute("ovf:default", "true")
+
+        # Label e Description são obrigatórios em Configuration
+        label = ovf_doc.createElement("ovf:Label")
+        label.appendChild(ovf_doc.createTextNode(self.label))
+        config.appendChild(label)
+
+        desc = ovf_doc.createElement("ovf:Description")
+        desc.appendChild(ovf_doc.createTextNode(self.description or self.label))
+        config.appendChild(desc)
+
+        return config
+
+@dataclass
+class Node:
+    """
+    Representa um nó (VirtualSystem) de uma VirtualSystemCollection.
+    CPU e RAM ausentes herdam os valores globais da ferramenta.
+    """
+    id: str
+    name: str = None
+    info: str = None
+    cpu: int = None
+    ram: int = None  # Em MB
+
 ArgDict = dict[str, str]
 AnyOVFData = TypeVar('AnyOVFData', bound=OVFData)
 
@@ -303,13 +345,27 @@ def parse_dict(dstr: str) -> ArgDict:
 
     return result
 
-def parse_data(dstr: str, data_cls: type[AnyOVFData]) -> AnyOVFData:
+def parse_bool(value: str) -> bool:
     """
-        Converte uma string de formato chave1=valor1,chave2=valor2,...,chaveN=valorN em
-        uma instância do tipo de dado OVF especificado.
+        Converte uma string (true/false, yes/no, 1/0) em booleano.
+    """
+
+    if isinstance(value, bool):
+        return value
+    lowered = str(value).strip().lower()
+    if lowered in ("true", "yes", "1"):
+        return True
+    if lowered in ("false", "no", "0"):
+        return False
+    raise ValueError(f"'{value}' não é um booleano válido.")
+
+def parse_mapping(params: dict, data_cls: type[AnyOVFData]) -> AnyOVFData:
+    """
+        Converte um dicionário (ex: vindo de um arquivo JSON) em uma instância do
+        tipo de dado OVF especificado, validando campos obrigatórios e tipos.
     """
 
-    params = parse_dict(dstr)
+    params = dict(params)
     dfds = fields(data_cls)
     fd_names = {fd.name for fd in dfds}
     for fd in dfds:
@@ -323,7 +379,9 @@ def parse_data(dstr: str, data_cls: type[AnyOVFData]) -> AnyOVFData:
                 if field_type == int:
                     params[fd.name] = int(value_str)
                 elif field_type == str:
-                    params[fd.name] = value_str
+                    params[fd.name] = str(value_str)
+                elif field_type == bool:
+                    params[fd.name] = parse_bool(value_str)
                 else:
                     raise ValueError(f"Tipo de campo '{field_type}' não suportado para '{fd.name}'.")
             except ValueError as e:
@@ -335,6 +393,14 @@ def parse_data(dstr: str, data_cls: type[AnyOVFData]) -> AnyOVFData:
 
     return data_cls(**params)
 
+def parse_data(dstr: str, data_cls: type[AnyOVFData]) -> AnyOVFData:
+    """
+        Converte uma string de formato chave1=valor1,chave2=valor2,...,chaveN=valorN em
+        uma instância do tipo de dado OVF especificado.
+    """
+
+    return parse_mapping(parse_dict(dstr), data_cls)
+
 def parse_datalist(dstrs: list[str], data_cls: type[AnyOVFData]) -> list[AnyOVFData]:
     """
         Converte uma lista de strings de formato chave1=valor1,chave2=valor2,...,chaveN=valorN em
@@ -64,6 +64,23 @@ def network_section(ovf: md.Document, env: md.Element) -> md.Element:
     env.appendChild(ns)
     return ns
 
+def deployment_option_section(ovf: md.Document, env: md.Element,
+                              info: str = "Deployment configuration options") -> md.Element:
+    """
+    Cria a seção de opções de implantação (DeploymentOptionSection).
+    Cada elemento Configuration filho define um dimensionamento selecionável na importação;
+    os Items de hardware referenciam a configuração pelo atributo ovf:configuration.
+    """
+    dos = ovf.createElement("ovf:DeploymentOptionSection")
+
+    # Pela norma, toda Section precisa ter um filho <Info>
+    info_elem = ovf.createElement("ovf:Info")
+    info_elem.appendChild(ovf.createTextNode(info))
+    dos.appendChild(info_elem)
+
+    env.appendChild(dos)
+    return dos
+
 def virtual_system(ovf: md.Document, env: md.Element, 
                    vs_id: str, info: str = "A virtual machine",
                    name: str = None) -> md.Element:
@@ -72,7 +89,7 @@ def virtual_system(ovf: md.Document, env: md.Element,
     
     Args:
         ovf: Documento OVF
-        env: Elemento Envelope pai
+        env: Elemento pai (Envelope ou VirtualSystemCollection)
         vs_id: ID único do VirtualSystem (required)
         info: Descrição do sistema virtual
         name: Nome de exibição opcional
@@ -97,6 +114,40 @@ def virtual_system(ovf: md.Document, env: md.Element,
     env.appendChild(vs)
     return vs
 
+def virtual_system_collection(ovf: md.Document, env: md.Element,
+                              vsc_id: str, info: str = "A collection of virtual machines",
+                              name: str = None) -> md.Element:
+    """
+    Cria o elemento VirtualSystemCollection (Content com vários VirtualSystems).
+    As seções da coleção devem ser adicionadas antes dos VirtualSystems filhos.
+    
+    Args:
+        ovf: Documento OVF
+        env: Elemento Envelope pai
+        vsc_id: ID único da coleção (required)
+        info: Descrição da coleção
+        name: Nome de exibição opcional
+    
+    Returns:
+        Elemento VirtualSystemCollection
+    """
+    vsc = ovf.createElement("ovf:VirtualSystemCollection")
+    vsc.setAttribute("ovf:id", vsc_id)
+    
+    # Info é obrigatório em Content_Type
+    info_elem = ovf.createElement("ovf:Info")
+    info_elem.appendChild(ovf.createTextNode(info))
+    vsc.appendChild(info_elem)
+    
+    # Name é opcional
+    if name is not None:
+        name_elem = ovf.createElement("ovf:Name")
+        name_elem.appendChild(ovf.createTextNode(name))
+        vsc.appendChild(name_elem)
+    
+    env.appendChild(vsc)
+    return vsc
+
 def operating_system_section(ovf: md.Document, parent: md.Element,
                              os_id: int, description: str = None,
                              version: str = None,
@@ -0,0 +1,230 @@
+"""
+    UNMM OVF Tool Package
+    - Version: 1.0
+    - Description: Manipulação de pacotes OVA existentes (atualização de metadados no local).
+"""
+
+import hashlib
+import os
+import re
+import tarfile
+
+from dataclasses import dataclass
+from xml.dom import minidom as md
+
+from ovftool import factory
+
+# Granularidade do espaço reservado após o descritor OVF (tamanho de bloco TAR)
+TAR_BLOCK_SIZE = 512
+
+# Linha do manifesto: ALGORITMO(arquivo)= hash
+MANIFEST_LINE = re.compile(r"^(?P<algo>[A-Z0-9]+)\((?P<name>[^)]+)\)=\s*(?P<digest>[0-9a-fA-F]+)$")
+
+
+@dataclass
+class Member:
+    """
+        Membro de um arquivo TAR com a posição dos seus dados no arquivo.
+    """
+
+    name: str
+    offset: int
+    size: int
+
+
+def pad_descriptor(content: bytes, size: int) -> bytes:
+    """
+        Completa o descritor OVF com espaços em branco até o tamanho informado.
+        Espaços após o elemento raiz são válidos em XML.
+    """
+
+    if len(content) > size:
+        raise ValueError(
+            f"O descritor OVF ({len(content)} bytes) não cabe no espaço reservado ({size} bytes)."
+        )
+    if len(content) == size:
+        return content
+    return content + b"\n" + b" " * (size - len(content) - 1)
+
+
+def reserved_size(length: int, reserve: int) -> int:
+    """
+        Calcula o tamanho final do descritor com o espaço reservado, alinhado ao bloco TAR.
+    """
+
+    total = length + reserve
+    return ((total + TAR_BLOCK_SIZE - 1) // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+
+
+def serialize(ovf: md.Document) -> bytes:
+    """
+        Serializa o documento OVF no mesmo formato usado na geração.
+    """
+
+    return ovf.toprettyxml(indent="  ", newl="\n", encoding="UTF-8")
+
+
+def find_members(ova_path: str) -> dict[str, Member]:
+    """
+        Lista os membros do OVA com a posição dos dados de cada um.
+    """
+
+    members = {}
+    with tarfile.open(ova_path, "r:") as tar:
+        for info in tar.getmembers():
+            if info.isfile():
+                members[info.name] = Member(info.name, info.offset_data, info.size)
+    return members
+
+
+def _strip_whitespace(node: md.Node):
+    """
+        Remove os nós de texto compostos só de espaços (indentação do arquivo original),
+        para que a serialização não acumule espaços a cada atualização.
+    """
+
+    for child in list(node.childNodes):
+        if child.nodeType == child.TEXT_NODE and not child.data.strip():
+            node.removeChild(child)
+        elif child.nodeType == child.ELEMENT_NODE:
+            _strip_whitespace(child)
+
+
+def _child(parent: md.Element, tag: str) -> md.Element:
+    for node in parent.childNodes:
+        if node.nodeType == node.ELEMENT_NODE and node.tagName == tag:
+            return node
+    return None
+
+
+def _set_text(element: md.Element, text: str):
+    while element.firstChild:
+        element.removeChild(element.firstChild)
+    element.appendChild(element.ownerDocument.createTextNode(text))
+
+
+def _content_element(ovf: md.Document) -> md.Element:
+    """
+        Retorna o elemento Content (VirtualSystem ou VirtualSystemCollection) do envelope.
+    """
+
+    for tag in ("ovf:VirtualSystemCollection", "ovf:VirtualSystem"):
+        for node in ovf.documentElement.childNodes:
+            if node.nodeType == node.ELEMENT_NODE and node.tagName == tag:
+                return node
+    raise ValueError("O descritor OVF não possui VirtualSystem.")
+
+
+def _place_section(content: md.Element, section: md.Element):
+    """
+        Move uma seção recém-criada (anexada ao fim pela factory) para antes do primeiro
+        filho Content (VirtualSystem ou VirtualSystemCollection): o schema OVF exige que
+        todas as seções de uma coleção venham antes dos sistemas que ela contém.
+    """
+
+    for node in content.childNodes:
+        if node.nodeType == node.ELEMENT_NODE and \
+                node.tagName in ("ovf:VirtualSystem", "ovf:VirtualSystemCollection"):
+            content.insertBefore(section, node)
+            return
+
+
+def update_descriptor(ovf: md.Document, annotation: str = None, license_text: str = None,
+                      product_version: str = None):
+    """
+        Atualiza anotação, licença e versão do produto no documento OVF,
+        criando as seções que ainda não existirem.
+    """
+
+    content = _content_element(ovf)
+
+    if annotation is not None:
+        section = _child(content, "ovf:AnnotationSection")
+        if section is None:
+            _place_section(content, factory.annotation_section(ovf, content, annotation))
+        else:
+            _set_text(_child(section, "ovf:Annotation"), annotation)
+
+    if license_text is not None:
+        section = _child(content, "ovf:EulaSection")
+        if section is None:
+            _place_section(content, factory.eula_section(ovf, content, license_text))
+        else:
+            _set_text(_child(section, "ovf:License"), license_text)
+
+    if product_version is not None:
+        section = _child(content, "ovf:ProductSection")
+        if section is None:
+            _place_section(content, factory.product_section(ovf, content, version=product_version))
+        else:
+            version = _child(section, "ovf:Version")
+            if version is None:
+                version = ovf.createElement("ovf:Version")
+                following = None
+                for tag in ("ovf:FullVersion", "ovf:ProductUrl", "ovf:VendorUrl"):
+                    following = following or _child(section, tag)
+                section.insertBefore(version, following)
+            _set_text(version, product_version)
+
+
+def update_manifest(manifest: str, name: str, content: bytes) -> str:
+    """
+        Substitui o hash do arquivo informado no manifesto, mantendo os demais hashes
+        (incluindo o do disco) como estão.
+    """
+
+    lines = []
+    found = False
+    for line in manifest.splitlines():
+        match = MANIFEST_LINE.match(line.strip())
+        if match and match.group("name") == name:
+            algorithm = match.group("algo")
+            digest = hashlib.new(algorithm.lower(), content).hexdigest()
+            line = f"{algorithm}({name})= {digest}"
+            found = True
+        lines.append(line)
+
+    if not found:
+        raise ValueError(f"O manifesto não possui o hash de '{name}'.")
+    return "\n".join(lines) + "\n"
+
+
+def update_ova(ova_path: str, annotation: str = None, license_text: str = None,
+               product_version: str = None) -> tuple[str, str]:
+    """
+        Atualiza no local os metadados de um OVA existente. Apenas os dados dos membros
+        OVF e MF são regravados; o disco não é lido nem movido.
+
+        O descritor precisa caber no espaço reservado na criação do pacote (ver --reserve).
+        Retorna os nomes dos membros OVF e MF atualizados.
+    """
+
+    members = find_members(ova_path)
+    ovf_member = next((m for m in members.values() if m.name.endswith(".ovf")), None)
+    mf_member = next((m for m in members.values() if m.name.endswith(".mf")), None)
+    if ovf_member is None:
+        raise ValueError(f"Nenhum descritor OVF encontrado em '{ova_path}'.")
+
+    fd = os.open(ova_path, os.O_RDWR)
+    try:
+        raw = os.pread(fd, ovf_member.size, ovf_member.offset)
+        ovf = md.parseString(raw.rstrip())
+        _strip_whitespace(ovf.documentElement)
+        update_descriptor(ovf, annotation, license_text, product_version)
+        descriptor = pad_descriptor(serialize(ovf), ovf_member.size)
+
+        manifest = None
+        if mf_member is not None:
+            old_manifest = os.pread(fd, mf_member.size, mf_member.offset).decode("utf-8")
+            manifest = update_manifest(old_manifest, ovf_member.name, descriptor).encode("utf-8")
+            if len(manifest) != mf_member.size:
+                raise ValueError("O tamanho do manifesto mudou; não é possível atualizar no local.")
+
+        os.pwrite(fd, descriptor, ovf_member.offset)
+        if manifest is not None:
+            os.pwrite(fd, manifest, mf_member.offset)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    return ovf_member.name, mf_member.name if mf_member else None
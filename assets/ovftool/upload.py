@@ -0,0 +1,389 @@
+"""
+    UNMM OVF Tool Upload
+    - Version: 1.0
+    - Description: Envio de um fluxo (ex: o TAR do OVA sendo gerado) para um endpoint HTTP
+                   compatível com S3 via multipart upload, com partes enviadas em paralelo.
+"""
+
+import hashlib
+import hmac
+import http.client
+import os
+import subprocess
+import threading
+import time
+import urllib.parse
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+from xml.etree import ElementTree as ET
+
+# Tamanho padrão de cada parte (o S3 exige no mínimo 5 MiB, exceto na última)
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Número padrão de partes enviadas simultaneamente
+DEFAULT_CONCURRENCY = 4
+
+# Número padrão de tentativas por requisição
+DEFAULT_RETRIES = 5
+
+# Códigos HTTP que justificam uma nova tentativa
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Um TAR completo termina com dois blocos de 512 bytes zerados
+TAR_END_SIZE = 1024
+
+
+class UploadError(Exception):
+    """
+        Falha definitiva em uma requisição do upload.
+    """
+
+
+@dataclass
+class Credentials:
+    """
+        Credenciais para assinatura AWS Signature Version 4.
+    """
+
+    access_key: str
+    secret_key: str
+    session_token: str = None
+    region: str = "us-east-1"
+
+    @classmethod
+    def from_environment(cls, region: str = None) -> "Credentials":
+        """
+            Lê as credenciais das variáveis AWS_* padrão. Retorna None se não houver
+            credenciais (requisições sem assinatura, ex: servidor local de testes).
+        """
+
+        access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+        secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        if not access_key or not secret_key:
+            return None
+        return cls(
+            access_key=access_key,
+            secret_key=secret_key,
+            session_token=os.environ.get("AWS_SESSION_TOKEN"),
+            region=region or os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION")
+            or "us-east-1"
+        )
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_request(credentials: Credentials, method: str, host: str, path: str,
+                 query: dict[str, str], headers: dict[str, str], payload_hash: str,
+                 now: time.struct_time = None) -> dict[str, str]:
+    """
+        Assina a requisição com AWS Signature Version 4 (serviço s3).
+        Retorna os cabeçalhos a adicionar (x-amz-*, Authorization).
+    """
+
+    now = now or time.gmtime()
+    amz_date = time.strftime("%Y%m%dT%H%M%SZ", now)
+    date = amz_date[:8]
+    scope = f"{date}/{credentials.region}/s3/aws4_request"
+
+    signed = {key.lower(): str(value).strip() for key, value in headers.items()}
+    signed["host"] = host
+    signed["x-amz-content-sha256"] = payload_hash
+    signed["x-amz-date"] = amz_date
+    if credentials.session_token:
+        signed["x-amz-security-token"] = credentials.session_token
+
+    signed_headers = ";".join(sorted(signed))
+    canonical_query = "&".join(
+        f"{urllib.parse.quote(key, safe='-_.~')}={urllib.parse.quote(value, safe='-_.~')}"
+        for key, value in sorted(query.items())
+    )
+    canonical_request = "\n".join([
+        method,
+        urllib.parse.quote(path, safe="/-_.~"),
+        canonical_query,
+        "".join(f"{key}:{signed[key]}\n" for key in sorted(signed)),
+        signed_headers,
+        payload_hash
+    ])
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    ])
+
+    key = _hmac(("AWS4" + credentials.secret_key).encode("utf-8"), date)
+    for part in (credentials.region, "s3", "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    result = {name: value for name, value in signed.items() if name.startswith("x-amz-")}
+    result["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return result
+
+
+class MultipartUpload:
+    """
+        Multipart upload em um endpoint compatível com S3 (endereçamento por caminho:
+        http[s]://host[:porta]/bucket/chave).
+    """
+
+    def __init__(self, url: str, credentials: Credentials = None,
+                 retries: int = DEFAULT_RETRIES, timeout: float = 60):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise ValueError(f"URL de upload inválida: '{url}'.")
+        if parsed.path.strip("/").count("/") < 1:
+            raise ValueError(f"A URL de upload deve conter bucket e chave: '{url}'.")
+
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.path = urllib.parse.unquote(parsed.path)
+        self.credentials = credentials
+        self.retries = retries
+        self.timeout = timeout
+        self.upload_id = None
+        self.etags = {}
+        self.lock = threading.Lock()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def _request(self, method: str, query: dict[str, str], body: bytes = b"",
+                 headers: dict[str, str] = None) -> tuple[int, dict[str, str], bytes]:
+        """
+            Executa uma requisição com novas tentativas (backoff exponencial) em erros de
+            conexão e respostas transitórias.
+        """
+
+        headers = dict(headers or {})
+        payload_hash = hashlib.sha256(body).hexdigest()
+        target = urllib.parse.quote(self.path, safe="/-_.~")
+        if query:
+            target += "?" + "&".join(
+                f"{urllib.parse.quote(key, safe='-_.~')}={urllib.parse.quote(value, safe='-_.~')}"
+                if value else urllib.parse.quote(key, safe='-_.~')
+                for key, value in query.items()
+            )
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(0.5 * 2 ** (attempt - 1), 30))
+
+            request_headers = dict(headers)
+            request_headers["Content-Length"] = str(len(body))
+            if self.credentials is not None:
+                request_headers.update(sign_request(
+                    self.credentials, method, self.host, self.path, query, headers, payload_hash
+                ))
+
+            connection = self._connection()
+            try:
+                connection.request(method, target, body=body, headers=request_headers)
+                response = connection.getresponse()
+                content = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                error = f"{method} {target}: {e}"
+                continue
+            finally:
+                connection.close()
+
+            if response.status in RETRY_STATUS:
+                error = f"{method} {target}: HTTP {response.status}"
+                continue
+            if response.status >= 300:
+                raise UploadError(
+                    f"{method} {target}: HTTP {response.status} {content.decode('utf-8', 'replace')}"
+                )
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, content
+
+        raise UploadError(f"{error} (após {self.retries + 1} tentativas)")
+
+    @staticmethod
+    def _find(content: bytes, tag: str) -> str:
+        for element in ET.fromstring(content).iter():
+            if element.tag.split("}")[-1] == tag:
+                return element.text
+        return None
+
+    def start(self):
+        """
+            Inicia o multipart upload e obtém o UploadId.
+        """
+
+        _, _, content = self._request("POST", {"uploads": ""})
+        self.upload_id = self._find(content, "UploadId")
+        if not self.upload_id:
+            raise UploadError("Resposta sem UploadId ao iniciar o upload.")
+
+    def upload_part(self, number: int, data: bytes):
+        """
+            Envia uma parte (numeradas a partir de 1).
+        """
+
+        _, headers, _ = self._request("PUT", {"partNumber": str(number), "uploadId": self.upload_id}, data)
+        etag = headers.get("etag")
+        if not etag:
+            raise UploadError(f"Resposta sem ETag para a parte {number}.")
+        with self.lock:
+            self.etags[number] = etag
+
+    def complete(self):
+        """
+            Conclui o upload com a lista de partes enviadas.
+        """
+
+        parts = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in sorted(self.etags.items())
+        )
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode("utf-8")
+        _, _, content = self._request("POST", {"uploadId": self.upload_id}, body,
+                                      {"Content-Type": "application/xml"})
+        # O S3 pode responder 200 com um erro no corpo
+        if content and self._find(content, "Code"):
+            raise UploadError(f"Falha ao concluir o upload: {content.decode('utf-8', 'replace')}")
+
+    def abort(self):
+        """
+            Cancela o upload, descartando as partes já enviadas.
+        """
+
+        if self.upload_id:
+            self._request("DELETE", {"uploadId": self.upload_id})
+
+
+def _read_part(stream: BinaryIO, size: int) -> bytes:
+    """
+        Lê uma parte completa do fluxo (leituras de pipes podem retornar menos bytes).
+    """
+
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = stream.read(size - len(buffer))
+        if not data:
+            break
+        buffer += data
+    return bytes(buffer)
+
+
+def check_tar_end(tail: bytes):
+    """
+        Verifica se o fluxo termina com o marcador de fim de arquivo do TAR (dois blocos
+        zerados). Um TAR interrompido no meio não termina com ele.
+    """
+
+    if len(tail) < TAR_END_SIZE or any(tail[-TAR_END_SIZE:]):
+        raise UploadError("O fluxo não termina com o fim de arquivo do TAR (TAR truncado?).")
+
+
+class TarProducer:
+    """
+        Processo tar que gera o fluxo enviado. check() falha se o tar não terminou com sucesso,
+        o que impede a conclusão de um upload de um TAR incompleto.
+    """
+
+    def __init__(self, directory: str, members: list[str]):
+        self.process = subprocess.Popen(["tar", "-cf", "-", "-C", directory, "--", *members],
+                                        stdout=subprocess.PIPE)
+        self.stream = self.process.stdout
+
+    def check(self, tail: bytes):
+        """
+            Aguarda o fim do tar e verifica o código de saída e o fim do fluxo.
+        """
+
+        returncode = self.process.wait()
+        if returncode != 0:
+            raise UploadError(f"O tar terminou com o código {returncode}; o upload foi cancelado.")
+        check_tar_end(tail)
+
+    def close(self):
+        """
+            Encerra o tar se ele ainda estiver em execução (ex: após uma falha no upload).
+        """
+
+        if self.process.poll() is None:
+            self.process.kill()
+        self.stream.close()
+        self.process.wait()
+
+
+def stream_upload(stream: BinaryIO, upload: MultipartUpload,
+                  part_size: int = DEFAULT_PART_SIZE,
+                  concurrency: int = DEFAULT_CONCURRENCY,
+                  output: BinaryIO = None,
+                  verify: Callable[[bytes], None] = None) -> tuple[int, str]:
+    """
+        Lê o fluxo parte por parte e envia as partes em paralelo à medida que chegam.
+        No máximo concurrency partes ficam em memória (mais a parte sendo lida).
+        Se output for informado, o fluxo também é gravado nele (cópia local).
+
+        Antes de concluir o upload, verify é chamado com os últimos TAR_END_SIZE bytes do
+        fluxo (ex: check_tar_end ou TarProducer.check); se ele falhar, o upload é cancelado
+        e nenhum objeto é publicado.
+
+        Retorna o total de bytes enviados e o SHA256 do conteúdo.
+    """
+
+    upload.start()
+    slots = threading.Semaphore(concurrency)
+    digest = hashlib.sha256()
+    total = 0
+    tail = b""
+    futures = []
+
+    def send(number: int, data: bytes):
+        try:
+            upload.upload_part(number, data)
+        finally:
+            slots.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            number = 0
+            while True:
+                slots.acquire()
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+
+                data = _read_part(stream, part_size)
+                if not data and number > 0:
+                    slots.release()
+                    break
+
+                number += 1
+                digest.update(data)
+                total += len(data)
+                tail = (tail + data[-TAR_END_SIZE:])[-TAR_END_SIZE:]
+                if output is not None:
+                    output.write(data)
+                futures.append(pool.submit(send, number, data))
+                if len(data) < part_size:
+                    break
+
+            for future in futures:
+                future.result()
+        if verify is not None:
+            verify(tail)
+        upload.complete()
+    except BaseException:
+        try:
+            upload.abort()
+        except UploadError:
+            pass
+        raise
+
+    return total, digest.hexdigest()
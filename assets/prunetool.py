@@ -0,0 +1,495 @@
+"""
+    prunetool.py
+    ==============
+    Ferramenta de remoção de módulos do kernel e firmwares não usados pelo hardware alvo.
+
+    Lê um perfil de dispositivos (diretório profiles/), mantém os módulos listados e o
+    fechamento das suas dependências (modules.dep e modules.softdep), mantém os firmwares
+    referenciados por esses módulos (modinfo -F firmware) e pelos módulos embutidos no
+    kernel, e remove o restante de lib/modules/<versão>/kernel e lib/firmware.
+
+    Os arquivos removidos são retirados das listas do dpkg (/var/lib/dpkg/info), e a
+    seleção é gravada como regras path-exclude/path-include em /etc/dpkg/dpkg.cfg.d, de
+    modo que atualizações dos pacotes não reinstalem os arquivos removidos.
+
+    Após a remoção, é necessário executar depmod e regenerar o initramfs (ver lib/prune.sh).
+
+    Autor: João Paulo (o Jppgmx)
+    Sob licença MIT
+"""
+
+import argparse as ap
+import fnmatch
+import json
+import os
+import re
+import subprocess
+import sys
+
+from dataclasses import dataclass, field
+
+# Extensões de módulos e firmwares (possivelmente comprimidos)
+MODULE_SUFFIX = re.compile(r"\.ko(\.(zst|xz|gz))?$")
+FIRMWARE_COMPRESSION = (".zst", ".xz")
+
+# Quantidade de módulos por chamada do modinfo
+MODINFO_BATCH = 256
+
+# Profundidade máxima de include e de cadeias de links simbólicos
+MAX_DEPTH = 8
+
+# Regras de filtro do dpkg gravadas no rootfs e banco de dados do dpkg
+DPKG_FILTER_FILE = "etc/dpkg/dpkg.cfg.d/unmm-prune"
+DPKG_INFO_DIR = "var/lib/dpkg/info"
+
+# Prefixos sob os quais os pacotes podem instalar módulos e firmwares (com e sem usrmerge)
+DPKG_LIB_PREFIXES = ("/lib/", "/usr/lib/")
+
+
+@dataclass
+class Profile:
+    """
+        Perfil de dispositivos: módulos, diretórios de módulos e padrões de firmware mantidos.
+    """
+
+    modules: set[str] = field(default_factory=set)
+    dirs: list[str] = field(default_factory=list)
+    firmware: list[str] = field(default_factory=list)
+
+
+@dataclass
+class PruneResult:
+    """
+        Resultado da remoção.
+    """
+
+    kept_modules: int = 0
+    removed_modules: int = 0
+    module_bytes: int = 0
+    kept_firmware: int = 0
+    removed_firmware: int = 0
+    firmware_bytes: int = 0
+
+
+def module_name(path: str) -> str:
+    """
+        Retorna o nome normalizado do módulo (sem extensão, com '-' trocado por '_').
+    """
+
+    return MODULE_SUFFIX.sub("", os.path.basename(path)).replace("-", "_")
+
+
+def load_profile(profiles_dir: str, name: str, profile: Profile = None, depth: int = 0) -> Profile:
+    """
+        Lê um perfil e os perfis incluídos por ele.
+    """
+
+    if depth > MAX_DEPTH:
+        raise ValueError(f"Cadeia de include muito longa ao ler o perfil '{name}'.")
+    if not name or "/" in name:
+        raise ValueError(f"Nome de perfil inválido: '{name}'.")
+
+    path = os.path.join(profiles_dir, name)
+    if not os.path.isfile(path):
+        raise ValueError(f"Perfil '{name}' não encontrado em '{profiles_dir}'.")
+
+    profile = profile or Profile()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            kind, _, value = line.partition(":")
+            if not value:
+                profile.modules.add(line.replace("-", "_"))
+            elif kind == "dir":
+                profile.dirs.append(value.strip("/") + "/")
+            elif kind == "firmware":
+                profile.firmware.append(value)
+            elif kind == "include":
+                load_profile(profiles_dir, value, profile, depth + 1)
+            else:
+                raise ValueError(f"Entrada inválida no perfil '{name}': '{line}'.")
+
+    return profile
+
+
+def read_dependencies(moddir: str) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """
+        Lê o modules.dep e o modules.softdep. Retorna o caminho (relativo a moddir) de cada
+        módulo e as dependências de cada módulo, por nome.
+    """
+
+    paths = {}
+    deps = {}
+
+    with open(os.path.join(moddir, "modules.dep"), "r", encoding="utf-8") as f:
+        for line in f:
+            module, _, requires = line.partition(":")
+            if not module:
+                continue
+            name = module_name(module)
+            paths[name] = module
+            deps[name] = [module_name(dep) for dep in requires.split()]
+
+    softdep = os.path.join(moddir, "modules.softdep")
+    if os.path.exists(softdep):
+        with open(softdep, "r", encoding="utf-8") as f:
+            for line in f:
+                words = line.split()
+                if len(words) < 3 or words[0] != "softdep":
+                    continue
+                name = words[1].replace("-", "_")
+                deps.setdefault(name, []).extend(
+                    word.replace("-", "_") for word in words[2:] if not word.endswith(":")
+                )
+
+    return paths, deps
+
+
+def module_closure(profile: Profile, paths: dict[str, str], deps: dict[str, list[str]]) -> set[str]:
+    """
+        Retorna os módulos mantidos: os do perfil, os dos diretórios do perfil, os de fora
+        de kernel/ (ex: módulos DKMS em updates/) e todas as suas dependências.
+    """
+
+    pending = [name for name in profile.modules if name in paths]
+    pending += [name for name, path in paths.items()
+                if not path.startswith("kernel/") or any(path.startswith(d) for d in profile.dirs)]
+
+    keep = set()
+    while pending:
+        name = pending.pop()
+        if name in keep or name not in paths:
+            continue
+        keep.add(name)
+        pending.extend(deps.get(name, []))
+    return keep
+
+
+def referenced_firmware(root: str, version: str, modules: list[str]) -> set[str]:
+    """
+        Retorna os firmwares referenciados pelos módulos informados (caminhos dentro do
+        rootfs) e pelos módulos embutidos no kernel.
+    """
+
+    firmware = set()
+
+    builtin = os.path.join(root, "lib/modules", version, "modules.builtin.modinfo")
+    if os.path.exists(builtin):
+        with open(builtin, "rb") as f:
+            for entry in f.read().split(b"\0"):
+                key, _, value = entry.decode(errors="replace").partition("=")
+                if key.endswith(".firmware") and value:
+                    firmware.add(value)
+
+    for i in range(0, len(modules), MODINFO_BATCH):
+        batch = modules[i:i + MODINFO_BATCH]
+        result = subprocess.run(["chroot", root, "modinfo", "-k", version, "-F", "firmware", *batch],
+                                capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"Falha ao executar modinfo: {result.stderr.strip()}")
+        firmware.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+
+    return firmware
+
+
+def allocated_size(path: str) -> int:
+    """
+        Retorna o espaço efetivamente alocado por um arquivo, em bytes.
+    """
+
+    return os.lstat(path).st_blocks * 512
+
+
+def remove_empty_dirs(top: str):
+    """
+        Remove os diretórios vazios sob top (sem remover top).
+    """
+
+    for dirpath, _, _ in os.walk(top, topdown=False):
+        if dirpath != top and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+
+def prune_modules(root: str, version: str, profile: Profile, dry_run: bool,
+                  result: PruneResult, removed: list[str]) -> list[str]:
+    """
+        Remove os módulos de lib/modules/<versão>/kernel fora do fechamento do perfil.
+        Retorna os caminhos (dentro do rootfs) dos módulos mantidos e acrescenta os
+        removidos a removed.
+    """
+
+    moddir = os.path.join(root, "lib/modules", version)
+    paths, deps = read_dependencies(moddir)
+    keep = module_closure(profile, paths, deps)
+
+    missing = sorted(name for name in profile.modules if name not in paths)
+    if missing:
+        print(f"  {version}: módulos do perfil ausentes ou embutidos: {', '.join(missing)}")
+
+    kept = []
+    for name, path in sorted(paths.items()):
+        if name in keep:
+            kept.append(os.path.join("/lib/modules", version, path))
+            result.kept_modules += 1
+        elif path.startswith("kernel/"):
+            full = os.path.join(moddir, path)
+            if os.path.lexists(full):
+                result.module_bytes += allocated_size(full)
+                result.removed_modules += 1
+                removed.append(os.path.join("/lib/modules", version, path))
+                if not dry_run:
+                    os.remove(full)
+
+    if not dry_run:
+        remove_empty_dirs(os.path.join(moddir, "kernel"))
+    return kept
+
+
+def _resolve_link(firmware_dir: str, relpath: str) -> list[str]:
+    """
+        Retorna os caminhos (relativos ao diretório de firmwares) da cadeia de links
+        simbólicos que começa em relpath, incluindo o destino final.
+    """
+
+    chain = [relpath]
+    for _ in range(MAX_DEPTH):
+        full = os.path.join(firmware_dir, chain[-1])
+        if not os.path.islink(full):
+            break
+        target = os.readlink(full)
+        if os.path.isabs(target):
+            break
+        chain.append(os.path.normpath(os.path.join(os.path.dirname(chain[-1]), target)))
+    return chain
+
+
+def prune_firmware(firmware_dir: str, patterns: set[str], dry_run: bool, result: PruneResult,
+                   removed: list[str]) -> set[str]:
+    """
+        Remove os firmwares que não casam com nenhum dos padrões (nomes referenciados pelos
+        módulos ou padrões do perfil). Versões comprimidas (.zst, .xz) e os destinos de
+        links simbólicos mantidos também são mantidos.
+
+        Retorna os firmwares mantidos (relativos ao diretório de firmwares) e acrescenta os
+        removidos a removed.
+    """
+
+    exact = {p for p in patterns if not any(c in p for c in "*?[")}
+    globs = [p for p in patterns if p not in exact]
+
+    files = []
+    for dirpath, _, filenames in os.walk(firmware_dir):
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(dirpath, filename), firmware_dir))
+
+    keep = set()
+    for relpath in files:
+        name = relpath
+        for suffix in FIRMWARE_COMPRESSION:
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        if name in exact or relpath in exact or any(fnmatch.fnmatch(name, g) for g in globs):
+            keep.update(_resolve_link(firmware_dir, relpath))
+
+    for relpath in files:
+        if relpath in keep:
+            result.kept_firmware += 1
+            continue
+        full = os.path.join(firmware_dir, relpath)
+        result.firmware_bytes += allocated_size(full)
+        result.removed_firmware += 1
+        removed.append(os.path.join("/lib/firmware", relpath))
+        if not dry_run:
+            os.remove(full)
+
+    if not dry_run:
+        remove_empty_dirs(firmware_dir)
+    return keep
+
+
+def _dpkg_path(path: str) -> str:
+    """
+        Normaliza um caminho do dpkg para a forma sem usrmerge (/usr/lib/x -> /lib/x).
+    """
+
+    return path[len("/usr"):] if path.startswith("/usr/lib/") else path
+
+
+def dpkg_filter_rules(kept_modules: set[str], profile: Profile, firmware: set[str],
+                      kept_firmware: set[str]) -> list[str]:
+    """
+        Monta as regras path-exclude/path-include do dpkg equivalentes à remoção: exclui
+        lib/modules/*/kernel e lib/firmware e reinclui os módulos mantidos (em qualquer
+        versão do kernel e compressão), os diretórios do perfil e os firmwares mantidos.
+        O dpkg aplica a última regra que casa, por isso as exclusões vêm primeiro.
+    """
+
+    includes = set()
+    for path in kept_modules:
+        if path.startswith("kernel/"):
+            includes.add(f"modules/*/{MODULE_SUFFIX.sub('', path)}.ko*")
+    includes.update(f"modules/*/{d}*" for d in profile.dirs if d.startswith("kernel/"))
+    includes.update(f"firmware/{pattern}*" for pattern in firmware)
+    includes.update(f"firmware/{relpath}" for relpath in kept_firmware)
+
+    rules = [f"path-exclude={prefix}{pattern}"
+             for pattern in ("modules/*/kernel/*", "firmware/*") for prefix in DPKG_LIB_PREFIXES]
+    rules += [f"path-include={prefix}{pattern}"
+              for pattern in sorted(includes) for prefix in DPKG_LIB_PREFIXES]
+    return rules
+
+
+def write_dpkg_filter(root: str, profile_name: str, rules: list[str]):
+    """
+        Grava as regras de filtro do dpkg no rootfs.
+    """
+
+    path = os.path.join(root, DPKG_FILTER_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(f"# Gerado pelo UNMM (--prune={profile_name}): módulos e firmwares não usados\n")
+        f.write("# pelo perfil de dispositivos não são instalados pelos pacotes.\n")
+        f.write("".join(f"{rule}\n" for rule in rules))
+    os.replace(path + ".tmp", path)
+
+
+def forget_dpkg_files(root: str, removed: list[str]) -> int:
+    """
+        Retira os arquivos removidos das listas (.list) e dos checksums (.md5sums) dos
+        pacotes, deixando o banco de dados do dpkg como se os arquivos tivessem sido
+        filtrados na instalação (ex: dpkg --verify não os reporta como ausentes).
+        Retorna a quantidade de pacotes alterados.
+    """
+
+    info_dir = os.path.join(root, DPKG_INFO_DIR)
+    if not removed or not os.path.isdir(info_dir):
+        return 0
+
+    gone = {_dpkg_path(path) for path in removed}
+    changed = set()
+    for filename in sorted(os.listdir(info_dir)):
+        package, ext = os.path.splitext(filename)
+        if ext not in (".list", ".md5sums"):
+            continue
+
+        path = os.path.join(info_dir, filename)
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+            lines = f.readlines()
+        # .list: um caminho absoluto por linha; .md5sums: "<md5>  <caminho relativo>"
+        entries = [line.rstrip("\n") if ext == ".list" else "/" + line.rstrip("\n").split("  ", 1)[-1]
+                   for line in lines]
+        kept = [line for line, entry in zip(lines, entries) if _dpkg_path(entry) not in gone]
+        if len(kept) == len(lines):
+            continue
+
+        with open(path + ".tmp", "w", encoding="utf-8", errors="surrogateescape") as f:
+            f.writelines(kept)
+        os.replace(path + ".tmp", path)
+        changed.add(package)
+
+    return len(changed)
+
+
+def human(size: int) -> str:
+    """
+        Formata um tamanho em bytes usando unidades binárias.
+    """
+
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(value) < 1024 or unit == "GiB":
+            return f"{value:.1f}{unit}" if unit != "B" else f"{int(value)}B"
+        value /= 1024
+    return f"{value:.1f}TiB"
+
+
+def main(args: ap.Namespace):
+    if not os.path.isdir(args.root):
+        print(f"Erro: rootfs '{args.root}' não encontrado.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        profile = load_profile(args.profiles_dir, args.profile)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    modules_root = os.path.join(args.root, "lib/modules")
+    versions = sorted(v for v in os.listdir(modules_root)
+                      if os.path.exists(os.path.join(modules_root, v, "modules.dep"))) \
+        if os.path.isdir(modules_root) else []
+    if not versions:
+        print("Erro: nenhum kernel com modules.dep encontrado no rootfs.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Perfil: {args.profile} ({len(profile.modules)} módulos, {len(profile.dirs)} diretórios)")
+    print(f"Kernels: {', '.join(versions)}")
+
+    result = PruneResult()
+    firmware = set(profile.firmware)
+    kept_modules = set()
+    kept_firmware = set()
+    removed = []
+    try:
+        for version in versions:
+            kept = prune_modules(args.root, version, profile, args.dry_run, result, removed)
+            kept_modules.update(os.path.relpath(path, os.path.join("/lib/modules", version))
+                                for path in kept)
+            firmware |= referenced_firmware(args.root, version, kept)
+
+        firmware_dir = os.path.join(args.root, "usr/lib/firmware")
+        if not os.path.isdir(firmware_dir):
+            firmware_dir = os.path.join(args.root, "lib/firmware")
+        if os.path.isdir(firmware_dir):
+            kept_firmware = prune_firmware(firmware_dir, firmware, args.dry_run, result, removed)
+
+        if not args.dry_run:
+            write_dpkg_filter(args.root, args.profile,
+                              dpkg_filter_rules(kept_modules, profile, firmware, kept_firmware))
+            packages = forget_dpkg_files(args.root, removed)
+            print(f"Filtro do dpkg gravado em /{DPKG_FILTER_FILE} ({packages} pacotes atualizados)")
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    action = "seriam removidos" if args.dry_run else "removidos"
+    print(f"Módulos: {result.kept_modules} mantidos, {result.removed_modules} {action} "
+          f"({human(result.module_bytes)})")
+    print(f"Firmwares: {result.kept_firmware} mantidos, {result.removed_firmware} {action} "
+          f"({human(result.firmware_bytes)})")
+    print(f"Total liberado: {human(result.module_bytes + result.firmware_bytes)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"profile": args.profile, "kernels": versions, **result.__dict__}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Remove módulos do kernel e firmwares não usados pelo perfil de dispositivos.",
+        formatter_class=ap.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python prunetool.py /mnt/unmm vmware
+  python prunetool.py /mnt/unmm vm --dry-run
+        """
+    )
+
+    parser.add_argument("root",
+                        help="Ponto de montagem do rootfs")
+    parser.add_argument("profile",
+                        help="Nome do perfil de dispositivos")
+    parser.add_argument("--profiles-dir",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles"),
+                        help="Diretório dos perfis (padrão: profiles/ do UNMM)")
+    parser.add_argument("--dry-run",
+                        action="store_true",
+                        help="Apenas reporta o que seria removido")
+    parser.add_argument("--json",
+                        help="Salva o relatório em formato JSON no caminho informado")
+
+    main(parser.parse_args())
@@ -0,0 +1,403 @@
+"""
+    rootfstool.py
+    ==============
+    Ferramenta de análise de tamanho e deduplicação do sistema de arquivos raiz.
+
+    Percorre o rootfs montado contabilizando o espaço ocupado por diretórios e pacotes
+    e, opcionalmente, substitui arquivos regulares idênticos por hardlinks dentro de
+    uma lista de caminhos permitidos.
+
+    Autor: João Paulo (o Jppgmx)
+    Sob licença MIT
+"""
+
+import argparse as ap
+import hashlib
+import json
+import os
+import stat
+import sys
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Tamanho do bloco de leitura usado no cálculo de hashes
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Tamanho do prefixo usado para descartar candidatos antes do hash completo
+PREFIX_SIZE = 64 * 1024
+
+# Caminhos padrão onde a deduplicação é permitida
+DEFAULT_DEDUP_PATHS = [
+    "/usr/share",
+    "/usr/lib/firmware",
+]
+
+
+@dataclass
+class ScanResult:
+    """
+        Resultado da varredura do rootfs.
+    """
+
+    total_bytes: int = 0
+    file_count: int = 0
+    dir_bytes: dict[str, int] = field(default_factory=dict)
+    candidates: dict[int, list[str]] = field(default_factory=lambda: defaultdict(list))
+
+
+@dataclass
+class DedupResult:
+    """
+        Resultado da deduplicação por hardlinks.
+    """
+
+    duplicate_groups: int = 0
+    duplicate_files: int = 0
+    linked_files: int = 0
+    freed_bytes: int = 0
+
+
+def allocated_size(st: os.stat_result) -> int:
+    """
+        Retorna o espaço efetivamente alocado por um inode, em bytes.
+    """
+
+    return st.st_blocks * 512
+
+
+def is_allowed(relpath: str, allowlist: list[str]) -> bool:
+    """
+        Verifica se o caminho relativo à raiz está dentro de algum caminho permitido.
+    """
+
+    for allowed in allowlist:
+        allowed = allowed.rstrip("/")
+        if relpath == allowed or relpath.startswith(allowed + "/"):
+            return True
+    return False
+
+
+def scan(root: str, allowlist: list[str], min_size: int, depth: int) -> ScanResult:
+    """
+        Percorre o rootfs sem atravessar outros sistemas de arquivos, contabilizando o
+        tamanho dos diretórios até a profundidade informada e agrupando por tamanho os
+        arquivos candidatos à deduplicação.
+    """
+
+    result = ScanResult()
+    root = os.path.abspath(root)
+    root_dev = os.lstat(root).st_dev
+    seen_inodes = set()
+
+    stack = [(root, "/")]
+    while stack:
+        path, relpath = stack.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError as e:
+            print(f"Aviso: não foi possível listar '{relpath}': {e}", file=sys.stderr)
+            continue
+
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if st.st_dev != root_dev:
+                continue
+
+            entry_rel = os.path.join(relpath, entry.name)
+            if stat.S_ISDIR(st.st_mode):
+                stack.append((entry.path, entry_rel))
+                continue
+
+            if (st.st_dev, st.st_ino) in seen_inodes:
+                continue
+            seen_inodes.add((st.st_dev, st.st_ino))
+
+            size = allocated_size(st)
+            result.total_bytes += size
+            result.file_count += 1
+
+            # Acumula o tamanho em todos os diretórios ancestrais até a profundidade máxima
+            parts = relpath.strip("/").split("/") if relpath != "/" else []
+            for level in range(1, min(len(parts), depth) + 1):
+                key = "/" + "/".join(parts[:level])
+                result.dir_bytes[key] = result.dir_bytes.get(key, 0) + size
+
+            if (stat.S_ISREG(st.st_mode) and st.st_size >= min_size
+                    and is_allowed(entry_rel, allowlist)):
+                result.candidates[st.st_size].append(entry.path)
+
+    return result
+
+
+def file_digest(path: str, limit: Optional[int] = None) -> str:
+    """
+        Calcula o SHA-256 do arquivo (ou apenas dos primeiros bytes, se limit for informado).
+    """
+
+    digest = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as f:
+        while True:
+            size = READ_BLOCK_SIZE if remaining is None else min(READ_BLOCK_SIZE, remaining)
+            if size == 0:
+                break
+            block = f.read(size)
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _group_by_digest(groups: list[list[str]], pool: ThreadPoolExecutor,
+                     limit: Optional[int] = None) -> list[list[str]]:
+    """
+        Subdivide cada grupo de caminhos pelo hash do conteúdo, descartando os grupos com
+        um único arquivo. Os hashes de todos os grupos são calculados juntos no pool.
+        Arquivos que não puderem ser lidos são ignorados.
+    """
+
+    paths = [(index, path) for index, group in enumerate(groups) for path in group]
+    digests = pool.map(lambda item: _safe_digest(item[1], limit), paths)
+
+    result: dict[tuple[int, str], list[str]] = defaultdict(list)
+    for (index, path), digest in zip(paths, digests):
+        if digest is not None:
+            result[(index, digest)].append(path)
+    return [group for group in result.values() if len(group) > 1]
+
+
+def _safe_digest(path: str, limit: Optional[int] = None) -> Optional[str]:
+    try:
+        return file_digest(path, limit)
+    except OSError:
+        return None
+
+
+def find_duplicates(candidates: dict[int, list[str]], workers: int) -> list[list[str]]:
+    """
+        Encontra grupos de arquivos idênticos. Os candidatos já chegam agrupados por
+        tamanho; compara primeiro o hash do prefixo (nos grupos de arquivos maiores que o
+        prefixo) e só então o hash completo. Cada etapa calcula em paralelo os hashes de
+        todos os grupos. Arquivos removidos ou ilegíveis durante a análise são ignorados.
+    """
+
+    large: list[list[str]] = []
+    small: list[list[str]] = []
+    for size, paths in candidates.items():
+        inodes: dict[tuple[int, int], str] = {}
+        for path in paths:
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            inodes.setdefault((st.st_dev, st.st_ino), path)
+        unique = list(inodes.values())
+        if len(unique) < 2:
+            continue
+        (large if size > PREFIX_SIZE else small).append(unique)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        groups = small + _group_by_digest(large, pool, PREFIX_SIZE)
+        return _group_by_digest(groups, pool)
+
+
+def hardlink_group(paths: list[str], dry_run: bool) -> tuple[int, int]:
+    """
+        Substitui os arquivos do grupo por hardlinks para o primeiro arquivo com os mesmos
+        metadados (modo, dono e grupo). Retorna o número de arquivos ligados e os bytes liberados.
+    """
+
+    linked = 0
+    freed = 0
+    by_meta = defaultdict(list)
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except OSError as e:
+            print(f"Aviso: ignorando '{path}': {e}", file=sys.stderr)
+            continue
+        by_meta[(st.st_mode, st.st_uid, st.st_gid)].append((path, st))
+
+    for members in by_meta.values():
+        source, _ = members[0]
+        for path, st in members[1:]:
+            if not dry_run:
+                tmp_path = f"{path}.rootfstool-tmp"
+                try:
+                    os.link(source, tmp_path)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Aviso: não foi possível ligar '{path}': {e}", file=sys.stderr)
+                    if os.path.lexists(tmp_path):
+                        os.unlink(tmp_path)
+                    continue
+            linked += 1
+            if st.st_nlink == 1:
+                freed += allocated_size(st)
+    return linked, freed
+
+
+def dedup(duplicates: list[list[str]], dry_run: bool) -> DedupResult:
+    """
+        Aplica a deduplicação por hardlinks em todos os grupos de arquivos idênticos.
+    """
+
+    result = DedupResult()
+    for group in duplicates:
+        result.duplicate_groups += 1
+        result.duplicate_files += len(group) - 1
+        linked, freed = hardlink_group(group, dry_run)
+        result.linked_files += linked
+        result.freed_bytes += freed
+    return result
+
+
+def installed_packages(root: str) -> list[tuple[str, int]]:
+    """
+        Lê o banco de dados do dpkg e retorna os pacotes instalados com seus tamanhos em bytes.
+    """
+
+    status_path = os.path.join(root, "var/lib/dpkg/status")
+    packages: list[tuple[str, int]] = []
+    if not os.path.isfile(status_path):
+        return packages
+
+    with open(status_path, "r", encoding="utf-8", errors="replace") as f:
+        record: dict[str, str] = {}
+        for line in list(f) + ["\n"]:
+            if line.strip() == "":
+                if record.get("Status", "").endswith(" installed") and "Installed-Size" in record:
+                    packages.append((record["Package"], int(record["Installed-Size"]) * 1024))
+                record = {}
+                continue
+            if line[0].isspace() or ":" not in line:
+                continue
+            key, value = line.split(":", 1)
+            record[key] = value.strip()
+
+    packages.sort(key=lambda p: p[1], reverse=True)
+    return packages
+
+
+def human(size: int) -> str:
+    """
+        Formata um tamanho em bytes usando unidades binárias.
+    """
+
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(value) < 1024 or unit == "GiB":
+            return f"{value:.1f}{unit}" if unit != "B" else f"{int(value)}B"
+        value /= 1024
+    return f"{value:.1f}TiB"
+
+
+def main(args: ap.Namespace):
+    """
+        Função principal da análise do rootfs.
+    """
+
+    if not os.path.isdir(args.root):
+        print(f"Erro: rootfs '{args.root}' não encontrado.", file=sys.stderr)
+        sys.exit(1)
+
+    allowlist = args.dedup_paths or DEFAULT_DEDUP_PATHS
+    result = scan(args.root, allowlist, args.min_size, args.depth)
+
+    print(f"Rootfs: {args.root}")
+    print(f"Tamanho antes: {human(result.total_bytes)} em {result.file_count} arquivos")
+
+    print(f"\nMaiores diretórios (profundidade {args.depth}):")
+    largest_dirs = sorted(result.dir_bytes.items(), key=lambda d: d[1], reverse=True)[:args.top]
+    for path, size in largest_dirs:
+        print(f"  {human(size):>10}  {path}")
+
+    packages = installed_packages(args.root)
+    if packages:
+        print("\nMaiores pacotes:")
+        for name, size in packages[:args.top]:
+            print(f"  {human(size):>10}  {name}")
+
+    duplicates = find_duplicates(result.candidates, args.workers)
+    dedup_result = dedup(duplicates, dry_run=not args.dedup)
+
+    print(f"\nArquivos duplicados em {', '.join(allowlist)}:")
+    print(f"  {dedup_result.duplicate_files} arquivos em {dedup_result.duplicate_groups} grupos")
+    if args.dedup:
+        print(f"  {dedup_result.linked_files} arquivos substituídos por hardlinks")
+    else:
+        print("  Deduplicação desabilitada (use --dedup para aplicar)")
+
+    total_after = result.total_bytes - (dedup_result.freed_bytes if args.dedup else 0)
+    print(f"\nTamanho depois: {human(total_after)} "
+          f"(economia {'real' if args.dedup else 'possível'}: {human(dedup_result.freed_bytes)})")
+
+    if args.json:
+        report = {
+            "root": args.root,
+            "before_bytes": result.total_bytes,
+            "after_bytes": total_after,
+            "file_count": result.file_count,
+            "largest_dirs": largest_dirs,
+            "largest_packages": packages[:args.top],
+            "duplicate_groups": dedup_result.duplicate_groups,
+            "duplicate_files": dedup_result.duplicate_files,
+            "linked_files": dedup_result.linked_files,
+            "freed_bytes": dedup_result.freed_bytes,
+            "dedup_applied": args.dedup,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Ferramenta de análise de tamanho e deduplicação do rootfs.",
+        formatter_class=ap.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos:
+  python rootfstool.py /mnt/unmm
+  python rootfstool.py /mnt/unmm --dedup --dedup-path /usr/share/themes --dedup-path /usr/share/locale
+        """
+    )
+
+    parser.add_argument("root",
+                        help="Ponto de montagem do rootfs")
+    parser.add_argument("--dedup",
+                        action="store_true",
+                        help="Substitui arquivos idênticos por hardlinks")
+    parser.add_argument("--dedup-path",
+                        action="append",
+                        dest="dedup_paths",
+                        metavar="PATH",
+                        help="Caminho (relativo à raiz) onde a deduplicação é permitida. "
+                             f"Padrão: {', '.join(DEFAULT_DEDUP_PATHS)}")
+    parser.add_argument("--min-size",
+                        type=int,
+                        default=4096,
+                        help="Tamanho mínimo em bytes dos arquivos deduplicados (padrão: 4096)")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=os.cpu_count() or 1,
+                        help="Número de threads de hash (padrão: número de CPUs)")
+    parser.add_argument("--top",
+                        type=int,
+                        default=15,
+                        help="Número de itens nos relatórios de maiores diretórios e pacotes (padrão: 15)")
+    parser.add_argument("--depth",
+                        type=int,
+                        default=3,
+                        help="Profundidade máxima dos diretórios no relatório (padrão: 3)")
+    parser.add_argument("--json",
+                        help="Salva o relatório em formato JSON no caminho informado")
+
+    main(parser.parse_args())
@@ -0,0 +1,273 @@
+#!/usr/bin/bash
+#
+#   UNMM Checkpoint Module
+#   - Version: 1.0.0
+#   - Description: Checkpoints das fases de construção, permitindo retomar uma construção que falhou.
+#
+#   Sob licença MIT
+#
+
+# Indica se os checkpoints estão habilitados (definido por checkpoint_init)
+CHECKPOINT_ENABLED=false
+
+# Imagem de disco e arquivo de estado da construção atual
+CHECKPOINT_IMAGE=""
+CHECKPOINT_STATE_FILE=""
+
+# Fingerprint da configuração que gerou os checkpoints
+CHECKPOINT_FINGERPRINT=""
+
+# Snapshot da imagem no último checkpoint (formato:arquivo, ex: "raw:/out/x.img.checkpoint.disk.img")
+CHECKPOINT_SNAPSHOT=""
+
+# Fases concluídas, na ordem em que foram registradas.
+# Fases: disk, bootstrap, catalog, addon:<nome> e prune
+declare -ag CHECKPOINT_COMPLETED
+if [[ -z "${CHECKPOINT_COMPLETED+x}" ]]; then
+    CHECKPOINT_COMPLETED=()
+fi
+
+# Fases concluídas cujo snapshot falhou; são registradas junto com o próximo checkpoint
+declare -ag _CHECKPOINT_PENDING=()
+
+# Add-ons da construção atual, na ordem de aplicação, no formato nome:digest
+declare -ag _CHECKPOINT_ADDONS=()
+
+# Add-ons registrados no arquivo de estado lido (mesmo formato)
+declare -ag _CHECKPOINT_RECORDED_ADDONS=()
+
+# checkpoint_fingerprint <values...>
+# Imprime o fingerprint (sha256) dos valores de configuração informados.
+checkpoint_fingerprint() {
+    local IFS=$'\n'
+    printf '%s' "$*" | sha256sum | awk '{print $1}'
+}
+
+# _checkpoint_write_state
+# Grava o arquivo de estado de forma atômica.
+_checkpoint_write_state() {
+    {
+        echo "fingerprint=$CHECKPOINT_FINGERPRINT"
+        echo "snapshot=$CHECKPOINT_SNAPSHOT"
+        local phase action addon
+        for addon in "${_CHECKPOINT_ADDONS[@]}"; do
+            echo "addon=$addon"
+        done
+        for phase in "${CHECKPOINT_COMPLETED[@]}"; do
+            echo "phase=$phase"
+        done
+        for action in "${CHROOT_CLEANUP_ACTIONS[@]}"; do
+            echo "cleanup=$action"
+        done
+    } > "$CHECKPOINT_STATE_FILE.tmp" && mv -f "$CHECKPOINT_STATE_FILE.tmp" "$CHECKPOINT_STATE_FILE"
+}
+
+# _checkpoint_read_state
+# Lê o arquivo de estado. Retorna 1 se ele não existir ou o snapshot estiver ausente.
+# As ações de limpeza registradas pelas fases concluídas (ex: por add-ons que não serão
+# executados novamente) são restauradas em CHROOT_CLEANUP_ACTIONS.
+_checkpoint_read_state() {
+    [[ -r "$CHECKPOINT_STATE_FILE" ]] || return 1
+
+    local line fingerprint="" snapshot=""
+    local -a phases=() actions=() addons=()
+    while IFS= read -r line; do
+        case "$line" in
+            fingerprint=*) fingerprint="${line#*=}" ;;
+            snapshot=*) snapshot="${line#*=}" ;;
+            addon=*) addons+=("${line#*=}") ;;
+            phase=*) phases+=("${line#*=}") ;;
+            cleanup=*) actions+=("${line#*=}") ;;
+        esac
+    done < "$CHECKPOINT_STATE_FILE"
+
+    if [[ "$fingerprint" != "$CHECKPOINT_FINGERPRINT" ]]; then
+        log_warning "Os checkpoints em '$CHECKPOINT_STATE_FILE' foram gerados com outra configuração."
+        return 1
+    fi
+    if [[ ${#phases[@]} -eq 0 || ! -f "${snapshot#*:}" ]]; then
+        log_warning "Snapshot do último checkpoint ausente: '${snapshot#*:}'."
+        return 1
+    fi
+
+    CHECKPOINT_SNAPSHOT="$snapshot"
+    CHECKPOINT_COMPLETED=("${phases[@]}")
+    CHROOT_CLEANUP_ACTIONS=("${actions[@]}")
+    _CHECKPOINT_RECORDED_ADDONS=("${addons[@]}")
+}
+
+# _checkpoint_check_addons
+# Verifica se os add-ons já aplicados correspondem ao início da lista de add-ons atual,
+# com o mesmo conteúdo (digest) de quando foram aplicados.
+_checkpoint_check_addons() {
+    local phase index=0
+
+    for phase in "${CHECKPOINT_COMPLETED[@]}"; do
+        if [[ "$phase" == addon:* ]]; then
+            [[ "${_CHECKPOINT_ADDONS[$index]:-}" == "${phase#addon:}:"* ]] || return 1
+            [[ "${_CHECKPOINT_ADDONS[$index]}" == "${_CHECKPOINT_RECORDED_ADDONS[$index]:-}" ]] || return 1
+            index=$((index + 1))
+        fi
+    done
+}
+
+# checkpoint_init <image> <fingerprint> <resume> [addons...]
+# Habilita os checkpoints para a imagem informada. Com resume=true, carrega as fases
+# concluídas de uma construção anterior com o mesmo fingerprint; caso contrário (ou se
+# não houver checkpoints válidos), descarta os checkpoints existentes.
+#
+# Argumentos:
+#   image       - Caminho da imagem de disco.
+#   fingerprint - Fingerprint da configuração (ver checkpoint_fingerprint).
+#   resume      - true para retomar a partir do último checkpoint.
+#   addons      - Add-ons da construção atual, na ordem de aplicação, no formato nome:digest
+#                 (ver registry_digest). Um add-on aplicado só é reaproveitado se o digest
+#                 for o mesmo.
+checkpoint_init() {
+    local image="$1"
+    local fingerprint="$2"
+    local resume="$3"
+    shift 3
+
+    CHECKPOINT_ENABLED=true
+    _CHECKPOINT_ADDONS=("$@")
+    CHECKPOINT_IMAGE="$image"
+    CHECKPOINT_STATE_FILE="$image.checkpoint"
+    CHECKPOINT_FINGERPRINT="$fingerprint"
+    CHECKPOINT_SNAPSHOT=""
+    CHECKPOINT_COMPLETED=()
+
+    if [[ "$resume" == true ]]; then
+        local -a actions=("${CHROOT_CLEANUP_ACTIONS[@]}")
+        if ! _checkpoint_read_state; then
+            log_warning "Nenhum checkpoint válido encontrado. A construção começará do início."
+        elif ! _checkpoint_check_addons; then
+            log_warning "Os add-ons aplicados anteriormente não correspondem aos atuais. A construção começará do início."
+            CHROOT_CLEANUP_ACTIONS=("${actions[@]}")
+        else
+            log_info "Retomando a partir do checkpoint '$(checkpoint_last)' (fases concluídas: ${CHECKPOINT_COMPLETED[*]})."
+            return 0
+        fi
+    fi
+
+    checkpoint_clear
+    CHECKPOINT_ENABLED=true
+}
+
+# checkpoint_last
+# Imprime a última fase concluída (vazio se nenhuma).
+checkpoint_last() {
+    local count=${#CHECKPOINT_COMPLETED[@]}
+    if [[ $count -gt 0 ]]; then
+        echo "${CHECKPOINT_COMPLETED[$((count - 1))]}"
+    fi
+}
+
+# checkpoint_done <phase>
+# Retorna 0 se a fase já foi concluída em uma construção anterior.
+checkpoint_done() {
+    local phase="$1"
+    [[ "$CHECKPOINT_ENABLED" == true ]] || return 1
+    [[ " ${CHECKPOINT_COMPLETED[*]} " == *" $phase "* ]]
+}
+
+# _checkpoint_snapshot <source> <target_base>
+# Copia a imagem para um snapshot: reflink quando o sistema de arquivos suporta
+# (instantâneo e sem ocupar espaço extra) ou, caso contrário, uma cópia qcow2 esparsa.
+# Imprime "formato:arquivo" do snapshot criado.
+_checkpoint_snapshot() {
+    local source="$1"
+    local target_base="$2"
+
+    if cp --reflink=always "$source" "$target_base.img" 2>/dev/null; then
+        echo "raw:$target_base.img"
+        return 0
+    fi
+    rm -f "$target_base.img"
+
+    log_verbose "Reflink não suportado; criando snapshot qcow2..."
+    if exec_logged "QEMU_IMAGE" qemu-img convert -f raw -O qcow2 "$source" "$target_base.qcow2"; then
+        echo "qcow2:$target_base.qcow2"
+        return 0
+    fi
+    rm -f "$target_base.qcow2"
+    return 1
+}
+
+# checkpoint_save <phase> [mountpoint]
+# Registra a fase como concluída e grava um snapshot da imagem. Se o sistema estiver
+# montado, os dados são sincronizados e o sistema de arquivos raiz congelado durante a
+# cópia. O snapshot anterior é descartado após o novo ser gravado.
+#
+# Argumentos:
+#   phase      - Nome da fase (disk, bootstrap, catalog, addon:<nome> ou prune).
+#   mountpoint - Ponto de montagem do sistema raiz da imagem, se montado.
+checkpoint_save() {
+    local phase="$1"
+    local mountpoint="${2:-}"
+
+    [[ "$CHECKPOINT_ENABLED" == true ]] || return 0
+
+    log_info "Gravando checkpoint da fase '$phase'..."
+    sync
+
+    local frozen=false
+    if [[ -n "$mountpoint" ]] && mountpoint -q "$mountpoint"; then
+        if fsfreeze -f "$mountpoint" 2>/dev/null; then
+            frozen=true
+        else
+            log_warning "Não foi possível congelar '$mountpoint'; o snapshot usará apenas sync."
+        fi
+    fi
+
+    local snapshot status=0
+    snapshot=$(_checkpoint_snapshot "$CHECKPOINT_IMAGE" "$CHECKPOINT_STATE_FILE.${phase//:/-}") || status=$?
+
+    if [[ "$frozen" == true ]]; then
+        fsfreeze -u "$mountpoint" || log_warning "Falha ao descongelar '$mountpoint'."
+    fi
+
+    if [[ $status -ne 0 ]]; then
+        log_warning "Falha ao gravar o snapshot da fase '$phase'. O checkpoint anterior será mantido."
+        _CHECKPOINT_PENDING+=("$phase")
+        return 0
+    fi
+
+    local previous="${CHECKPOINT_SNAPSHOT#*:}"
+    CHECKPOINT_SNAPSHOT="$snapshot"
+    CHECKPOINT_COMPLETED+=("${_CHECKPOINT_PENDING[@]}" "$phase")
+    _CHECKPOINT_PENDING=()
+    _checkpoint_write_state
+
+    if [[ -n "$previous" && "$previous" != "${snapshot#*:}" ]]; then
+        rm -f "$previous"
+    fi
+    log_verbose "Checkpoint '$phase' gravado em '${snapshot#*:}'."
+}
+
+# checkpoint_restore
+# Restaura a imagem a partir do snapshot do último checkpoint.
+checkpoint_restore() {
+    local format="${CHECKPOINT_SNAPSHOT%%:*}"
+    local snapshot="${CHECKPOINT_SNAPSHOT#*:}"
+
+    log_info "Restaurando imagem a partir do checkpoint '$(checkpoint_last)'..."
+    rm -f "$CHECKPOINT_IMAGE"
+    if [[ "$format" == "qcow2" ]]; then
+        exec_logged "QEMU_IMAGE" qemu-img convert -f qcow2 -O raw "$snapshot" "$CHECKPOINT_IMAGE"
+    else
+        cp --reflink=auto --sparse=always "$snapshot" "$CHECKPOINT_IMAGE"
+    fi
+}
+
+# checkpoint_clear
+# Remove o estado e os snapshots (ex: após uma construção concluída) e desabilita os checkpoints.
+checkpoint_clear() {
+    if [[ -n "$CHECKPOINT_STATE_FILE" ]]; then
+        rm -f "$CHECKPOINT_STATE_FILE" "$CHECKPOINT_STATE_FILE".*
+    fi
+    CHECKPOINT_ENABLED=false
+    CHECKPOINT_SNAPSHOT=""
+    CHECKPOINT_COMPLETED=()
+    _CHECKPOINT_PENDING=()
+}
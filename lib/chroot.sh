@@ -131,6 +131,257 @@ chroot_call_logged() {
     return $exit_code
 }
 
+# Ações de limpeza executadas por "chroot_run_cleanup_actions" antes da desmontagem.
+# Formato de cada entrada: "<ação>:<argumento>[:<argumento>]", com caminhos relativos à raiz do sistema.
+#
+# Ações suportadas:
+#   truncate:<caminho>        - Esvazia o arquivo (ou todos os arquivos regulares do diretório) sem deletá-lo
+#   remove:<glob>             - Remove os arquivos e diretórios que casam com o glob
+#   symlink:<alvo>:<link>     - Cria (ou substitui) um link simbólico
+#   vacuum:<diretório>        - Remove os arquivos de journal do systemd do diretório
+#   swap:<swapfile>           - Desativa, descarta e recria o swapfile com o mesmo tamanho
+declare -ag CHROOT_CLEANUP_ACTIONS
+if [[ -z "${CHROOT_CLEANUP_ACTIONS+x}" ]]; then
+    CHROOT_CLEANUP_ACTIONS=(
+        "remove:/var/cache/apt/archives/*.deb"
+        "remove:/var/cache/apt/archives/partial/*"
+        "remove:/var/cache/apt/*.bin"
+        "remove:/var/lib/apt/lists/*"
+        "truncate:/etc/machine-id"
+        "remove:/var/lib/dbus/machine-id"
+        "symlink:/etc/machine-id:/var/lib/dbus/machine-id"
+        "remove:/etc/ssh/ssh_host_*"
+        "remove:/var/lib/dhcp/*"
+        "remove:/var/log/*.gz"
+        "remove:/var/log/*.[0-9]"
+        "remove:/var/log/*.old"
+        "vacuum:/var/log/journal"
+        "truncate:/var/log"
+        "remove:/tmp/*"
+        "remove:/var/tmp/*"
+        "remove:/root/.bash_history"
+        "remove:/home/*/.bash_history"
+        "remove:/home/*/.cache/thumbnails"
+        "remove:/home/*/.cache/mozilla"
+        "swap:/swapfile"
+    )
+fi
+
+# chroot_cleanup_register <ação> <argumento...>
+# Registra uma ação de limpeza adicional a ser executada na finalização da imagem.
+# Add-ons podem usar esta função para limpar seus próprios caches e arquivos temporários.
+#
+# Argumentos:
+#   ação        - Ação de limpeza (truncate, remove, symlink, vacuum, swap)
+#   argumento   - Argumentos da ação (ver CHROOT_CLEANUP_ACTIONS)
+chroot_cleanup_register() {
+    local action="$1"
+    shift
+
+    case "$action" in
+        truncate|remove|vacuum|swap)
+            if [[ $# -ne 1 ]]; then
+                log_error "A ação de limpeza '$action' requer exatamente um argumento."
+                return 1
+            fi
+            ;;
+        symlink)
+            if [[ $# -ne 2 ]]; then
+                log_error "A ação de limpeza 'symlink' requer um alvo e um link."
+                return 1
+            fi
+            ;;
+        *)
+            log_error "Ação de limpeza desconhecida: $action"
+            return 1
+            ;;
+    esac
+
+    if [[ "$action" == remove ]] && ! _chroot_valid_remove_pattern "$1"; then
+        log_error "Padrão de remoção inválido: '$1'. Use um caminho absoluto abaixo da raiz (ex: /var/cache/foo/*)."
+        return 1
+    fi
+
+    CHROOT_CLEANUP_ACTIONS+=("$action:$(join_by ':' "$@")")
+    log_verbose "Ação de limpeza registrada: ${CHROOT_CLEANUP_ACTIONS[-1]}"
+}
+
+# _chroot_used_bytes <mountpoint>
+# Retorna o número de bytes em uso no sistema de arquivos do ponto de montagem.
+_chroot_used_bytes() {
+    df -B1 --output=used "$1" | tail -n1 | tr -d ' '
+}
+
+# _chroot_remove_paths [caminhos...]
+# Remove de uma só vez todos os caminhos fornecidos, sem atravessar outros sistemas de arquivos.
+_chroot_remove_paths() {
+    if [[ $# -eq 0 ]]; then
+        return 0
+    fi
+
+    log_verbose "Removendo $# caminhos..."
+    rm -rf --one-file-system -- "$@" || log_warning "Falha ao remover alguns arquivos."
+}
+
+# _chroot_reset_swapfile <mountpoint> <swapfile>
+# Desativa o swapfile, descarta seus blocos da imagem e o recria vazio com o mesmo tamanho.
+# Os blocos livres são descartados com fstrim, o que abre buracos na imagem RAW através do
+# dispositivo loop. Caso o descarte não seja suportado, preenche o swapfile com zeros.
+_chroot_reset_swapfile() {
+    local mountpoint="$1"
+    local swapfile="$mountpoint$2"
+
+    if [[ ! -f "$swapfile" ]]; then
+        log_verbose "Swapfile '$2' não existe. Nada para recriar."
+        return 0
+    fi
+
+    local size
+    size=$(stat -c %s "$swapfile")
+
+    log_verbose "Desligando swap '$2'..."
+    swapoff "$swapfile" &> /dev/null || true
+    rm -f "$swapfile"
+
+    log_verbose "Descartando blocos livres do sistema de arquivos..."
+    if exec_logged "FSTRIM" fstrim "$mountpoint"; then
+        exec_logged "SWAP" fallocate -l "$size" "$swapfile" || return 1
+    else
+        log_warning "Descarte de blocos não suportado. Preenchendo swapfile com zeros..."
+        exec_logged "SWAP" dd if=/dev/zero of="$swapfile" bs=1M count=$((size / 1048576)) status=none || return 1
+    fi
+
+    chmod 600 "$swapfile"
+    exec_logged "SWAP" mkswap "$swapfile"
+}
+
+# _chroot_valid_remove_pattern <pattern>
+# Retorna 0 se o padrão de remoção for seguro: um caminho absoluto, sem componentes '..',
+# que não seja a raiz e cujo primeiro componente não seja um glob (ex: '/', '/.' e '/*'
+# removeriam o sistema inteiro).
+_chroot_valid_remove_pattern() {
+    local pattern="$1"
+    [[ "$pattern" == /* ]] || return 1
+
+    local part
+    local -a parts=() components=()
+    IFS='/' read -r -a parts <<< "$pattern"
+    for part in "${parts[@]}"; do
+        case "$part" in
+            ""|.) ;;
+            ..) return 1 ;;
+            *) components+=("$part") ;;
+        esac
+    done
+    [[ ${#components[@]} -gt 0 && "${components[0]}" != *['*?[']* ]]
+}
+
+# _chroot_expand_glob <pattern>
+# Imprime, separados por NUL, os caminhos que casam com o padrão. Apenas a expansão de
+# caminhos é aplicada: espaços no padrão não o dividem em várias palavras.
+_chroot_expand_glob() {
+    local IFS=
+    # shellcheck disable=SC2206
+    local matches=( $1 )
+    if [[ ${#matches[@]} -gt 0 ]]; then
+        printf '%s\0' "${matches[@]}"
+    fi
+}
+
+# chroot_run_cleanup_actions <mountpoint> [ações...]
+# Executa uma lista de ações de limpeza diretamente sobre a árvore do sistema montado,
+# sem iniciar um processo de chroot por etapa nem um processo por arquivo.
+# Ao final, informa quantos bytes foram liberados.
+#
+# Argumentos:
+#   mountpoint - Ponto de montagem base do sistema (ex: /mnt/chroot)
+#   ações      - Ações a serem executadas (padrão: CHROOT_CLEANUP_ACTIONS)
+chroot_run_cleanup_actions() {
+    local mountpoint="$1"
+    shift
+
+    local actions=("$@")
+    if [[ ${#actions[@]} -eq 0 ]]; then
+        actions=("${CHROOT_CLEANUP_ACTIONS[@]}")
+    fi
+
+    if [[ -z "$mountpoint" || "$mountpoint" == "/" ]]; then
+        log_error "Ponto de montagem inválido para limpeza: '$mountpoint'"
+        return 1
+    fi
+
+    local used_before
+    used_before=$(_chroot_used_bytes "$mountpoint")
+
+    local restore_nullglob restore_dotglob
+    restore_nullglob=$(shopt -p nullglob || true)
+    restore_dotglob=$(shopt -p dotglob || true)
+    shopt -s nullglob dotglob
+
+    local pending_removals=()
+    local entry action arg1 arg2
+    for entry in "${actions[@]}"; do
+        IFS=':' read -r action arg1 arg2 <<< "$entry"
+        log_verbose "Ação de limpeza: $entry"
+
+        case "$action" in
+            remove)
+                if ! _chroot_valid_remove_pattern "$arg1"; then
+                    log_warning "Padrão de remoção inseguro ignorado: '$arg1'."
+                    continue
+                fi
+                local match
+                while IFS= read -r -d '' match; do
+                    pending_removals+=("$match")
+                done < <(_chroot_expand_glob "$mountpoint$arg1")
+                ;;
+            truncate)
+                local target="$mountpoint$arg1"
+                if [[ -d "$target" ]]; then
+                    local file
+                    while IFS= read -r -d '' file; do
+                        : > "$file"
+                    done < <(find "$target" -type f -size +0 -print0)
+                elif [[ -f "$target" ]]; then
+                    : > "$target"
+                fi
+                ;;
+            symlink)
+                _chroot_remove_paths "${pending_removals[@]}"
+                pending_removals=()
+                ln -sfn "$arg1" "$mountpoint$arg2" || log_warning "Falha ao criar link simbólico '$arg2'."
+                ;;
+            vacuum)
+                if [[ -d "$mountpoint$arg1" ]]; then
+                    find "$mountpoint$arg1" -type f \( -name '*.journal' -o -name '*.journal~' \) -delete \
+                        || log_warning "Falha ao limpar journal em '$arg1'."
+                fi
+                ;;
+            swap)
+                _chroot_remove_paths "${pending_removals[@]}"
+                pending_removals=()
+                _chroot_reset_swapfile "$mountpoint" "$arg1" || log_warning "Falha ao recriar swapfile '$arg1'."
+                ;;
+            *)
+                log_warning "Ação de limpeza desconhecida ignorada: $entry"
+                ;;
+        esac
+    done
+
+    _chroot_remove_paths "${pending_removals[@]}"
+
+    eval "$restore_nullglob"
+    eval "$restore_dotglob"
+
+    local used_after freed
+    used_after=$(_chroot_used_bytes "$mountpoint")
+    freed=$((used_before - used_after))
+    if (( freed < 0 )); then
+        freed=0
+    fi
+    log_info "Limpeza liberou $freed bytes ($(numfmt --to=iec-i --suffix=B "$freed"))."
+}
+
 # chroot_cleanup
 # Realiza a limpeza do sistema dentro do chroot e desmonta todas as partições montadas.
 chroot_cleanup() {
@@ -142,49 +393,10 @@ chroot_cleanup() {
     local mountpoint="${SYSTEM_MOUNTPOINTS[0]}"
 
     log_info "Fazendo limpeza do sistema..."
-    log_verbose "Limpando caches do apt..."
-    chroot_call_logged "$mountpoint" apt-get clean || log_warning "Falha ao limpar caches do apt."
-
-    log_verbose "Removendo listas do apt..."
-    rm -rf "$mountpoint/var/lib/apt/lists/*" || log_warning "Falha ao remover listas do apt."
-
     log_verbose "Autoremovendo pacotes órfãos..."
     chroot_call_logged "$mountpoint" apt-get autoremove -y || log_warning "Falha ao autoremover pacotes órfãos."
 
-    log_verbose "Removendo identidade da máquina..."
-    chroot_call_logged "$mountpoint" truncate -s 0 /etc/machine-id || log_warning "Falha ao truncar /etc/machine-id."
-    chroot_call_logged "$mountpoint" rm -f /var/lib/dbus/machine-id || log_warning "Falha ao remover /var/lib/dbus/machine-id."
-    chroot_call_logged "$mountpoint" ln -s /etc/machine-id /var/lib/dbus/machine-id || log_warning "Falha ao criar link simbólico para machine-id."
-    
-    log_verbose "Removendo chaves SSH do host..."
-    chroot_call_logged "$mountpoint" rm -f /etc/ssh/ssh_host_* || log_warning "Falha ao remover chaves SSH do host."
-
-    log_verbose "Limpando leases de DHCP antigos..."
-    chroot_call_logged "$mountpoint" rm -f /var/lib/dhcp/* || log_warning "Falha ao remover leases de DHCP."
-
-    log_verbose "Esvaziando arquivos de log sem deletá-los..."
-    chroot_call_logged "$mountpoint" find /var/log -type f -exec truncate -s 0 {} \; || log_warning "Falha ao esvaziar arquivos de log."
-    
-    log_verbose "Removendo arquivos de log rotacionados..."
-    chroot_call_logged "$mountpoint" rm -rf /var/log/*.gz /var/log/*.[0-9] /var/log/*.old || log_warning "Falha ao remover arquivos de log rotacionados."
-    
-    log_verbose "Limpando journal do systemd..."
-    chroot_call_logged "$mountpoint" journalctl --vacuum-time=1s || log_warning "Falha ao limpar journal do systemd."
-
-    log_verbose "Limpando histórico e arquivos temporários..."
-    chroot_call_logged "$mountpoint" rm -rf /tmp/* || log_warning "Falha ao limpar /tmp."
-    chroot_call_logged "$mountpoint" rm -rf /var/tmp/* || log_warning "Falha ao limpar /var/tmp."
-    chroot_call_logged "$mountpoint" rm -f /root/.bash_history || log_warning "Falha ao remover histórico do root."
-    chroot_call_logged "$mountpoint" rm -f /home/*/.bash_history || log_warning "Falha ao remover histórico dos usuários."
-    chroot_call_logged "$mountpoint" rm -rf /home/*/.cache/thumbnails || log_warning "Falha ao limpar thumbnails dos usuários."
-    chroot_call_logged "$mountpoint" rm -rf /home/*/.cache/mozilla || log_warning "Falha ao limpar cache do Mozilla dos usuários."
-
-    log_verbose "Desligando swap..."
-    chroot_call_logged "$mountpoint" swapoff -a || log_warning "Falha ao desligar swap."
-    log_verbose "Preenchendo swapfile com zeros..."
-    chroot_call_logged "$mountpoint" dd if=/dev/zero of=/swapfile bs=1M count=2048 status=progress || log_warning "Falha ao preencher swapfile com zeros."
-    log_verbose "Recriando swapfile..."
-    chroot_call_logged "$mountpoint" mkswap /swapfile || log_warning "Falha ao recriar swapfile."
+    chroot_run_cleanup_actions "$mountpoint" || log_warning "Falha ao executar as ações de limpeza."
 
     log_info "Desmontando sistema..."
 
@@ -16,6 +16,9 @@ _REQUIRED_DEPENDENCIES=(
     "blkid:util-linux"       # Vital para o fstab UUID
     "mkfs.ext4:e2fsprogs"
     "mkfs.vfat:dosfstools"   # Vital para partição EFI (boot moderno)
+    "sfdisk:fdisk"           # Redução da imagem (--shrink)
+    "e2fsck:e2fsprogs"
+    "resize2fs:e2fsprogs"
 
     # --- Construção do Sistema ---
     "debootstrap:debootstrap"
@@ -28,6 +31,7 @@ _REQUIRED_DEPENDENCIES=(
     "grep:grep"
     "sed:sed"                # Vital para substituir XML do OVF
     "sha256sum:coreutils"    # Vital para o Manifesto (.mf)
+    "python3:python3"        # Vital para as ferramentas em assets (ovftool.py, rootfstool.py)
 )
 
 # check_debian_based
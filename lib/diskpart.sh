@@ -460,6 +460,198 @@ diskpart_create_image_gpt_layout() {
     log_info "Layout GPT criado com sucesso na imagem de disco."
 }
 
+# Setores reservados no fim do disco para o cabeçalho GPT reserva (32 de entradas + 1 de cabeçalho)
+_DISKPART_GPT_BACKUP_SECTORS=33
+
+# _diskpart_shrink_filesystem <partition_device> <headroom_bytes> <partition_bytes>
+# Verifica e reduz o ext4 da partição ao tamanho mínimo mais a folga, alinhado a 1 MiB.
+# Imprime o novo tamanho do sistema de arquivos em bytes, ou nada se não houver redução.
+_diskpart_shrink_filesystem() {
+    local partition="$1"
+    local headroom_bytes="$2"
+    local partition_bytes="$3"
+    local mib=$((1024 * 1024))
+
+    log_info "Verificando o sistema de arquivos em '$partition'..."
+    local status=0
+    exec_logged "DISKPART" e2fsck -f -y "$partition" || status=$?
+    if [[ $status -gt 1 ]]; then
+        log_error "e2fsck encontrou erros não corrigidos em '$partition' (código $status)."
+        return 1
+    fi
+
+    local min_blocks block_size target_bytes
+    min_blocks=$(resize2fs -P "$partition" 2>/dev/null | awk -F': *' '/minimum size/ {print $2}')
+    block_size=$(tune2fs -l "$partition" | awk -F': *' '/^Block size/ {print $2}')
+    if [[ -z "$min_blocks" || -z "$block_size" ]]; then
+        log_error "Não foi possível determinar o tamanho mínimo de '$partition'."
+        return 1
+    fi
+
+    target_bytes=$(( (min_blocks * block_size + headroom_bytes + mib - 1) / mib * mib ))
+    log_verbose "Tamanho mínimo: $((min_blocks * block_size)) bytes; alvo com folga: $target_bytes bytes."
+    if [[ $target_bytes -ge $partition_bytes ]]; then
+        return 0
+    fi
+
+    log_info "Reduzindo o sistema de arquivos para $((target_bytes / mib)) MiB..."
+    if ! exec_logged "DISKPART" resize2fs "$partition" "$((target_bytes / 1024))K"; then
+        log_error "Falha ao reduzir o sistema de arquivos em '$partition'."
+        return 1
+    fi
+
+    local block_count
+    block_count=$(tune2fs -l "$partition" | awk -F': *' '/^Block count/ {print $2}')
+    echo $((block_count * block_size))
+}
+
+# Tamanho do código de boot no início do MBR (ex: boot.img do GRUB no modo hybrid)
+_DISKPART_BOOT_CODE_SIZE=440
+
+# _diskpart_rewrite_gpt <disk_image>
+# Regrava a tabela GPT com as mesmas partições (e UUIDs) após a imagem mudar de tamanho:
+# o MBR protetor passa a cobrir o novo disco e o cabeçalho reserva vai para o último setor.
+# O sfdisk cria um novo rótulo sem o código de boot do MBR, por isso ele é salvo antes e
+# restaurado depois.
+_diskpart_rewrite_gpt() {
+    local disk_image="$1"
+
+    local boot_code
+    boot_code=$(mktemp)
+    if ! dd if="$disk_image" of="$boot_code" bs=$_DISKPART_BOOT_CODE_SIZE count=1 status=none; then
+        log_error "Falha ao salvar o código de boot do MBR de '$disk_image'."
+        rm -f "$boot_code"
+        return 1
+    fi
+
+    log_verbose "Regravando a tabela GPT e o MBR protetor para o novo tamanho da imagem..."
+    # O último LBA utilizável é recalculado a partir do novo tamanho
+    local status=0
+    sfdisk --dump "$disk_image" 2>/dev/null | sed '/^last-lba:/d' | \
+        exec_logged "DISKPART" sfdisk --no-reread --no-tell-kernel "$disk_image" || status=$?
+
+    if ! dd if="$boot_code" of="$disk_image" bs=$_DISKPART_BOOT_CODE_SIZE count=1 \
+        conv=notrunc status=none || ! cmp -s -n $_DISKPART_BOOT_CODE_SIZE "$boot_code" "$disk_image"; then
+        log_error "Falha ao restaurar o código de boot do MBR de '$disk_image'."
+        rm -f "$boot_code"
+        return 1
+    fi
+    rm -f "$boot_code"
+
+    if [[ $status -ne 0 ]]; then
+        log_error "Falha ao regravar a tabela GPT de '$disk_image'."
+        return 1
+    fi
+
+    # A entrada do MBR protetor (offset 446) guarda o tamanho em setores no offset 12
+    local sectors pmbr_sectors
+    sectors=$(( $(stat -c %s "$disk_image") / 512 - 1 ))
+    if [[ $sectors -gt 4294967295 ]]; then
+        sectors=4294967295
+    fi
+    pmbr_sectors=$(od -An -tu4 -j $((446 + 12)) -N4 "$disk_image" | tr -d ' ')
+    if [[ "$pmbr_sectors" != "$sectors" ]]; then
+        log_error "O MBR protetor de '$disk_image' cobre $pmbr_sectors setores (esperado: $sectors)."
+        return 1
+    fi
+}
+
+# diskpart_shrink_image <disk_image> <headroom>
+# Reduz a imagem ao seu conteúdo: o ext4 da última partição (a do sistema, nos layouts
+# criados por diskpart_create_image_gpt_layout e diskpart_create_image_mbr_layout) é
+# reduzido ao tamanho mínimo mais a folga, o fim da partição é movido e a imagem truncada.
+# Em GPT, o cabeçalho reserva é movido para logo após a partição antes do truncamento e,
+# depois dele, a tabela é regravada para que o MBR protetor e o cabeçalho reserva
+# correspondam ao novo tamanho do disco. A imagem não deve estar em uso (sistema
+# desmontado e sem dispositivo loop).
+#
+# Argumentos:
+#   disk_image - Caminho para a imagem de disco RAW
+#   headroom   - Espaço livre mantido no sistema de arquivos (ex: 512M, 1G)
+diskpart_shrink_image() {
+    local disk_image="$1"
+    local headroom="$2"
+    local mib=$((1024 * 1024))
+
+    _validate_unit "$headroom"
+    local headroom_bytes
+    if [[ "$headroom" == *G ]]; then
+        headroom_bytes=$(gb_to_bytes "$headroom")
+    else
+        headroom_bytes=$(m_to_bytes "$headroom")
+    fi
+
+    log_info "Reduzindo a imagem '$disk_image' ao seu conteúdo (folga de $headroom)..."
+
+    local table last_partition number start_sector end_sector fs_type
+    table=$(parted -sm "$disk_image" unit s print | sed -n 2p | cut -d: -f6)
+    last_partition=$(parted -sm "$disk_image" unit s print | tail -n1)
+    IFS=: read -r number start_sector end_sector _ fs_type _ <<< "$last_partition"
+    start_sector="${start_sector%s}"
+    end_sector="${end_sector%s}"
+
+    if [[ "$fs_type" != "ext4" ]]; then
+        log_error "A última partição da imagem não é ext4 ('$fs_type'); a redução não é suportada."
+        return 1
+    fi
+
+    local device status=0 fs_bytes=""
+    device=$(diskpart_setup_loop_device "$disk_image")
+    diskpart_track_loop_device "$device"
+    exec_logged "DISKPART" udevadm settle
+    fs_bytes=$(_diskpart_shrink_filesystem "${device}p${number}" "$headroom_bytes" \
+        "$(( (end_sector - start_sector + 1) * 512 ))") || status=$?
+    diskpart_free_loop_device "$device"
+
+    if [[ $status -ne 0 ]]; then
+        return 1
+    fi
+    if [[ -z "$fs_bytes" ]]; then
+        log_info "O sistema de arquivos já ocupa a partição com a folga pedida. Nada a reduzir."
+        return 0
+    fi
+
+    # Tamanho final da imagem alinhado a 1 MiB; a partição termina antes da área do GPT reserva
+    local reserved=0
+    if [[ "$table" == "gpt" ]]; then
+        reserved=$_DISKPART_GPT_BACKUP_SECTORS
+    fi
+    local image_bytes new_end_sector
+    image_bytes=$(( (start_sector * 512 + fs_bytes + reserved * 512 + mib - 1) / mib * mib ))
+    new_end_sector=$(( image_bytes / 512 - reserved - 1 ))
+
+    log_info "Movendo o fim da partição $number para o setor $new_end_sector..."
+    if ! echo ", $((new_end_sector - start_sector + 1))" | \
+        exec_logged "DISKPART" sfdisk --no-reread --no-tell-kernel -N "$number" "$disk_image"; then
+        log_error "Falha ao redimensionar a partição $number."
+        return 1
+    fi
+
+    end_sector=$(parted -sm "$disk_image" unit s print | tail -n1 | cut -d: -f3)
+    end_sector="${end_sector%s}"
+    if [[ $(( (end_sector - start_sector + 1) * 512 )) -lt $fs_bytes ]]; then
+        log_error "A partição $number ficou menor que o sistema de arquivos; a imagem não será truncada."
+        return 1
+    fi
+
+    if [[ "$table" == "gpt" ]]; then
+        log_verbose "Movendo o cabeçalho GPT reserva para após a última partição..."
+        if ! exec_logged "DISKPART" sfdisk --relocate gpt-bak-mini "$disk_image"; then
+            log_error "Falha ao mover o cabeçalho GPT reserva."
+            return 1
+        fi
+    fi
+
+    local old_bytes
+    old_bytes=$(stat -c %s "$disk_image")
+    truncate -s "$image_bytes" "$disk_image"
+
+    if [[ "$table" == "gpt" ]]; then
+        _diskpart_rewrite_gpt "$disk_image" || return 1
+    fi
+    log_info "Imagem reduzida de $((old_bytes / mib)) MiB para $((image_bytes / mib)) MiB."
+}
+
 # diskpart_img_to_vmdk <input_img> <output_vmdk>
 # Converte uma imagem RAW para o formato VMDK
 # Argumentos:
@@ -473,3 +665,67 @@ diskpart_img_to_vmdk() {
     exec_logged "DISKPART" qemu-img convert -f raw -O vmdk -o subformat=streamOptimized "$input_img" "$output_vmdk"
     log_info "Conversão para VMDK concluída com sucesso."
 }
+
+# Caminho para o script Python imgtool.py
+IMGTOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/imgtool.py"
+
+# Extensões dos arquivos gerados por formato de exportação
+declare -gA DISKPART_EXPORT_EXTENSIONS=(
+    ["qcow2"]="qcow2"
+    ["gz"]="img.gz"
+    ["zst"]="img.zst"
+)
+
+# diskpart_export_image <input_img> <formats...>
+# Exporta uma imagem RAW para vários formatos a partir de uma única leitura da imagem,
+# calculando também o SHA256 da imagem. Os arquivos são criados ao lado da imagem de entrada.
+#
+# Argumentos:
+#   input_img - Caminho para a imagem RAW de entrada
+#   formats   - Formatos de saída (qcow2, gz, zst)
+diskpart_export_image() {
+    local input_img="$1"
+    shift
+
+    local base_path="${input_img%.img}"
+    local imgtool_cmd=(python3 "$IMGTOOL_SCRIPT" export "$input_img")
+    for format in "$@"; do
+        local extension="${DISKPART_EXPORT_EXTENSIONS[$format]:-}"
+        if [[ -z "$extension" ]]; then
+            log_error "Formato de exportação desconhecido: $format. Use: ${!DISKPART_EXPORT_EXTENSIONS[*]}"
+            exit 1
+        fi
+
+        log_verbose "Exportando formato '$format' para '$base_path.$extension'"
+        imgtool_cmd+=(--to "$format=$base_path.$extension")
+    done
+    imgtool_cmd+=(--digest sha256 --digest-file "$input_img.sha256")
+
+    log_info "Exportando imagem '$input_img' para os formatos: $*"
+    if ! exec_logged "IMGTOOL" "${imgtool_cmd[@]}"; then
+        log_error "Falha ao exportar a imagem '$input_img'."
+        exit 1
+    fi
+    log_info "Exportação concluída com sucesso."
+}
+
+# diskpart_create_delta <source_img> <target_img> <output_delta>
+# Gera o delta em nível de bloco que transforma a imagem de origem (ex: a construção
+# anterior) na imagem de destino. O delta é aplicado com "imgtool.py apply".
+#
+# Argumentos:
+#   source_img   - Caminho para a imagem RAW de origem
+#   target_img   - Caminho para a imagem RAW de destino
+#   output_delta - Caminho do arquivo de delta a ser gerado
+diskpart_create_delta() {
+    local source_img="$1"
+    local target_img="$2"
+    local output_delta="$3"
+
+    log_info "Gerando delta de '$source_img' para '$target_img' em '$output_delta'..."
+    if ! exec_logged "IMGTOOL" python3 "$IMGTOOL_SCRIPT" delta "$source_img" "$target_img" "$output_delta"; then
+        log_error "Falha ao gerar o delta da imagem '$target_img'."
+        exit 1
+    fi
+    log_info "Delta gerado com sucesso."
+}
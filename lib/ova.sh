@@ -10,7 +10,13 @@
 # Caminho para o script Python ovftool.py
 OVFTOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/ovftool.py"
 
-# generate_ovf <vm_name> <vmdk_file> <cpus> <ram_mb> <boot_mode> <license_file> <output_ovf>
+# Caminho para o script Python ovaupload.py
+OVAUPLOAD_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/ovaupload.py"
+
+# Espaço em branco reservado no final do OVF para atualizações de metadados no local
+OVA_OVF_RESERVE_BYTES="${OVA_OVF_RESERVE_BYTES:-65536}"
+
+# generate_ovf <vm_name> <vmdk_file> <cpus> <ram_mb> <boot_mode> <license_file> <output_ovf> [sizing_file] [node_count]
 # Gera o arquivo OVF com base nos parâmetros fornecidos usando ovftool.py.
 #
 # Argumentos:
@@ -21,6 +27,10 @@ OVFTOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/ovftool.
 #   boot_mode - Modo de boot (bios, uefi, hybrid).
 #   license_file - Caminho para o arquivo de licença.
 #   output_ovf - Caminho para o arquivo OVF de saída.
+#   sizing_file - Arquivo JSON com a matriz de dimensionamentos (opcional). Se informado,
+#                 o OVF oferece uma configuração de implantação por dimensionamento.
+#   node_count - Número de nós (opcional, padrão: 1). Com mais de um nó, o OVF descreve uma
+#                coleção de VMs que compartilham o mesmo disco.
 generate_ovf() {
     local vm_name="$1"
     local vmdk_file="$2"
@@ -29,6 +39,8 @@ generate_ovf() {
     local boot_mode="$5"
     local license_file="$6"
     local output_ovf="$7"
+    local sizing_file="${8:-}"
+    local node_count="${9:-1}"
 
     log_info "Gerando arquivo OVF em '$output_ovf'..."
 
@@ -43,11 +55,13 @@ generate_ovf() {
     
     # Obter informações do VMDK
     log_verbose "Obtendo informações do arquivo VMDK..."
-    local vmdk_basename vmdk_size
+    local vmdk_basename vmdk_size vmdk_capacity
     vmdk_basename=$(basename "$vmdk_file")
     vmdk_size=$(stat -c%s "$vmdk_file")
+    # Capacidade real do disco virtual (a imagem pode ter sido reduzida com --shrink)
+    vmdk_capacity=$(qemu-img info --output=json "$vmdk_file" | grep -m1 '"virtual-size"' | grep -o '[0-9]\+')
     
-    log_verbose "VMDK: arquivo='$vmdk_basename', tamanho=$vmdk_size bytes"
+    log_verbose "VMDK: arquivo='$vmdk_basename', tamanho=$vmdk_size bytes, capacidade=$vmdk_capacity bytes"
     
     # Preparar texto de anotação
     local annotation_text="Virtual machine created by UNMM (Ubuntu Noble Minimal Maker)
@@ -69,13 +83,14 @@ Generated: $(date '+%Y-%m-%d %H:%M:%S')"
         --cpu "$cpus"
         --ram "$ram_mb"
         -r "id=file1,href=$vmdk_basename,size=$vmdk_size"
-        -d "disk_id=vmdisk1,capacity=8,capacity_allocation_units=byte * 2^30,file_ref=file1,format=http://www.vmware.com/interfaces/specifications/vmdk.html#streamOptimized"
+        -d "disk_id=vmdisk1,capacity=$vmdk_capacity,file_ref=file1,format=http://www.vmware.com/interfaces/specifications/vmdk.html#streamOptimized"
         -n "name=NAT,description=The NAT network"
         --annotation "$annotation_text"
         --product "Ubuntu 24.04 LTS"
         --vendor "UNMM Project"
         --product-version "1.0.0"
         --product-url "https://ubuntu.com"
+        --reserve "$OVA_OVF_RESERVE_BYTES"
         -o "$output_ovf"
     )
     
@@ -84,6 +99,21 @@ Generated: $(date '+%Y-%m-%d %H:%M:%S')"
         log_verbose "Incluindo licença do arquivo: $license_file"
         ovftool_cmd+=(--license "$license_file" --license-file)
     fi
+
+    # Adicionar dimensionamentos (DeploymentOptionSection) se disponíveis
+    if [[ -n "$sizing_file" ]]; then
+        log_verbose "Incluindo dimensionamentos do arquivo: $sizing_file"
+        ovftool_cmd+=(--config-file "$sizing_file")
+    fi
+
+    # Adicionar nós (VirtualSystemCollection) referenciando o mesmo disco
+    if [[ "$node_count" -gt 1 ]]; then
+        log_verbose "Gerando coleção com $node_count nós compartilhando '$vmdk_basename'"
+        local node
+        for ((node = 1; node <= node_count; node++)); do
+            ovftool_cmd+=(--node "id=$vm_name-$node,name=$vm_name-$node")
+        done
+    fi
     
     # Executar ovftool.py
     if ! "${ovftool_cmd[@]}"; then
@@ -132,7 +162,7 @@ EOF
     log_verbose "Manifesto contém checksums para 2 arquivos: OVF e VMDK"
 }
 
-# create_ova_package <ovf_file> <vmdk_file> <mf_file> <output_ova>
+# create_ova_package <ovf_file> <vmdk_file> <mf_file> <output_ova> [upload_url] [keep_local]
 # Cria o pacote OVA a partir dos arquivos OVF, VMDK e MF.
 #
 # Argumentos:
@@ -140,11 +170,15 @@ EOF
 #   vmdk_file - Caminho para o arquivo VMDK.
 #   mf_file - Caminho para o arquivo manifesto.
 #   output_ova - Caminho para o arquivo OVA de saída.
+#   upload_url - URL compatível com S3 para onde o OVA é enviado enquanto é empacotado (opcional).
+#   keep_local - Se 'false', o OVA enviado não é gravado em disco (padrão: true).
 create_ova_package() {
     local ovf_file="$1"
     local vmdk_file="$2"
     local mf_file="$3"
     local output_ova="$4"
+    local upload_url="${5:-}"
+    local keep_local="${6:-true}"
 
     log_info "Criando pacote OVA em '$output_ova'..."
     log_verbose "Empacotando arquivos: OVF, MF e VMDK"
@@ -159,18 +193,78 @@ create_ova_package() {
     log_verbose "Ordem dos arquivos no TAR: 1) $ovf_basename, 2) $mf_basename, 3) $vmdk_basename"
 
     # OVA = TAR sem compressão na ordem específica: OVF, MF, VMDK
-    if ! exec_logged "TAR" tar -cf "$output_ova" -C "$work_dir" "$ovf_basename" "$mf_basename" "$vmdk_basename"; then
+    if [[ -n "$upload_url" ]]; then
+        # O uploader executa o tar e envia o fluxo em partes à medida que é gerado (gravando-o
+        # localmente, se pedido), sem uma segunda leitura do OVA. Se o tar falhar, o upload
+        # é cancelado antes de ser concluído.
+        log_info "Enviando pacote OVA para '$upload_url' durante o empacotamento..."
+        local upload_cmd=(python3 "$OVAUPLOAD_SCRIPT" "$upload_url" -C "$work_dir"
+            "$ovf_basename" "$mf_basename" "$vmdk_basename")
+        if [[ "$keep_local" == true ]]; then
+            upload_cmd+=(--output "$output_ova")
+        fi
+
+        if ! exec_logged "UPLOAD" "${upload_cmd[@]}"; then
+            log_error "Falha ao criar ou enviar o arquivo OVA"
+            exit 1
+        fi
+        log_info "Pacote OVA enviado com sucesso"
+    elif ! exec_logged "TAR" tar -cf "$output_ova" -C "$work_dir" "$ovf_basename" "$mf_basename" "$vmdk_basename"; then
         log_error "Falha ao criar o arquivo OVA"
         exit 1
     fi
 
-    log_info "Pacote OVA criado com sucesso"
-    local ova_size
-    ova_size=$(stat -c%s "$output_ova")
-    log_verbose "Tamanho do OVA: $ova_size bytes ($(numfmt --to=iec-i --suffix=B "$ova_size"))"
+    if [[ -f "$output_ova" ]]; then
+        log_info "Pacote OVA criado com sucesso"
+        local ova_size
+        ova_size=$(stat -c%s "$output_ova")
+        log_verbose "Tamanho do OVA: $ova_size bytes ($(numfmt --to=iec-i --suffix=B "$ova_size"))"
+    fi
 }
 
-# ova_generate <hostname> <output_path> <boot_mode> <license_file>
+# ova_update_metadata <ova_file> <product_version> [annotation] [license_file]
+# Atualiza no local a versão do produto, a anotação e a licença de um OVA existente.
+# Apenas o OVF e o manifesto são regravados; o disco não é lido nem copiado.
+#
+# Argumentos:
+#   ova_file - Caminho para o arquivo OVA.
+#   product_version - Nova versão do produto (vazio para manter).
+#   annotation - Novo texto de anotação (opcional).
+#   license_file - Caminho para o novo arquivo de licença (opcional).
+ova_update_metadata() {
+    local ova_file="$1"
+    local product_version="$2"
+    local annotation="${3:-}"
+    local license_file="${4:-}"
+
+    log_info "Atualizando metadados do OVA '$ova_file'..."
+
+    if [[ ! -f "$ova_file" ]]; then
+        log_error "Arquivo OVA não encontrado: $ova_file"
+        exit 1
+    fi
+
+    local ovftool_cmd=(python3 "$OVFTOOL_SCRIPT" --update-ova "$ova_file")
+    if [[ -n "$product_version" ]]; then
+        ovftool_cmd+=(--product-version "$product_version")
+    fi
+    if [[ -n "$annotation" ]]; then
+        ovftool_cmd+=(--annotation "$annotation")
+    fi
+    if [[ -n "$license_file" ]]; then
+        log_verbose "Incluindo licença do arquivo: $license_file"
+        ovftool_cmd+=(--license "$license_file" --license-file)
+    fi
+
+    if ! "${ovftool_cmd[@]}"; then
+        log_error "Falha ao atualizar os metadados do OVA (o OVF pode não caber no espaço reservado)"
+        exit 1
+    fi
+
+    log_info "Metadados do OVA atualizados com sucesso"
+}
+
+# ova_generate <hostname> <output_path> <boot_mode> <license_file> [sizing_file] [node_count] [upload_url] [keep_local]
 # Combina todas as etapas para gerar o arquivo OVA completo.
 #
 # Argumentos:
@@ -178,6 +272,10 @@ create_ova_package() {
 #   output_path - Caminho do diretório de saída.
 #   boot_mode - Modo de boot (bios, uefi, hybrid).
 #   license_file - Caminho para o arquivo de licença.
+#   sizing_file - Arquivo JSON com a matriz de dimensionamentos (opcional).
+#   node_count - Número de nós que compartilham o disco (opcional, padrão: 1).
+#   upload_url - URL compatível com S3 para enviar o OVA durante o empacotamento (opcional).
+#   keep_local - Se 'false', o OVA enviado não é mantido em disco (padrão: true).
 ova_generate() {
     log_info "Iniciando processo de geração OVA..."
     
@@ -186,6 +284,10 @@ ova_generate() {
     output_path="$2"
     boot_mode="$3"
     license_file="$4"
+    local sizing_file="${5:-}"
+    local node_count="${6:-1}"
+    local upload_url="${7:-}"
+    local keep_local="${8:-true}"
 
     # Parâmetros padrão para a VM
     local vm_name="$hostname"
@@ -202,6 +304,9 @@ ova_generate() {
     log_verbose "  Boot Mode: $boot_mode"
     log_verbose "  VMDK: $vmdk_file"
     log_verbose "  Licença: $license_file"
+    log_verbose "  Dimensionamentos: ${sizing_file:-nenhum}"
+    log_verbose "  Nós: $node_count"
+    log_verbose "  Upload: ${upload_url:-nenhum}"
     
     # Arquivos de saída
     local ovf_file="$output_path/$hostname.ovf"
@@ -221,16 +326,21 @@ ova_generate() {
     log_verbose "VMDK verificado: $(stat -c%s "$vmdk_file") bytes"
 
     # Gerar OVF
-    generate_ovf "$vm_name" "$vmdk_file" "$cpus" "$ram_mb" "$boot_mode" "$license_file" "$ovf_file"
+    generate_ovf "$vm_name" "$vmdk_file" "$cpus" "$ram_mb" "$boot_mode" "$license_file" "$ovf_file" "$sizing_file" "$node_count"
     
     # Gerar Manifesto
     generate_manifest "$ovf_file" "$vmdk_file" "$mf_file"
     
     # Criar pacote OVA
-    create_ova_package "$ovf_file" "$vmdk_file" "$mf_file" "$ova_file"
+    create_ova_package "$ovf_file" "$vmdk_file" "$mf_file" "$ova_file" "$upload_url" "$keep_local"
     
     log_info "Processo de geração OVA concluído com sucesso"
-    log_info "Arquivo OVA disponível em: $ova_file"
+    if [[ -f "$ova_file" ]]; then
+        log_info "Arquivo OVA disponível em: $ova_file"
+    fi
+    if [[ -n "$upload_url" ]]; then
+        log_info "Arquivo OVA publicado em: $upload_url"
+    fi
     
     # Limpeza dos arquivos intermediários (opcional)
     log_verbose "Mantendo arquivos intermediários para referência: OVF, MF, VMDK"
@@ -0,0 +1,58 @@
+#!/usr/bin/bash
+#
+#   UNMM Overlay Module
+#   - Version: 1.0.0
+#   - Description: Aplicação de overlays de assets dos add-ons em uma única extração.
+#
+#   Sob licença MIT
+#
+
+# Caminho para o script Python overlaytool.py
+OVERLAYTOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/overlaytool.py"
+
+# Diretório de cache dos pacotes de overlays (nomeados pelo hash do conteúdo)
+OVERLAY_CACHE_DIR="${OVERLAY_CACHE_DIR:-${UNMM_CACHE_DIR:-/var/cache/unmm}/overlays}"
+
+# overlay_apply <mountpoint> <username> <overlays...>
+# Compila os overlays em um pacote TAR (reaproveitado do cache se o conteúdo não mudou)
+# e o extrai no sistema montado, aplicando donos e modos em uma única passada.
+#
+# Argumentos:
+#   mountpoint - Ponto de montagem do sistema de arquivos raiz.
+#   username   - Usuário que substitui o marcador {user} nos overlays.
+#   overlays   - Overlays no formato "origem:destino:dono:modo" (ver assets/overlaytool.py).
+overlay_apply() {
+    local mountpoint="$1"
+    local username="$2"
+    shift 2
+
+    if [[ $# -eq 0 ]]; then
+        return 0
+    fi
+
+    log_info "Aplicando $# overlays de assets..."
+    local overlay
+    for overlay in "$@"; do
+        log_verbose "Overlay: $overlay"
+    done
+
+    local output pack
+    if ! output=$(python3 "$OVERLAYTOOL_SCRIPT" --root "$mountpoint" --cache "$OVERLAY_CACHE_DIR" \
+        --user "$username" "$@" 2> >(_stderr_capture "OVERLAY")); then
+        log_error "Falha ao montar o pacote de overlays."
+        return 1
+    fi
+
+    # A última linha é o caminho do pacote; as anteriores são mensagens da ferramenta
+    pack="${output##*$'\n'}"
+    if [[ "$output" == *$'\n'* ]]; then
+        _stdout_capture "OVERLAY" <<< "${output%$'\n'*}"
+    fi
+
+    if ! exec_logged "OVERLAY" tar -xpf "$pack" --numeric-owner -C "$mountpoint"; then
+        log_error "Falha ao extrair o pacote de overlays em '$mountpoint'."
+        return 1
+    fi
+
+    log_info "Overlays aplicados."
+}
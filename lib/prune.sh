@@ -0,0 +1,81 @@
+#!/usr/bin/bash
+#
+#   UNMM Prune Module
+#   - Version: 1.0.0
+#   - Description: Remoção de módulos do kernel e firmwares não usados pelo hardware alvo.
+#
+#   Sob licença MIT
+#
+
+# Caminho para o script Python prunetool.py
+PRUNETOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/prunetool.py"
+
+# Diretório dos perfis de dispositivos
+PRUNE_PROFILES_DIR="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/profiles"
+
+# prune_profile_exists <profile>
+# Retorna 0 se o perfil de dispositivos existir.
+prune_profile_exists() {
+    local profile="$1"
+    [[ -n "$profile" && "$profile" != */* && -f "$PRUNE_PROFILES_DIR/$profile" ]]
+}
+
+# prune_list_profiles
+# Imprime os nomes de todos os perfis de dispositivos disponíveis.
+prune_list_profiles() {
+    local file
+    for file in "$PRUNE_PROFILES_DIR"/*; do
+        if [[ -f "$file" ]]; then
+            basename "$file"
+        fi
+    done
+}
+
+# prune_system <mountpoint> <profile>
+# Remove os módulos do kernel e firmwares não usados pelo perfil de dispositivos,
+# grava as regras de filtro do dpkg que impedem a sua reinstalação, recalcula as
+# dependências dos módulos (depmod) e regenera o initramfs. Deve ser executada após a
+# instalação de todos os pacotes (catálogo e add-ons).
+#
+# Argumentos:
+#   mountpoint - Ponto de montagem do sistema de arquivos raiz (com o chroot preparado).
+#   profile    - Nome do perfil de dispositivos (arquivo em profiles/).
+prune_system() {
+    local mountpoint="$1"
+    local profile="$2"
+
+    if ! prune_profile_exists "$profile"; then
+        log_error "Perfil de dispositivos '$profile' não encontrado em '$PRUNE_PROFILES_DIR'."
+        return 1
+    fi
+
+    log_info "Removendo módulos e firmwares não usados pelo perfil '$profile'..."
+    local before after
+    before=$(df -B1 --output=used "$mountpoint" | tail -n 1)
+
+    if ! exec_logged "PRUNE" python3 "$PRUNETOOL_SCRIPT" "$mountpoint" "$profile" \
+        --profiles-dir "$PRUNE_PROFILES_DIR"; then
+        log_error "Falha ao remover módulos e firmwares."
+        return 1
+    fi
+
+    local moddir version
+    for moddir in "$mountpoint"/lib/modules/*; do
+        [[ -d "$moddir" ]] || continue
+        version=$(basename "$moddir")
+        log_verbose "Recalculando dependências dos módulos do kernel $version..."
+        if ! chroot_call_logged "$mountpoint" depmod -a "$version"; then
+            log_error "Falha ao executar depmod para o kernel $version."
+            return 1
+        fi
+    done
+
+    log_info "Regenerando initramfs..."
+    if ! chroot_call_logged "$mountpoint" update-initramfs -u -k all; then
+        log_error "Falha ao regenerar o initramfs."
+        return 1
+    fi
+
+    after=$(df -B1 --output=used "$mountpoint" | tail -n 1)
+    log_info "Remoção concluída: $(( (before - after) / 1024 / 1024 )) MiB liberados no sistema (incluindo o initramfs)."
+}
@@ -0,0 +1,338 @@
+#!/usr/bin/bash
+#
+#   UNMM Registry Module
+#   - Version: 1.0.0
+#   - Description: Registro de metadados de catálogos e add-ons, extraídos sem executar os scripts.
+#
+#   Sob licença MIT
+#
+
+# Diretório de cache do UNMM
+UNMM_CACHE_DIR="${UNMM_CACHE_DIR:-/var/cache/unmm}"
+
+# Diretórios onde ficam os catálogos e add-ons
+REGISTRY_CATALOG_DIR="${CATALOG_DIR:-$(dirname "${BASH_SOURCE[0]}")/../catalog}"
+REGISTRY_ADDONS_DIR="${ADDONS_DIR:-$(dirname "${BASH_SOURCE[0]}")/../addons}"
+
+# Metadados carregados, indexados por "<tipo>:<nome>:<CHAVE>" (ex: "addon:lxqt:ADDON_VERSION").
+#
+# Além dos metadados usuais (CATALOG_*/ADDON_*), um add-on pode declarar:
+#   ADDON_REQUIRES  - Add-ons (separados por espaço) que devem ser aplicados antes deste.
+#   ADDON_CONFLICTS - Add-ons (separados por espaço) que não podem ser usados junto com este.
+#   ADDON_CATALOGS  - Catálogos (separados por espaço) suportados. Se vazio, aceita qualquer um.
+#
+# Os valores devem ser literais (sem expansões), pois os scripts não são executados.
+# Listas como ADDON_REQUIRES são strings separadas por espaço, não arrays: uma atribuição
+# de array a uma delas é rejeitada, e as demais atribuições de array (ex: ADDON_ASSET_OVERLAYS)
+# não são registradas.
+declare -Ag REGISTRY_META
+if [[ -z "${REGISTRY_META+x}" ]]; then
+    REGISTRY_META=()
+fi
+
+# Chaves que guardam listas separadas por espaço (não podem ser arrays)
+_REGISTRY_LIST_KEYS=" ADDON_REQUIRES ADDON_CONFLICTS ADDON_CATALOGS "
+
+# Versão do formato do cache (caches de outras versões são descartados)
+_REGISTRY_CACHE_FORMAT=2
+
+# Arquivos lidos durante a extração atual (caminho:mtime:sha256), gravados no cache
+declare -ag _REGISTRY_DEPS=()
+
+# _registry_dir <kind>
+# Retorna o diretório dos scripts do tipo informado (catalog ou addon).
+_registry_dir() {
+    case "$1" in
+        catalog) echo "$REGISTRY_CATALOG_DIR" ;;
+        addon) echo "$REGISTRY_ADDONS_DIR" ;;
+        *) return 1 ;;
+    esac
+}
+
+# _registry_parse_file <kind> <name> <file> [depth]
+# Extrai as atribuições CATALOG_*/ADDON_* de nível superior do arquivo, sem executá-lo.
+# Um 'source' de outro script do mesmo diretório (ex: catálogos baseados em 'base') é
+# seguido antes, de modo que os valores do próprio arquivo prevaleçam.
+_registry_parse_file() {
+    local kind="$1"
+    local name="$2"
+    local file="$3"
+    local depth="${4:-0}"
+
+    if [[ "$depth" -gt 8 ]]; then
+        log_error "Cadeia de 'source' muito longa ao ler '$file'."
+        return 1
+    fi
+
+    local source_pattern='^(source|\.)[[:space:]]+.*/([A-Za-z0-9_.+-]+)"?[[:space:]]*$'
+    local assign_pattern='^((CATALOG|ADDON)_[A-Z0-9_]+)=(.*)$'
+    local double_pattern='^"([^"]*)"[[:space:]]*(#.*)?$'
+    local single_pattern="^'([^']*)'[[:space:]]*(#.*)?$"
+    local plain_pattern='^([^[:space:]#]*)'
+
+    _REGISTRY_DEPS+=("$file:$(stat -c %.9Y "$file"):$(sha256sum "$file" | awk '{print $1}')")
+
+    local line key raw value parent
+    while IFS= read -r line || [[ -n "$line" ]]; do
+        if [[ "$line" =~ $source_pattern ]]; then
+            parent="$(dirname "$file")/${BASH_REMATCH[2]}"
+            if [[ -f "$parent" && "$parent" != "$file" ]]; then
+                _registry_parse_file "$kind" "$name" "$parent" $((depth + 1)) || return 1
+            fi
+        elif [[ "$line" =~ $assign_pattern ]]; then
+            key="${BASH_REMATCH[1]}"
+            raw="${BASH_REMATCH[3]}"
+            if [[ "$raw" == "("* ]]; then
+                if [[ "$_REGISTRY_LIST_KEYS" == *" $key "* ]]; then
+                    log_error "$key em '$file' deve ser uma string separada por espaços (ex: $key=\"a b\"), não um array."
+                    return 1
+                fi
+                continue
+            fi
+            if [[ "$raw" =~ $double_pattern || "$raw" =~ $single_pattern || "$raw" =~ $plain_pattern ]]; then
+                value="${BASH_REMATCH[1]}"
+            else
+                value=""
+            fi
+            REGISTRY_META["$kind:$name:$key"]="$value"
+        fi
+    done < "$file"
+}
+
+# _registry_cache_file <kind> <name>
+# Retorna o caminho do arquivo de cache do script.
+_registry_cache_file() {
+    echo "$UNMM_CACHE_DIR/registry/$1-$2"
+}
+
+# _registry_load_cache <kind> <name>
+# Carrega os metadados do cache se todos os arquivos lidos na extração estiverem inalterados.
+# Um arquivo com mtime diferente mas mesmo sha256 ainda é válido (o cache é regravado).
+_registry_load_cache() {
+    local kind="$1"
+    local name="$2"
+    local cache_file
+    cache_file=$(_registry_cache_file "$kind" "$name")
+    [[ -r "$cache_file" ]] || return 1
+
+    local line path mtime current hash touched=false format=""
+    local -a deps=() entries=() current_deps=()
+    while IFS= read -r line; do
+        if [[ "$line" == "#format "* ]]; then
+            format="${line#\#format }"
+        elif [[ "$line" == "#dep "* ]]; then
+            deps+=("${line#\#dep }")
+        else
+            entries+=("$line")
+        fi
+    done < "$cache_file"
+    [[ "$format" == "$_REGISTRY_CACHE_FORMAT" && ${#deps[@]} -gt 0 ]] || return 1
+
+    local dep
+    for dep in "${deps[@]}"; do
+        hash="${dep##*:}"
+        mtime="${dep%:*}"
+        path="${mtime%:*}"
+        mtime="${mtime##*:}"
+        [[ -f "$path" ]] || return 1
+        current=$(stat -c %.9Y "$path")
+        if [[ "$current" != "$mtime" ]]; then
+            [[ "$(sha256sum "$path" | awk '{print $1}')" == "$hash" ]] || return 1
+            touched=true
+        fi
+        current_deps+=("$path:$current:$hash")
+    done
+
+    local entry
+    for entry in "${entries[@]}"; do
+        REGISTRY_META["$kind:$name:${entry%%$'\t'*}"]="${entry#*$'\t'}"
+    done
+
+    _REGISTRY_DEPS=("${current_deps[@]}")
+    if [[ "$touched" == true ]]; then
+        log_verbose "Metadados de '$kind:$name' inalterados (mesmo sha256); atualizando cache."
+        return 2
+    fi
+    return 0
+}
+
+# _registry_save_cache <kind> <name>
+# Grava os metadados extraídos no cache. Falhas de escrita são ignoradas.
+_registry_save_cache() {
+    local kind="$1"
+    local name="$2"
+    local cache_file
+    cache_file=$(_registry_cache_file "$kind" "$name")
+
+    mkdir -p "$(dirname "$cache_file")" 2>/dev/null || return 0
+    {
+        local dep key
+        echo "#format $_REGISTRY_CACHE_FORMAT"
+        for dep in "${_REGISTRY_DEPS[@]}"; do
+            echo "#dep $dep"
+        done
+        for key in "${!REGISTRY_META[@]}"; do
+            if [[ "$key" == "$kind:$name:"* ]]; then
+                printf '%s\t%s\n' "${key#"$kind:$name:"}" "${REGISTRY_META[$key]}"
+            fi
+        done
+    } > "$cache_file.tmp" 2>/dev/null && mv -f "$cache_file.tmp" "$cache_file" 2>/dev/null || true
+}
+
+# registry_load <kind> <name>
+# Carrega os metadados de um catálogo ou add-on (do cache, se válido).
+#
+# Argumentos:
+#   kind - Tipo do script: catalog ou addon.
+#   name - Nome do arquivo do script.
+#
+# Retorna 1 se o script não existir e 2 se os metadados forem inválidos.
+registry_load() {
+    local kind="$1"
+    local name="$2"
+    local dir
+    dir=$(_registry_dir "$kind") || return 1
+
+    if [[ -n "${REGISTRY_META[$kind:$name:loaded]+x}" ]]; then
+        return 0
+    fi
+    if [[ -z "$name" || "$name" == */* || ! -f "$dir/$name" ]]; then
+        return 1
+    fi
+
+    local status=0
+    _REGISTRY_DEPS=()
+    _registry_load_cache "$kind" "$name" || status=$?
+    if [[ $status -eq 1 ]]; then
+        log_verbose "Extraindo metadados de '$dir/$name'..."
+        _REGISTRY_DEPS=()
+        _registry_parse_file "$kind" "$name" "$dir/$name" || return 2
+    fi
+    if [[ $status -ne 0 ]]; then
+        _registry_save_cache "$kind" "$name"
+    fi
+
+    # Digest do conteúdo do script e dos scripts incluídos por ele (ver registry_digest)
+    local dep
+    REGISTRY_META["$kind:$name:digest"]=$(
+        for dep in "${_REGISTRY_DEPS[@]}"; do
+            echo "${dep##*:}"
+        done | sha256sum | awk '{print $1}'
+    )
+    REGISTRY_META["$kind:$name:loaded"]=true
+}
+
+# registry_digest <kind> <name>
+# Imprime o sha256 do conteúdo do script e dos scripts incluídos por ele via 'source'.
+registry_digest() {
+    registry_load "$1" "$2" || return 1
+    echo "${REGISTRY_META[$1:$2:digest]}"
+}
+
+# registry_get <kind> <name> <key>
+# Imprime o valor de um metadado (vazio se não declarado).
+registry_get() {
+    registry_load "$1" "$2" || return 1
+    echo "${REGISTRY_META[$1:$2:$3]:-}"
+}
+
+# registry_list <kind>
+# Imprime os nomes de todos os scripts do tipo informado.
+registry_list() {
+    local dir file
+    dir=$(_registry_dir "$1") || return 1
+    for file in "$dir"/*; do
+        if [[ -f "$file" ]]; then
+            basename "$file"
+        fi
+    done
+}
+
+# registry_validate <catalog> [addons...]
+# Valida o catálogo e os add-ons pedidos antes de qualquer operação custosa: existência,
+# metadados obrigatórios, duplicatas, requisitos (aplicados antes), conflitos e catálogos
+# suportados. Todos os problemas são reportados de uma vez.
+#
+# Argumentos:
+#   catalog - Nome do catálogo.
+#   addons  - Nomes dos add-ons, na ordem de aplicação.
+#
+# Retorna 1 se houver algum problema.
+registry_validate() {
+    local catalog="$1"
+    shift
+    local -a addons=("$@")
+    local -a errors=()
+    local key
+
+    if ! registry_load catalog "$catalog"; then
+        errors+=("Catálogo '$catalog' não encontrado em '$REGISTRY_CATALOG_DIR'.")
+    else
+        for key in CATALOG_NAME CATALOG_VERSION CATALOG_PREFFERED_SIZE; do
+            if [[ -z "${REGISTRY_META[catalog:$catalog:$key]:-}" ]]; then
+                errors+=("Catálogo '$catalog' não declara $key.")
+            fi
+        done
+    fi
+
+    local -A position=()
+    local i addon status
+    for i in "${!addons[@]}"; do
+        addon="${addons[$i]}"
+        if [[ -n "${position[$addon]+x}" ]]; then
+            errors+=("Add-on '$addon' especificado mais de uma vez.")
+            continue
+        fi
+        position["$addon"]=$i
+
+        status=0
+        registry_load addon "$addon" || status=$?
+        if [[ $status -eq 2 ]]; then
+            errors+=("Add-on '$addon' declara metadados inválidos.")
+            continue
+        elif [[ $status -ne 0 ]]; then
+            errors+=("Add-on '$addon' não encontrado em '$REGISTRY_ADDONS_DIR'.")
+            continue
+        fi
+        if [[ -z "${REGISTRY_META[addon:$addon:ADDON_NAME]:-}" ]]; then
+            errors+=("Add-on '$addon' não declara ADDON_NAME.")
+        fi
+    done
+
+    local other catalogs
+    for i in "${!addons[@]}"; do
+        addon="${addons[$i]}"
+        [[ "${position[$addon]}" -eq $i ]] || continue
+        [[ -n "${REGISTRY_META[addon:$addon:loaded]+x}" ]] || continue
+
+        for other in ${REGISTRY_META[addon:$addon:ADDON_REQUIRES]:-}; do
+            if [[ -z "${position[$other]+x}" ]]; then
+                errors+=("Add-on '$addon' requer o add-on '$other'.")
+            elif [[ "${position[$other]}" -gt "${position[$addon]}" ]]; then
+                errors+=("Add-on '$other' deve ser aplicado antes de '$addon'.")
+            fi
+        done
+
+        for other in ${REGISTRY_META[addon:$addon:ADDON_CONFLICTS]:-}; do
+            if [[ -n "${position[$other]+x}" ]]; then
+                errors+=("Add-on '$addon' conflita com o add-on '$other'.")
+            fi
+        done
+
+        catalogs="${REGISTRY_META[addon:$addon:ADDON_CATALOGS]:-}"
+        if [[ -n "$catalogs" && " $catalogs " != *" $catalog "* ]]; then
+            errors+=("Add-on '$addon' não suporta o catálogo '$catalog' (suportados: $catalogs).")
+        fi
+    done
+
+    if [[ ${#errors[@]} -gt 0 ]]; then
+        local error
+        for error in "${errors[@]}"; do
+            log_error "$error"
+        done
+        return 1
+    fi
+
+    log_verbose "Catálogo '$catalog' e add-ons (${addons[*]}) validados."
+    return 0
+}
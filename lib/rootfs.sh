@@ -0,0 +1,45 @@
+#!/usr/bin/bash
+#
+#   UNMM Rootfs Module
+#   - Version: 1.0.0
+#   - Description: Módulo de análise e otimização do sistema de arquivos raiz.
+#
+#   Sob licença MIT
+#
+
+# Caminho para o script Python rootfstool.py
+ROOTFSTOOL_SCRIPT="${SCRIPT_DIR:-$(dirname "${BASH_SOURCE[0]}")/..}/assets/rootfstool.py"
+
+# rootfs_analyze <mountpoint> <dedup> [dedup_paths...]
+# Analisa o rootfs montado, reportando os maiores diretórios e pacotes e os arquivos duplicados.
+# Se dedup for true, substitui arquivos idênticos por hardlinks dentro dos caminhos permitidos.
+#
+# Argumentos:
+#   mountpoint  - Ponto de montagem do sistema de arquivos raiz.
+#   dedup       - Se true, aplica a deduplicação por hardlinks.
+#   dedup_paths - Caminhos (relativos à raiz) onde a deduplicação é permitida. Se vazio, usa o padrão da ferramenta.
+rootfs_analyze() {
+    local mountpoint="$1"
+    local dedup="$2"
+    shift 2
+
+    log_info "Analisando o sistema de arquivos raiz em '$mountpoint'..."
+
+    local rootfstool_cmd=(python3 "$ROOTFSTOOL_SCRIPT" "$mountpoint")
+    if [[ "$dedup" == true ]]; then
+        log_verbose "Deduplicação por hardlinks habilitada."
+        rootfstool_cmd+=(--dedup)
+    fi
+
+    for dedup_path in "$@"; do
+        log_verbose "Caminho permitido para deduplicação: $dedup_path"
+        rootfstool_cmd+=(--dedup-path "$dedup_path")
+    done
+
+    if ! exec_logged "ROOTFS" "${rootfstool_cmd[@]}"; then
+        log_error "Falha ao analisar o sistema de arquivos raiz."
+        return 1
+    fi
+
+    log_info "Análise do sistema de arquivos raiz concluída."
+}
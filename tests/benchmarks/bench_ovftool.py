@@ -0,0 +1,238 @@
+"""
+    bench_ovftool.py
+    ==============
+    Benchmarks do pacote ovftool: construção e serialização do envelope, conversão de
+    strings de dados, inicialização do ovftool.py e pico de memória.
+
+    Os tempos são divididos pelo tempo de uma carga de calibração (construção e serialização
+    de um documento com xml.dom.minidom, sem o ovftool) medida no mesmo processo, de modo
+    que a linha de base não dependa da velocidade da máquina. Os resultados são gravados em
+    JSON e, se houver uma linha de base, comparados com ela; o script termina com código 1
+    se alguma medida piorar além do limite configurado.
+
+    Exemplos:
+      python3 tests/benchmarks/bench_ovftool.py
+      python3 tests/benchmarks/bench_ovftool.py --threshold 1.5 --output /tmp/bench.json
+      python3 tests/benchmarks/bench_ovftool.py --update-baseline
+"""
+
+import argparse as ap
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from xml.dom import minidom as md
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCH_DIR)), "assets")
+sys.path.insert(0, ASSETS_DIR)
+
+# pylint: disable=wrong-import-position
+from ovftool import constants, data, factory, package
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+
+# Limite padrão de piora em relação à linha de base (1.25 = 25% mais lento)
+DEFAULT_THRESHOLD = 1.25
+
+ENVELOPE_SIZES = (1, 100, 10_000)
+PARSE_COUNT = 10_000
+CALIBRATION_ELEMENTS = 5_000
+
+# Versão do formato dos resultados (linhas de base de outras versões são ignoradas)
+RESULTS_FORMAT = 2
+
+
+def build_envelope(items: int) -> bytes:
+    """
+        Monta e serializa um envelope com a quantidade informada de arquivos, discos,
+        redes e Items de hardware.
+    """
+
+    ovf, env = factory.envelope()
+    refs = factory.references(ovf, env)
+    ds = factory.disk_section(ovf, env)
+    ns = factory.network_section(ovf, env)
+    vs = factory.virtual_system(ovf, env, vs_id="bench", name="bench")
+    factory.operating_system_section(ovf, vs, os_id=94, description="Ubuntu Linux (64-bit)")
+    vhs = factory.virtual_hardware_section(ovf, vs)
+    vhs.appendChild(data.VSSD(instance_id="0", virtual_system_type="vmx-14").to_xml(ovf))
+
+    for i in range(items):
+        refs.appendChild(data.File(id=f"file{i}", href=f"disk{i}.vmdk", size=i).to_xml(ovf))
+        ds.appendChild(data.Disk(disk_id=f"disk{i}", capacity="8", file_ref=f"file{i}").to_xml(ovf))
+        ns.appendChild(data.Network(name=f"net{i}", description="bench").to_xml(ovf))
+        vhs.appendChild(data.RASD(
+            instance_id=str(i + 1),
+            resource_type=constants.RESOURCE_TYPE["DISK_DRIVE"],
+            element_name=f"Disk {i}",
+            host_resource=f"ovf:/disk/disk{i}",
+            parent="0",
+            address_on_parent=str(i)
+        ).to_xml(ovf))
+
+    return package.serialize(ovf)
+
+
+def parse_strings(count: int):
+    """
+        Converte strings de dados em instâncias de File, Disk e RASD.
+    """
+
+    for i in range(count):
+        data.parse_data(f"id=file{i},href=disk{i}.vmdk,size={i}", data.File)
+        data.parse_data(f"disk_id=disk{i},capacity=8,file_ref=file{i},format=vmdk", data.Disk)
+        data.parse_data(f"instance_id={i},resource_type=17,element_name=Disk {i}", data.RASD)
+
+
+def calibration_workload():
+    """
+        Carga de referência independente do ovftool: monta e serializa um documento com
+        CALIBRATION_ELEMENTS elementos usando apenas a biblioteca padrão.
+    """
+
+    doc = md.Document()
+    root = doc.createElement("root")
+    doc.appendChild(root)
+    for i in range(CALIBRATION_ELEMENTS):
+        elem = doc.createElement("item")
+        elem.setAttribute("id", f"item{i}")
+        elem.appendChild(doc.createTextNode(f"value {i}"))
+        root.appendChild(elem)
+    doc.toprettyxml(indent="  ", encoding="UTF-8")
+
+
+def measure(func, repeat: int) -> float:
+    """
+        Retorna a mediana dos tempos de execução (em segundos).
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run_benchmarks(repeat: int) -> tuple[float, dict]:
+    """
+        Executa todos os benchmarks. Retorna o tempo da calibração (em segundos) e os
+        resultados: tempos relativos à calibração e memória em bytes.
+    """
+
+    calibration = measure(calibration_workload, repeat)
+    results = {}
+
+    for items in ENVELOPE_SIZES:
+        runs = repeat if items < 10_000 else max(1, repeat // 2)
+        results[f"envelope_{items}"] = measure(lambda n=items: build_envelope(n), runs)
+
+    results["parse_data"] = measure(lambda: parse_strings(PARSE_COUNT), repeat)
+
+    ovftool = os.path.join(ASSETS_DIR, "ovftool.py")
+    results["startup"] = measure(
+        lambda: subprocess.run([sys.executable, ovftool, "--help"], check=True, capture_output=True),
+        repeat
+    )
+
+    # A calibração é medida de novo ao final e a menor das duas é usada, reduzindo o efeito
+    # de variações de carga da máquina durante a execução
+    calibration = min(calibration, measure(calibration_workload, repeat))
+    results = {name: value / calibration for name, value in results.items()}
+
+    tracemalloc.start()
+    build_envelope(ENVELOPE_SIZES[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["peak_memory"] = peak
+
+    return calibration, results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+        Retorna as medidas que pioraram além do limite em relação à linha de base.
+    """
+
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * threshold:
+            regressions.append(f"{name}: {value:.6g} (linha de base: {reference:.6g}, "
+                               f"{value / reference:.2f}x)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(description="Benchmarks do pacote ovftool.")
+    parser.add_argument("--output",
+                        default=DEFAULT_OUTPUT,
+                        help="Arquivo JSON com os resultados (padrão: tests/benchmarks/results.json)")
+    parser.add_argument("--baseline",
+                        default=DEFAULT_BASELINE,
+                        help="Arquivo JSON com a linha de base (padrão: tests/benchmarks/baseline.json)")
+    parser.add_argument("--threshold",
+                        type=float,
+                        default=float(os.environ.get("UNMM_BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+                        help="Piora máxima tolerada em relação à linha de base "
+                             f"(padrão: {DEFAULT_THRESHOLD} ou UNMM_BENCH_THRESHOLD)")
+    parser.add_argument("--repeat",
+                        type=int,
+                        default=5,
+                        help="Número de repetições de cada medida (padrão: 5)")
+    parser.add_argument("--update-baseline",
+                        action="store_true",
+                        help="Grava os resultados como nova linha de base")
+    args = parser.parse_args()
+
+    calibration_time, measured = run_benchmarks(args.repeat)
+    report = {
+        "format": RESULTS_FORMAT,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_seconds": calibration_time,
+        "results": measured,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"{'calibration':16} {calibration_time:.6g} s")
+    for bench, value in measured.items():
+        unit = "bytes" if bench == "peak_memory" else "x calibração"
+        print(f"{bench:16} {value:.6g} {unit}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Linha de base atualizada: {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"Linha de base não encontrada: {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        reference = json.load(f)
+    if reference.get("format") != RESULTS_FORMAT:
+        print(f"Linha de base em formato antigo: {args.baseline} (use --update-baseline)")
+        sys.exit(0)
+    reference_results = reference["results"]
+
+    failures = compare(measured, reference_results, args.threshold)
+    if failures:
+        print(f"Regressões acima de {args.threshold}x:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Nenhuma regressão acima de {args.threshold}x.")
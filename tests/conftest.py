@@ -0,0 +1,11 @@
+"""
+    Configuração dos testes do UNMM.
+    Os módulos Python ficam em assets/ e são importados a partir de lá.
+"""
+
+import os
+import sys
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+if ASSETS_DIR not in sys.path:
+    sys.path.insert(0, ASSETS_DIR)
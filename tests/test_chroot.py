@@ -0,0 +1,70 @@
+"""
+    Testes das ações de limpeza executadas sobre o sistema montado (lib/chroot.sh).
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import ASSETS_DIR
+
+LIB_DIR = os.path.join(os.path.dirname(ASSETS_DIR), "lib")
+
+UNSAFE_PATTERNS = ["", "/", "//", "/.", "/./", "/*", "/var/../", "var/cache/*"]
+
+
+@pytest.fixture
+def rootfs(tmp_path):
+    if not shutil.which("bash"):
+        pytest.skip("bash não disponível")
+
+    root = tmp_path / "root"
+    (root / "etc").mkdir(parents=True)
+    (root / "etc" / "hostname").write_text("unmm\n")
+    cache = root / "var" / "cache" / "foo"
+    cache.mkdir(parents=True)
+    (cache / "a.deb").write_text("a")
+    (cache / "b c.deb").write_text("b")
+    return root
+
+
+def run_chroot(tmp_path, commands: str):
+    script = f"""
+        set -euo pipefail
+        source '{LIB_DIR}/logging.sh'
+        LOGFILE='{tmp_path}/unmm.log'
+        source '{LIB_DIR}/common.sh'
+        source '{LIB_DIR}/chroot.sh'
+        {commands}
+    """
+    return subprocess.run(["bash", "-c", script], capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("pattern", UNSAFE_PATTERNS)
+def test_register_rejects_unsafe_remove(tmp_path, pattern):
+    result = run_chroot(tmp_path, f"chroot_cleanup_register remove '{pattern}'")
+
+    assert result.returncode != 0
+    assert "inválido" in result.stderr
+
+
+@pytest.mark.parametrize("pattern", UNSAFE_PATTERNS)
+def test_run_skips_unsafe_remove(tmp_path, rootfs, pattern):
+    result = run_chroot(tmp_path, f"chroot_run_cleanup_actions '{rootfs}' 'remove:{pattern}'")
+
+    assert result.returncode == 0, result.stderr
+    assert (rootfs / "etc" / "hostname").exists()
+    assert (rootfs / "var" / "cache" / "foo" / "a.deb").exists()
+
+
+def test_run_removes_matching_files(tmp_path, rootfs):
+    result = run_chroot(tmp_path, f"""
+        chroot_cleanup_register remove '/var/cache/foo/*.deb'
+        chroot_run_cleanup_actions '{rootfs}' "${{CHROOT_CLEANUP_ACTIONS[-1]}}"
+    """)
+
+    assert result.returncode == 0, result.stderr
+    assert os.listdir(rootfs / "var" / "cache" / "foo") == []
+    assert (rootfs / "etc" / "hostname").exists()
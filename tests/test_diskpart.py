@@ -0,0 +1,90 @@
+"""
+    Testes da regravação da tabela GPT após a redução da imagem (lib/diskpart.sh).
+
+    O sfdisk é substituído por um stub que, como o libfdisk ao criar um novo rótulo,
+    zera o setor 0 e grava apenas o MBR protetor.
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from conftest import ASSETS_DIR
+
+LIB_DIR = os.path.join(os.path.dirname(ASSETS_DIR), "lib")
+
+SFDISK_STUB = """#!/usr/bin/env python3
+import os, struct, sys
+
+image = sys.argv[-1]
+if "--dump" in sys.argv:
+    print("label: gpt")
+    print("last-lba: 999999")
+    print(f"{image}1 : start=2048, size=4096, type=0FC63DAF-8483-4772-8E79-3D69D8477DE4")
+    sys.exit(0)
+
+with open(os.environ["SFDISK_STDIN"], "w") as f:
+    f.write(sys.stdin.read())
+
+sectors = min(os.path.getsize(image) // 512 - 1, 0xFFFFFFFF)
+entry = struct.pack("<B3sB3sII", 0, b"\\x00\\x02\\x00", 0xEE, b"\\xff\\xff\\xff", 1, sectors)
+with open(image, "r+b") as f:
+    f.write(bytes(446) + entry + bytes(48) + b"\\x55\\xaa")
+sys.exit(1 if os.environ.get("SFDISK_FAIL") else 0)
+"""
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    if not shutil.which("bash"):
+        pytest.skip("bash não disponível")
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "sfdisk"
+    stub.write_text(SFDISK_STUB)
+    stub.chmod(0o755)
+
+    image = tmp_path / "disk.img"
+    boot_code = os.urandom(440)
+    with open(image, "wb") as f:
+        f.write(boot_code + bytes(72))
+        f.truncate(8 * 1024 * 1024)
+    return tmp_path, image, boot_code
+
+
+def rewrite_gpt(tmp_path, image, **env):
+    script = f"""
+        set -euo pipefail
+        source '{LIB_DIR}/logging.sh'
+        LOGFILE='{tmp_path}/unmm.log'
+        source '{LIB_DIR}/diskpart.sh'
+        _diskpart_rewrite_gpt '{image}'
+    """
+    environment = dict(os.environ, PATH=f"{tmp_path}/bin:{os.environ['PATH']}",
+                       SFDISK_STDIN=str(tmp_path / "stdin"), **env)
+    return subprocess.run(["bash", "-c", script], env=environment, capture_output=True, text=True)
+
+
+def test_rewrite_keeps_boot_code(scratch):
+    tmp_path, image, boot_code = scratch
+
+    result = rewrite_gpt(tmp_path, image)
+
+    assert result.returncode == 0, result.stderr
+    data = image.read_bytes()
+    assert data[:440] == boot_code
+    assert struct.unpack_from("<I", data, 446 + 12)[0] == 8 * 1024 * 1024 // 512 - 1
+    assert "last-lba" not in (tmp_path / "stdin").read_text()
+
+
+def test_rewrite_restores_boot_code_on_failure(scratch):
+    tmp_path, image, boot_code = scratch
+
+    result = rewrite_gpt(tmp_path, image, SFDISK_FAIL="1")
+
+    assert result.returncode != 0
+    assert image.read_bytes()[:440] == boot_code
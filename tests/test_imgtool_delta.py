@@ -0,0 +1,150 @@
+"""
+    Testes dos deltas em nível de bloco entre imagens RAW (assets/imgtool/delta.py).
+"""
+
+import os
+import struct
+
+import pytest
+
+from imgtool import delta
+
+BLOCK_SIZE = 4096
+
+
+def write_image(path, size: int, blocks: dict = None):
+    """
+        Cria uma imagem esparsa com os blocos informados (índice -> conteúdo).
+    """
+
+    with open(path, "wb") as f:
+        f.truncate(size)
+        for index, data in (blocks or {}).items():
+            f.seek(index * BLOCK_SIZE)
+            f.write(data)
+
+
+def make_pair(tmp_path, target_size: int = 64 * BLOCK_SIZE):
+    source = tmp_path / "old.img"
+    target = tmp_path / "new.img"
+    common = os.urandom(BLOCK_SIZE)
+    write_image(source, 48 * BLOCK_SIZE, {0: common, 5: os.urandom(BLOCK_SIZE),
+                                          9: os.urandom(BLOCK_SIZE), 40: os.urandom(BLOCK_SIZE)})
+    write_image(target, target_size, {0: common, 5: os.urandom(BLOCK_SIZE),
+                                      9: bytes(BLOCK_SIZE), 50: os.urandom(100)})
+    return source, target
+
+
+@pytest.mark.parametrize("target_size", [64 * BLOCK_SIZE, 16 * BLOCK_SIZE + 1000])
+def test_create_and_apply_round_trip(tmp_path, target_size):
+    source, target = make_pair(tmp_path, target_size)
+    output = tmp_path / "new.img.delta"
+
+    header = delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+    changed = delta.apply(str(output), str(source))[1]
+
+    assert changed
+    assert source.read_bytes() == target.read_bytes()
+    assert header.target_digest == delta.image_digest(str(target), BLOCK_SIZE)
+    assert not os.path.exists(str(source) + delta.PROGRESS_SUFFIX)
+
+    assert delta.apply(str(output), str(source))[1] is False
+
+
+def test_apply_rejects_other_source(tmp_path):
+    source, target = make_pair(tmp_path)
+    output = tmp_path / "new.img.delta"
+    delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+
+    other = tmp_path / "other.img"
+    write_image(other, 48 * BLOCK_SIZE, {3: os.urandom(BLOCK_SIZE)})
+    before = other.read_bytes()
+
+    with pytest.raises(ValueError, match="origem"):
+        delta.apply(str(output), str(other))
+    assert other.read_bytes() == before
+
+
+def test_truncated_delta_fails(tmp_path):
+    source, target = make_pair(tmp_path)
+    output = tmp_path / "new.img.delta"
+    delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+
+    data = output.read_bytes()
+    output.write_bytes(data[:-10])
+    with pytest.raises(ValueError, match="truncado"):
+        delta.apply(str(output), str(source))
+
+    output.write_bytes(data[:delta.HEADER_SIZE - 1])
+    with pytest.raises(ValueError, match="truncado"):
+        delta.read_header(str(output))
+
+
+@pytest.mark.parametrize("block_size", [0, 1000])
+def test_invalid_block_size_in_header(tmp_path, block_size):
+    header = delta.DeltaHeader(block_size, 0, 0, 0, bytes(32), bytes(32))
+    path = tmp_path / "bad.delta"
+    path.write_bytes(header.pack())
+
+    with pytest.raises(ValueError, match="bloco"):
+        delta.read_header(str(path))
+
+
+def test_interrupted_apply_resumes(tmp_path, monkeypatch):
+    source, target = make_pair(tmp_path)
+    output = tmp_path / "new.img.delta"
+    header = delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+    assert header.block_count > 2
+    monkeypatch.setattr(delta, "PROGRESS_INTERVAL", 1)
+
+    # Interrompe a aplicação após gravar alguns blocos
+    writes = []
+    real_pwrite = os.pwrite
+
+    def failing_pwrite(fd, data, offset):
+        if len(writes) == 2:
+            raise OSError("interrompido")
+        writes.append(offset)
+        return real_pwrite(fd, data, offset)
+
+    monkeypatch.setattr(delta.os, "pwrite", failing_pwrite)
+    with pytest.raises(OSError):
+        delta.apply(str(output), str(source))
+    monkeypatch.setattr(delta.os, "pwrite", real_pwrite)
+
+    progress = (tmp_path / ("old.img" + delta.PROGRESS_SUFFIX)).read_text().split()
+    assert int(progress[1]) > 0
+    assert delta.image_digest(str(source), BLOCK_SIZE) not in (header.source_digest,
+                                                                header.target_digest)
+
+    assert delta.apply(str(output), str(source))[1]
+    assert source.read_bytes() == target.read_bytes()
+    assert not os.path.exists(str(source) + delta.PROGRESS_SUFFIX)
+
+
+def test_progress_of_other_delta_is_rejected(tmp_path):
+    source, target = make_pair(tmp_path)
+    output = tmp_path / "new.img.delta"
+    delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+    (tmp_path / ("old.img" + delta.PROGRESS_SUFFIX)).write_text(f"{'0' * 64}-{'0' * 64} 1 {delta.HEADER_SIZE}\n")
+
+    with pytest.raises(ValueError, match="outro delta"):
+        delta.apply(str(output), str(source))
+
+
+def test_record_layout(tmp_path):
+    source, target = make_pair(tmp_path)
+    output = tmp_path / "new.img.delta"
+    header = delta.create(str(source), str(target), str(output), block_size=BLOCK_SIZE)
+
+    indexes = []
+    with open(output, "rb") as f:
+        f.seek(delta.HEADER_SIZE)
+        for _ in range(header.block_count):
+            index, flags, length = struct.unpack(delta.RECORD_FORMAT, f.read(delta.RECORD_SIZE))
+            f.seek(length, os.SEEK_CUR)
+            indexes.append((index, flags))
+        assert f.read() == b""
+
+    assert (9, delta.FLAG_ZERO) in indexes
+    assert 0 not in [index for index, _ in indexes]
@@ -0,0 +1,151 @@
+"""
+    Testes da exportação de uma imagem RAW para vários formatos (assets/imgtool/export.py).
+
+    A saída QCOW2 é lida de volta por um leitor mínimo do formato (cabeçalho, tabelas
+    L1/L2 e refcounts) e, se o qemu-img estiver instalado, também verificada por ele.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from imgtool import export
+
+CLUSTER_SIZE = export.Qcow2Writer.CLUSTER_SIZE
+MIB = 1024 * 1024
+
+
+def write_image(path, size: int, extents: dict):
+    """
+        Cria uma imagem esparsa com os trechos informados (offset -> conteúdo).
+    """
+
+    with open(path, "wb") as f:
+        f.truncate(size)
+        for offset, data in extents.items():
+            f.seek(offset)
+            f.write(data)
+
+
+def read_qcow2(path) -> tuple[int, dict[int, bytes], dict[int, int]]:
+    """
+        Lê uma imagem QCOW2 v2 sem compressão. Retorna o tamanho virtual, os clusters
+        alocados (índice do cluster virtual -> conteúdo) e os refcounts de cada cluster
+        do arquivo.
+    """
+
+    data = open(path, "rb").read()
+    (magic, version, _, _, cluster_bits, size, crypt, l1_size, l1_offset,
+     rt_offset, rt_clusters, snapshots, _) = struct.unpack_from(export.Qcow2Writer.HEADER_FORMAT, data)
+    assert (magic, version, crypt, snapshots) == (b"QFI\xfb", 2, 0, 0)
+    cluster_size = 1 << cluster_bits
+    l2_entries = cluster_size // 8
+    offset_mask = (1 << 62) - 1
+
+    clusters = {}
+    for l1_index, l1_entry in enumerate(struct.unpack_from(f">{l1_size}Q", data, l1_offset)):
+        l2_offset = l1_entry & offset_mask
+        if not l2_offset:
+            continue
+        for l2_index, l2_entry in enumerate(struct.unpack_from(f">{l2_entries}Q", data, l2_offset)):
+            host = l2_entry & offset_mask
+            if host:
+                clusters[l1_index * l2_entries + l2_index] = data[host:host + cluster_size]
+
+    refcounts = {}
+    table = struct.unpack_from(f">{rt_clusters * cluster_size // 8}Q", data, rt_offset)
+    for block_index, block_offset in enumerate(table):
+        if not block_offset:
+            continue
+        counts = struct.unpack_from(f">{cluster_size // 2}H", data, block_offset)
+        for i, count in enumerate(counts):
+            if count:
+                refcounts[block_index * (cluster_size // 2) + i] = count
+
+    return size, clusters, refcounts
+
+
+def virtual_content(size: int, clusters: dict[int, bytes]) -> bytes:
+    content = bytearray(size)
+    for index, cluster in clusters.items():
+        start = index * CLUSTER_SIZE
+        content[start:start + CLUSTER_SIZE] = cluster[:max(0, size - start)]
+    return bytes(content)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "disk.img"
+    write_image(path, 3 * MIB + 1000, {
+        0: os.urandom(512),
+        CLUSTER_SIZE + 100: os.urandom(3 * CLUSTER_SIZE),
+        2 * MIB: bytes(CLUSTER_SIZE),
+        3 * MIB: os.urandom(1000),
+    })
+    return path
+
+
+def test_fan_out_writes_every_format(tmp_path, image):
+    raw = image.read_bytes()
+    writers = [
+        export.RawWriter(str(tmp_path / "out.img")),
+        export.GzipWriter(str(tmp_path / "out.img.gz")),
+        export.Qcow2Writer(str(tmp_path / "out.qcow2")),
+        export.DigestWriter("sha256"),
+    ]
+
+    size = export.fan_out(str(image), writers, chunk_size=2 * CLUSTER_SIZE)
+
+    assert size == len(raw)
+    assert (tmp_path / "out.img").read_bytes() == raw
+    assert gzip.decompress((tmp_path / "out.img.gz").read_bytes()) == raw
+    assert writers[3].hexdigest == hashlib.sha256(raw).hexdigest()
+
+    qcow2_size, clusters, _ = read_qcow2(tmp_path / "out.qcow2")
+    assert qcow2_size == len(raw)
+    assert virtual_content(qcow2_size, clusters) == raw
+
+
+def test_qcow2_skips_zero_clusters_and_counts_every_cluster(tmp_path, image):
+    output = tmp_path / "out.qcow2"
+    export.fan_out(str(image), [export.Qcow2Writer(str(output))])
+
+    _, clusters, refcounts = read_qcow2(output)
+    # Clusters 0, 1-4 (dados em 64K+100 .. 4*64K+100) e o de 3 MiB; o de zeros não é alocado
+    assert sorted(clusters) == [0, 1, 2, 3, 4, 3 * MIB // CLUSTER_SIZE]
+
+    file_clusters = os.path.getsize(output) // CLUSTER_SIZE
+    assert os.path.getsize(output) % CLUSTER_SIZE == 0
+    assert refcounts == {index: 1 for index in range(file_clusters)}
+
+
+def test_qcow2_with_several_l2_tables(tmp_path):
+    # Cada tabela L2 cobre 512 MiB: dados antes e depois do limite usam duas tabelas
+    path = tmp_path / "large.img"
+    extents = {0: os.urandom(4096), 600 * MIB: os.urandom(4096), 1100 * MIB: os.urandom(4096)}
+    write_image(path, 1200 * MIB, extents)
+    output = tmp_path / "large.qcow2"
+
+    export.fan_out(str(path), [export.Qcow2Writer(str(output))])
+
+    size, clusters, refcounts = read_qcow2(output)
+    assert size == 1200 * MIB
+    for offset, data in extents.items():
+        assert clusters[offset // CLUSTER_SIZE][:len(data)] == data
+    assert len(clusters) == len(extents)
+    assert set(refcounts.values()) == {1}
+
+
+@pytest.mark.skipif(not shutil.which("qemu-img"), reason="qemu-img não disponível")
+def test_qemu_img_accepts_qcow2(tmp_path, image):
+    output = tmp_path / "out.qcow2"
+    export.fan_out(str(image), [export.Qcow2Writer(str(output))])
+
+    subprocess.run(["qemu-img", "check", "-f", "qcow2", str(output)], check=True, capture_output=True)
+    subprocess.run(["qemu-img", "compare", "-f", "raw", "-F", "qcow2", str(image), str(output)],
+                   check=True, capture_output=True)
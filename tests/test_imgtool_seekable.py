@@ -0,0 +1,84 @@
+"""
+    Testes das imagens RAW comprimidas no formato zstd seekable (assets/imgtool/seekable.py).
+"""
+
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from imgtool import export, seekable
+
+zstandard = pytest.importorskip("zstandard")
+
+FRAME_SIZE = 64 * 1024
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "disk.img"
+    with open(path, "wb") as f:
+        f.truncate(4 * MIB + 777)
+        for offset, length in ((0, 1000), (FRAME_SIZE - 10, 3 * FRAME_SIZE), (3 * MIB, 200_000)):
+            f.seek(offset)
+            f.write(os.urandom(length))
+        f.seek(4 * MIB)
+        f.write(os.urandom(777))
+    return path
+
+
+@pytest.fixture
+def compressed(tmp_path, image):
+    output = tmp_path / "disk.img.zst"
+    writer = seekable.SeekableZstdWriter(str(output), frame_size=FRAME_SIZE, workers=4)
+    export.fan_out(str(image), [writer], chunk_size=4 * FRAME_SIZE)
+    return output
+
+
+def test_random_reads_match_raw(image, compressed):
+    raw = image.read_bytes()
+    reader = seekable.SeekableZstdReader(str(compressed))
+    try:
+        assert reader.size == len(raw)
+        assert reader.frame_count == (len(raw) + FRAME_SIZE - 1) // FRAME_SIZE
+
+        rng = random.Random(1234)
+        for _ in range(200):
+            offset = rng.randrange(len(raw))
+            length = rng.randrange(1, 3 * FRAME_SIZE)
+            assert reader.read(offset, length) == raw[offset:offset + length]
+
+        assert reader.read(len(raw) - 10, 100) == raw[-10:]
+        assert reader.read(len(raw), 100) == b""
+    finally:
+        reader.close()
+
+
+def test_sparse_restore(tmp_path, image, compressed):
+    output = tmp_path / "restored.img"
+    reader = seekable.SeekableZstdReader(str(compressed))
+    try:
+        reader.restore(str(output), workers=4)
+    finally:
+        reader.close()
+
+    assert output.read_bytes() == image.read_bytes()
+    # Os frames zerados ficam como buracos
+    assert os.stat(output).st_blocks * 512 < os.path.getsize(output) // 2
+
+
+def test_rejects_file_without_seek_table(tmp_path):
+    path = tmp_path / "plain.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(os.urandom(1000)))
+
+    with pytest.raises(ValueError):
+        seekable.SeekableZstdReader(str(path))
+
+
+@pytest.mark.skipif(not shutil.which("zstd"), reason="zstd não disponível")
+def test_zstd_cli_decompresses_whole_file(image, compressed):
+    result = subprocess.run(["zstd", "-dc", str(compressed)], check=True, capture_output=True)
+    assert result.stdout == image.read_bytes()
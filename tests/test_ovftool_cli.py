@@ -0,0 +1,105 @@
+"""
+    Testes de saída (golden) da linha de comando do ovftool.py.
+
+    Para regenerar os arquivos de referência após uma mudança intencional na saída:
+        UNMM_UPDATE_GOLDEN=1 python3 -m pytest tests/test_ovftool_cli.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ASSETS_DIR
+
+OVFTOOL = os.path.join(ASSETS_DIR, "ovftool.py")
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+DISK_FORMAT = "http://www.vmware.com/interfaces/specifications/vmdk.html#streamOptimized"
+
+# Argumentos usados por lib/ova.sh (generate_ovf), com a data da anotação fixada
+OVA_ARGS = [
+    "--vm-id", "unmm-system",
+    "--vm-name", "unmm-system",
+    "--vm-info", "A virtual machine created by UNMM",
+    "--vs-type", "vmx-14",
+    "--os-id", "94",
+    "--os-description", "Ubuntu Linux (64-bit)",
+    "--cpu", "2",
+    "--ram", "2048",
+    "-r", "id=file1,href=unmm-system.vmdk,size=123456789",
+    "-d", f"disk_id=vmdisk1,capacity=8589934592,file_ref=file1,format={DISK_FORMAT}",
+    "-n", "name=NAT,description=The NAT network",
+    "--annotation", "Virtual machine created by UNMM (Ubuntu Noble Minimal Maker)\n"
+                    "Boot Mode: bios\nFirmware: BIOS\nGenerated: 2025-01-01 00:00:00",
+    "--product", "Ubuntu 24.04 LTS",
+    "--vendor", "UNMM Project",
+    "--product-version", "1.0.0",
+    "--product-url", "https://ubuntu.com",
+    "--license", "MIT License\n\nPermission is hereby granted, free of charge...",
+]
+
+CASES = {
+    "minimal": ["--vm-id", "myvm"],
+    "hardware": ["--vm-id", "server1", "--vm-name", "Web Server", "--os-id", "101",
+                 "--cpu", "4", "--ram", "4096"],
+    "ova": OVA_ARGS,
+    "sizing": OVA_ARGS + [
+        "-c", "id=small,label=Small,description=1 vCPU,cpu=1,ram=1024",
+        "-c", "id=medium,label=Medium,cpu=2,ram=2048,default=true",
+        "-c", "id=large,label=Large,cpu=4,ram=8192",
+    ],
+    "nodes": OVA_ARGS + [
+        "--node", "id=node1,name=Node 1",
+        "--node", "id=node2,name=Node 2,cpu=4,ram=4096",
+    ],
+}
+
+
+def run_ovftool(args: list[str], tmp_path) -> bytes:
+    output = tmp_path / "out.ovf"
+    subprocess.run([sys.executable, OVFTOOL, *args, "-o", str(output)],
+                   check=True, capture_output=True)
+    return output.read_bytes()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_golden_output(name, tmp_path):
+    content = run_ovftool(CASES[name], tmp_path)
+    golden = os.path.join(GOLDEN_DIR, f"{name}.ovf")
+
+    if os.environ.get("UNMM_UPDATE_GOLDEN"):
+        with open(golden, "wb") as f:
+            f.write(content)
+
+    with open(golden, "rb") as f:
+        assert content == f.read()
+
+
+def test_reserve_pads_to_tar_block(tmp_path):
+    plain = run_ovftool(CASES["minimal"], tmp_path)
+    padded = run_ovftool(CASES["minimal"] + ["--reserve", "4096"], tmp_path)
+
+    assert len(padded) % 512 == 0
+    assert len(padded) >= len(plain) + 4096
+    assert padded.startswith(plain)
+    assert not padded[len(plain):].strip()
+
+
+def test_config_file_matches_config_args(tmp_path):
+    spec = tmp_path / "sizing.json"
+    spec.write_text(json.dumps([
+        {"id": "small", "label": "Small", "description": "1 vCPU", "cpu": 1, "ram": 1024},
+        {"id": "medium", "label": "Medium", "cpu": 2, "ram": 2048, "default": True},
+        {"id": "large", "label": "Large", "cpu": 4, "ram": 8192},
+    ]))
+
+    assert run_ovftool(OVA_ARGS + ["--config-file", str(spec)], tmp_path) == \
+        run_ovftool(CASES["sizing"], tmp_path)
+
+
+def test_missing_required_arguments():
+    result = subprocess.run([sys.executable, OVFTOOL, "--cpu", "2"], capture_output=True)
+    assert result.returncode == 2
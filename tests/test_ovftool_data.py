@@ -0,0 +1,49 @@
+"""
+    Testes dos tipos de dados e da conversão de strings do ovftool.
+"""
+
+import pytest
+
+from ovftool import data
+
+
+def test_parse_dict():
+    assert data.parse_dict("a=1, b = x=y ,c=") == {"a": "1", "b": "x=y", "c": ""}
+    assert data.parse_dict("") == {}
+
+
+def test_parse_dict_invalid_pair():
+    with pytest.raises(ValueError):
+        data.parse_dict("a=1,b")
+
+
+def test_parse_data_converts_types():
+    ref = data.parse_data("id=file1,href=disk.vmdk,size=42", data.File)
+    assert ref == data.File(id="file1", href="disk.vmdk", size=42)
+
+    config = data.parse_data("id=small,label=Small,default=yes,cpu=1", data.Configuration)
+    assert config.default is True
+    assert config.cpu == 1
+    assert config.ram is None
+
+
+@pytest.mark.parametrize("dstr", [
+    "href=disk.vmdk",              # campo obrigatório ausente
+    "id=file1,href=x,size=big",    # inteiro inválido
+    "id=file1,href=x,color=red",   # campo desconhecido
+])
+def test_parse_data_errors(dstr):
+    with pytest.raises(ValueError):
+        data.parse_data(dstr, data.File)
+
+
+def test_parse_mapping_accepts_typed_values():
+    config = data.parse_mapping({"id": "large", "label": "Large", "cpu": 4, "default": False},
+                                data.Configuration)
+    assert config == data.Configuration(id="large", label="Large", cpu=4)
+
+
+def test_parse_datalist():
+    networks = data.parse_datalist(["name=NAT", "name=LAN,description=Local"], data.Network)
+    assert [network.name for network in networks] == ["NAT", "LAN"]
+    assert networks[1].description == "Local"
@@ -0,0 +1,96 @@
+"""
+    Testes da atualização de metadados de OVAs no local.
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import tarfile
+
+from xml.dom import minidom as md
+
+import pytest
+
+from conftest import ASSETS_DIR
+from ovftool import package
+
+OVFTOOL = os.path.join(ASSETS_DIR, "ovftool.py")
+
+
+def make_ova(tmp_path, reserve: int,
+             args: tuple = ("--annotation", "old", "--product", "P", "--product-version", "1.0.0")
+             ) -> tuple[str, bytes]:
+    disk = os.urandom(100_000)
+    (tmp_path / "vm.vmdk").write_bytes(disk)
+    subprocess.run([sys.executable, OVFTOOL, "--vm-id", "vm", *args,
+                    "--reserve", str(reserve), "-o", str(tmp_path / "vm.ovf")],
+                   check=True, capture_output=True)
+
+    ovf = (tmp_path / "vm.ovf").read_bytes()
+    (tmp_path / "vm.mf").write_text(
+        f"SHA256(vm.ovf)= {hashlib.sha256(ovf).hexdigest()}\n"
+        f"SHA256(vm.vmdk)= {hashlib.sha256(disk).hexdigest()}\n"
+    )
+
+    ova = str(tmp_path / "vm.ova")
+    with tarfile.open(ova, "w", format=tarfile.USTAR_FORMAT) as tar:
+        for name in ("vm.ovf", "vm.mf", "vm.vmdk"):
+            tar.add(tmp_path / name, arcname=name)
+    return ova, disk
+
+
+def read_member(ova: str, name: str) -> bytes:
+    with tarfile.open(ova) as tar:
+        return tar.extractfile(name).read()
+
+
+def test_update_ova_in_place(tmp_path):
+    ova, disk = make_ova(tmp_path, reserve=4096)
+    size = os.path.getsize(ova)
+
+    package.update_ova(ova, annotation="new", license_text="EULA", product_version="2.0.0")
+
+    assert os.path.getsize(ova) == size
+    assert read_member(ova, "vm.vmdk") == disk
+
+    ovf = read_member(ova, "vm.ovf")
+    assert b"<ovf:Annotation>new</ovf:Annotation>" in ovf
+    assert b"<ovf:License>EULA</ovf:License>" in ovf
+    assert b"<ovf:Version>2.0.0</ovf:Version>" in ovf
+
+    manifest = read_member(ova, "vm.mf").decode()
+    assert f"SHA256(vm.ovf)= {hashlib.sha256(ovf).hexdigest()}" in manifest
+    assert f"SHA256(vm.vmdk)= {hashlib.sha256(disk).hexdigest()}" in manifest
+
+
+def test_repeated_updates_do_not_grow(tmp_path):
+    ova, _ = make_ova(tmp_path, reserve=512)
+    for version in ("1.0.1", "1.0.2", "1.0.3"):
+        package.update_ova(ova, product_version=version)
+    assert b"<ovf:Version>1.0.3</ovf:Version>" in read_member(ova, "vm.ovf")
+
+
+def test_update_without_room_fails(tmp_path):
+    ova, _ = make_ova(tmp_path, reserve=0)
+    before = open(ova, "rb").read()
+
+    with pytest.raises(ValueError):
+        package.update_ova(ova, annotation="x" * 10_000)
+    assert open(ova, "rb").read() == before
+
+
+def test_update_collection_keeps_sections_before_systems(tmp_path):
+    ova, _ = make_ova(tmp_path, reserve=4096, args=(
+        "-r", "id=file1,href=vm.vmdk", "-d", "disk_id=vmdisk1,capacity=8,file_ref=file1",
+        "--node", "id=node1", "--node", "id=node2",
+    ))
+
+    package.update_ova(ova, annotation="new", license_text="EULA", product_version="2.0.0")
+
+    ovf = md.parseString(read_member(ova, "vm.ovf").rstrip())
+    collection = ovf.getElementsByTagName("ovf:VirtualSystemCollection")[0]
+    tags = [node.tagName for node in collection.childNodes if node.nodeType == node.ELEMENT_NODE]
+    first_system = tags.index("ovf:VirtualSystem")
+    assert {"ovf:AnnotationSection", "ovf:EulaSection", "ovf:ProductSection"} <= set(tags[:first_system])
+    assert all(tag == "ovf:VirtualSystem" for tag in tags[first_system:])
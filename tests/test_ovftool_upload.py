@@ -0,0 +1,207 @@
+"""
+    Testes do envio de OVAs via multipart upload contra um servidor S3 local.
+"""
+
+import io
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import urllib.parse
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import ASSETS_DIR
+from ovftool import upload
+
+OVAUPLOAD = os.path.join(ASSETS_DIR, "ovaupload.py")
+
+
+class S3Stub:
+    """
+        Servidor S3 mínimo em memória: CreateMultipartUpload, UploadPart,
+        CompleteMultipartUpload e AbortMultipartUpload.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.parts = {}
+        self.objects = {}
+        self.aborted = []
+        self.failures = {}
+        self.completed_order = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b"", headers: dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _parse(self):
+                url = urllib.parse.urlsplit(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                return url.path, query, body
+
+            def do_POST(self):
+                path, query, body = self._parse()
+                if "uploads" in query:
+                    upload_id = f"upload-{len(stub.parts) + 1}"
+                    stub.parts[upload_id] = {}
+                    self._reply(200, f"<InitiateMultipartUploadResult><UploadId>{upload_id}"
+                                     "</UploadId></InitiateMultipartUploadResult>".encode())
+                    return
+
+                parts = stub.parts[query["uploadId"]]
+                numbers = [int(n) for n in re.findall(r"<PartNumber>(\d+)</PartNumber>", body.decode())]
+                stub.objects[path] = b"".join(parts[n] for n in numbers)
+                stub.completed_order = numbers
+                self._reply(200, b"<CompleteMultipartUploadResult/>")
+
+            def do_PUT(self):
+                path, query, body = self._parse()
+                number = int(query["partNumber"])
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failures = stub.failures.get(number, 0)
+                    if failures:
+                        stub.failures[number] = failures - 1
+                try:
+                    time.sleep(stub.delay)
+                    if failures:
+                        self._reply(503)
+                        return
+                    stub.parts[query["uploadId"]][number] = body
+                    self._reply(200, headers={"ETag": f'"{number}"'})
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def do_DELETE(self):
+                _, query, _ = self._parse()
+                stub.aborted.append(query["uploadId"])
+                self._reply(204)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/bucket/vm.ova"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def s3():
+    stub = S3Stub()
+    yield stub
+    stub.close()
+
+
+def make_tar(tmp_path) -> bytes:
+    for name, size in (("vm.ovf", 3000), ("vm.mf", 200), ("vm.vmdk", 50_000)):
+        (tmp_path / name).write_bytes(os.urandom(size))
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name in ("vm.ovf", "vm.mf", "vm.vmdk"):
+            tar.add(tmp_path / name, arcname=name)
+    return buffer.getvalue()
+
+
+def test_parts_are_assembled_in_order(s3):
+    data = os.urandom(10_000)
+    target = upload.MultipartUpload(s3.url)
+
+    size, _ = upload.stream_upload(io.BytesIO(data), target, part_size=1024, concurrency=3)
+
+    assert size == len(data)
+    assert s3.completed_order == list(range(1, 11))
+    assert s3.objects["/bucket/vm.ova"] == data
+    assert not s3.aborted
+
+
+def test_part_is_retried_after_server_error(s3):
+    data = os.urandom(4096)
+    s3.failures[2] = 1
+    target = upload.MultipartUpload(s3.url, retries=2)
+
+    upload.stream_upload(io.BytesIO(data), target, part_size=1024, concurrency=2)
+
+    assert s3.failures[2] == 0
+    assert s3.objects["/bucket/vm.ova"] == data
+
+
+def test_concurrency_limits_parts_in_flight(s3):
+    s3.delay = 0.05
+    target = upload.MultipartUpload(s3.url)
+
+    upload.stream_upload(io.BytesIO(os.urandom(16 * 1024)), target, part_size=1024, concurrency=3)
+
+    assert 1 < s3.max_in_flight <= 3
+
+
+def test_abort_on_part_failure(s3):
+    s3.failures[3] = 10
+    target = upload.MultipartUpload(s3.url, retries=0)
+
+    with pytest.raises(upload.UploadError):
+        upload.stream_upload(io.BytesIO(os.urandom(8192)), target, part_size=1024, concurrency=2)
+
+    assert s3.aborted == [target.upload_id]
+    assert "/bucket/vm.ova" not in s3.objects
+
+
+def test_abort_on_truncated_tar_stream(s3, tmp_path):
+    data = make_tar(tmp_path)
+    target = upload.MultipartUpload(s3.url)
+
+    with pytest.raises(upload.UploadError):
+        upload.stream_upload(io.BytesIO(data[:30_000]), target, part_size=8192,
+                             verify=upload.check_tar_end)
+
+    assert s3.aborted == [target.upload_id]
+    assert "/bucket/vm.ova" not in s3.objects
+
+
+def test_ovaupload_runs_tar(s3, tmp_path):
+    make_tar(tmp_path)
+    local = tmp_path / "local.ova"
+
+    subprocess.run([sys.executable, OVAUPLOAD, s3.url, "-C", str(tmp_path),
+                    "vm.ovf", "vm.mf", "vm.vmdk", "--output", str(local)],
+                   check=True, capture_output=True)
+
+    ova = s3.objects["/bucket/vm.ova"]
+    assert ova == local.read_bytes()
+    with tarfile.open(fileobj=io.BytesIO(ova)) as tar:
+        assert tar.getnames() == ["vm.ovf", "vm.mf", "vm.vmdk"]
+
+
+def test_ovaupload_aborts_when_tar_fails(s3, tmp_path):
+    make_tar(tmp_path)
+
+    result = subprocess.run([sys.executable, OVAUPLOAD, s3.url, "-C", str(tmp_path),
+                             "vm.ovf", "missing.mf", "vm.vmdk"],
+                            capture_output=True)
+
+    assert result.returncode != 0
+    assert len(s3.aborted) == 1
+    assert "/bucket/vm.ova" not in s3.objects
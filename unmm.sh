@@ -32,6 +32,16 @@ source "$LIB_DIR/diskpart.sh" || exit 1
 source "$LIB_DIR/chroot.sh" || exit 1
 # shellcheck source=lib/ova.sh
 source "$LIB_DIR/ova.sh" || exit 1
+# shellcheck source=lib/rootfs.sh
+source "$LIB_DIR/rootfs.sh" || exit 1
+# shellcheck source=lib/registry.sh
+source "$LIB_DIR/registry.sh" || exit 1
+# shellcheck source=lib/checkpoint.sh
+source "$LIB_DIR/checkpoint.sh" || exit 1
+# shellcheck source=lib/overlay.sh
+source "$LIB_DIR/overlay.sh" || exit 1
+# shellcheck source=lib/prune.sh
+source "$LIB_DIR/prune.sh" || exit 1
 
 check_debian_based || exit 1
 check_dependencies || exit 1
@@ -50,6 +60,9 @@ cleanup() {
         rm -f "$OUTPUT_PATH/$HOSTNAME.mf"
         rm -f "$OUTPUT_PATH/$HOSTNAME.ova"
     fi
+    if [[ $# == 0 && -n "$(checkpoint_last)" ]]; then
+        log_info "A construção pode ser retomada a partir do checkpoint '$(checkpoint_last)' com --resume."
+    fi
 }
 
 # help
@@ -64,6 +77,15 @@ Opções:
   -h, --help                   Mostra esta mensagem de ajuda e sai
   --list                       Lista todos os catálogos e add-ons disponíveis
   --create-ova                 Cria um arquivo OVA e mantém a imagem RAW
+  --ova-sizing=FILE            Arquivo JSON com os dimensionamentos (CPU/RAM) oferecidos pelo OVA
+  --ova-nodes=N                Gera um OVA com N VMs que compartilham o mesmo disco (padrão: 1)
+  --upload-url=URL             Envia o OVA para um endpoint compatível com S3 enquanto é gerado (implica --create-ova)
+  --no-local-ova               Não mantém o OVA em disco quando enviado com --upload-url
+  --update-ova=FILE            Atualiza no local os metadados de um OVA existente e sai (sem construir imagem)
+  --product-version=VERSION    Nova versão do produto (com --update-ova)
+  --annotation=TEXT            Nova anotação (com --update-ova)
+  --export=FORMATS             Exporta a imagem RAW para outros formatos em uma única leitura (ex: qcow2,gz,zst)
+  --delta-from=IMG             Gera um delta em nível de bloco da imagem IMG (ex: a construção anterior) para a nova imagem
   --mountpoint=MOUNTPOINT      Especifica o ponto de montagem para a criação da imagem
   --maximum-size=SIZE          Especifica o tamanho máximo da imagem (ex: 10G, 500M)
   -o, --output=OUTPUT_PATH     Especifica o caminho do novo arquivo de imagem
@@ -73,6 +95,15 @@ Opções:
   -p, --password=PASSWORD      Define a senha do usuário padrão (padrão: password)
   -l, --license=LICENSE        Especifica o caminho para o arquivo de licença a ser incluído
   -k, --keep                   Mantém os arquivos usados em caso de falha na criação da imagem
+  --checkpoint                 Grava um checkpoint (snapshot da imagem) ao fim de cada fase da construção
+  --resume                     Retoma uma construção que falhou a partir do último checkpoint (implica --checkpoint)
+  --analyze-rootfs             Reporta os maiores diretórios, pacotes e arquivos duplicados antes da finalização
+  --dedup                      Substitui arquivos idênticos do rootfs por hardlinks (implica --analyze-rootfs)
+  --dedup-path=PATH            Caminho do rootfs onde a deduplicação é permitida (pode ser repetido)
+  --prune[=PROFILE]            Remove módulos do kernel e firmwares não usados pelo perfil de dispositivos
+                               (padrão: o perfil do catálogo, CATALOG_PRUNE_PROFILE)
+  --shrink                     Reduz a imagem ao seu conteúdo antes da exportação; o sistema é expandido no primeiro boot
+  --shrink-headroom=SIZE       Espaço livre mantido no sistema de arquivos reduzido (padrão: 512M, implica --shrink)
   -v, --verbose                Habilita logging verboso
   <catalog>                    Nome do catálogo a ser usado (padrão: base)
   [addon1 addon2 ...]          Lista de add-ons a serem aplicados após o catálogo
@@ -115,6 +146,16 @@ Exemplo:
     # Listar todos os catálogos e add-ons disponíveis
     sudo ./unmm.sh --list
 
+    # Manter apenas os módulos e firmwares dos dispositivos do VMware
+    sudo ./unmm.sh --prune=vmware base
+
+    # Atualizar a versão e a licença de um OVA já gerado, sem reconstruí-lo
+    sudo ./unmm.sh --update-ova=output/unmm-system.ova --product-version=1.0.1 -l NOVA_LICENCA.txt
+
+    # Retomar uma construção que falhou, sem repetir as fases já concluídas
+    sudo ./unmm.sh --checkpoint base lxqt
+    sudo ./unmm.sh --resume base lxqt
+
 Glossário:
   catálogo        Conjunto predefinido de pacotes e configurações para o sistema Ubuntu Noble. Atendendo a
                     expectativa de ser o mais mínimo possível.
@@ -129,6 +170,15 @@ fi
 
 # Valores padrão
 CREATE_OVA=false
+OVA_SIZING_FILE=""
+OVA_NODES=1
+OVA_UPLOAD_URL=""
+OVA_KEEP_LOCAL=true
+EXPORT_FORMATS=()
+UPDATE_OVA=""
+UPDATE_PRODUCT_VERSION=""
+UPDATE_ANNOTATION=""
+DELTA_FROM=""
 MOUNTPOINT="/mnt/unmm"
 MAXIMUM_SIZE="8G"
 OUTPUT_PATH=$(to_absolute_path "./output")
@@ -138,8 +188,18 @@ USERNAME="user"
 PASSWORD="password"
 CATALOG="base"
 LICENSE_FILE="$ASSETS_DIR/generic_LICENSE"
+LICENSE_FILE_SET=false
 ENABLE_VERBOSE=false
 KEEP_ON_FAILURE=false
+ENABLE_CHECKPOINTS=false
+RESUME_BUILD=false
+ANALYZE_ROOTFS=false
+DEDUP_ROOTFS=false
+DEDUP_PATHS=()
+PRUNE_SYSTEM=false
+PRUNE_PROFILE=""
+SHRINK_IMAGE=false
+SHRINK_HEADROOM="512M"
 ADDONS=()
 
 # Processamento dos argumentos
@@ -151,22 +211,42 @@ while [[ $# -ne 0 ]]; do
             ;;
         --list)
             log_info "Catálogos disponíveis:"
-            for catalog_file in "$CATALOG_DIR"/*; do
-                # shellcheck disable=SC1090
-                source "$catalog_file"
-                log_info " - $CATALOG_NAME: $CATALOG_DISPLAY_NAME (Versão: $CATALOG_VERSION)"
-                log_info "   $CATALOG_DESCRIPTION"
+            while IFS= read -r catalog_name; do
+                registry_load catalog "$catalog_name" || {
+                    log_warning "Catálogo '$catalog_name' declara metadados inválidos e foi ignorado."
+                    log_info
+                    continue
+                }
+                log_info " - ${REGISTRY_META[catalog:$catalog_name:CATALOG_NAME]:-$catalog_name}: ${REGISTRY_META[catalog:$catalog_name:CATALOG_DISPLAY_NAME]:-} (Versão: ${REGISTRY_META[catalog:$catalog_name:CATALOG_VERSION]:-?})"
+                log_info "   ${REGISTRY_META[catalog:$catalog_name:CATALOG_DESCRIPTION]:-}"
                 log_info
-            done
+            done < <(registry_list catalog)
 
             log_info "Add-ons disponíveis:"
-            for addon_file in "$ADDONS_DIR"/*; do
-                # shellcheck disable=SC1090
-                source "$addon_file"
-                log_info " - $ADDON_NAME: $ADDON_DISPLAY_NAME (Versão: $ADDON_VERSION)"
-                log_info "   $ADDON_DESCRIPTION"
+            while IFS= read -r addon_name; do
+                registry_load addon "$addon_name" || {
+                    log_warning "Add-on '$addon_name' declara metadados inválidos e foi ignorado."
+                    log_info
+                    continue
+                }
+                log_info " - $addon_name: ${REGISTRY_META[addon:$addon_name:ADDON_DISPLAY_NAME]:-} (Versão: ${REGISTRY_META[addon:$addon_name:ADDON_VERSION]:-?})"
+                log_info "   ${REGISTRY_META[addon:$addon_name:ADDON_DESCRIPTION]:-}"
+                if [[ -n "${REGISTRY_META[addon:$addon_name:ADDON_REQUIRES]:-}" ]]; then
+                    log_info "   Requer: ${REGISTRY_META[addon:$addon_name:ADDON_REQUIRES]}"
+                fi
+                if [[ -n "${REGISTRY_META[addon:$addon_name:ADDON_CONFLICTS]:-}" ]]; then
+                    log_info "   Conflita com: ${REGISTRY_META[addon:$addon_name:ADDON_CONFLICTS]}"
+                fi
+                if [[ -n "${REGISTRY_META[addon:$addon_name:ADDON_CATALOGS]:-}" ]]; then
+                    log_info "   Catálogos suportados: ${REGISTRY_META[addon:$addon_name:ADDON_CATALOGS]}"
+                fi
                 log_info
-            done
+            done < <(registry_list addon)
+
+            log_info "Perfis de dispositivos disponíveis (--prune):"
+            while IFS= read -r profile_name; do
+                log_info " - $profile_name"
+            done < <(prune_list_profiles)
 
             exit 0
             ;;
@@ -174,6 +254,53 @@ while [[ $# -ne 0 ]]; do
             CREATE_OVA=true
             shift
             ;;
+        --ova-sizing=*)
+            OVA_SIZING_FILE=$(to_absolute_path "${1#*=}")
+            shift
+
+            if [[ ! -f "$OVA_SIZING_FILE" ]]; then
+                log_error "O arquivo de dimensionamentos especificado '$OVA_SIZING_FILE' não existe."
+                exit 1
+            fi
+            ;;
+        --ova-nodes=*)
+            OVA_NODES="${1#*=}"
+            shift
+
+            if [[ ! "$OVA_NODES" =~ ^[1-9][0-9]*$ ]]; then
+                log_error "Número de nós inválido: '$OVA_NODES'."
+                exit 1
+            fi
+            ;;
+        --upload-url=*)
+            CREATE_OVA=true
+            OVA_UPLOAD_URL="${1#*=}"
+            shift
+            ;;
+        --no-local-ova)
+            OVA_KEEP_LOCAL=false
+            shift
+            ;;
+        --update-ova=*)
+            UPDATE_OVA="${1#*=}"
+            shift
+            ;;
+        --product-version=*)
+            UPDATE_PRODUCT_VERSION="${1#*=}"
+            shift
+            ;;
+        --annotation=*)
+            UPDATE_ANNOTATION="${1#*=}"
+            shift
+            ;;
+        --export=*)
+            IFS=',' read -r -a EXPORT_FORMATS <<< "${1#*=}"
+            shift
+            ;;
+        --delta-from=*)
+            DELTA_FROM=$(to_absolute_path "${1#*=}")
+            shift
+            ;;
         --mountpoint=*)
             MOUNTPOINT="${1#*=}"
             shift
@@ -243,6 +370,7 @@ while [[ $# -ne 0 ]]; do
             fi
             ;;
         -l|--license=*)
+            LICENSE_FILE_SET=true
             if [[ "$1" == -l ]]; then
                 shift
                 LICENSE_FILE="$1"
@@ -262,6 +390,46 @@ while [[ $# -ne 0 ]]; do
             KEEP_ON_FAILURE=true
             shift
             ;;
+        --checkpoint)
+            ENABLE_CHECKPOINTS=true
+            shift
+            ;;
+        --resume)
+            ENABLE_CHECKPOINTS=true
+            RESUME_BUILD=true
+            shift
+            ;;
+        --analyze-rootfs)
+            ANALYZE_ROOTFS=true
+            shift
+            ;;
+        --dedup)
+            ANALYZE_ROOTFS=true
+            DEDUP_ROOTFS=true
+            shift
+            ;;
+        --dedup-path=*)
+            DEDUP_PATHS+=("${1#*=}")
+            shift
+            ;;
+        --prune)
+            PRUNE_SYSTEM=true
+            shift
+            ;;
+        --prune=*)
+            PRUNE_SYSTEM=true
+            PRUNE_PROFILE="${1#*=}"
+            shift
+            ;;
+        --shrink)
+            SHRINK_IMAGE=true
+            shift
+            ;;
+        --shrink-headroom=*)
+            SHRINK_IMAGE=true
+            SHRINK_HEADROOM="${1#*=}"
+            shift
+            ;;
         -v|--verbose)
             ENABLE_VERBOSE=true
             shift
@@ -280,10 +448,58 @@ while [[ $# -ne 0 ]]; do
     esac
 done
 
+# Atualização de metadados de um OVA existente (não constrói imagem)
+if [[ -n "$UPDATE_OVA" ]]; then
+    update_license=""
+    if [[ "$LICENSE_FILE_SET" == true ]]; then
+        update_license="$LICENSE_FILE"
+    fi
+    if [[ -z "$UPDATE_PRODUCT_VERSION" && -z "$UPDATE_ANNOTATION" && -z "$update_license" ]]; then
+        log_error "Nada a atualizar. Use --product-version, --annotation ou --license com --update-ova."
+        exit 1
+    fi
+    ova_update_metadata "$UPDATE_OVA" "$UPDATE_PRODUCT_VERSION" "$UPDATE_ANNOTATION" "$update_license"
+    exit 0
+fi
+
+# Validação do catálogo e dos add-ons antes de qualquer operação custosa
+if ! registry_validate "$CATALOG" "${ADDONS[@]}"; then
+    log_error "Verifique os catálogos e add-ons disponíveis com --list."
+    exit 1
+fi
+
+if [[ "$PRUNE_SYSTEM" == true ]]; then
+    PRUNE_PROFILE="${PRUNE_PROFILE:-${REGISTRY_META[catalog:$CATALOG:CATALOG_PRUNE_PROFILE]:-}}"
+    if [[ -z "$PRUNE_PROFILE" ]]; then
+        log_error "O catálogo '$CATALOG' não define um perfil de dispositivos. Use --prune=PROFILE."
+        exit 1
+    fi
+    if ! prune_profile_exists "$PRUNE_PROFILE"; then
+        log_error "Perfil de dispositivos '$PRUNE_PROFILE' não encontrado. Verifique os perfis disponíveis com --list."
+        exit 1
+    fi
+fi
+
+if [[ -n "$DELTA_FROM" && ! -f "$DELTA_FROM" ]]; then
+    log_error "Imagem de origem do delta não encontrada: '$DELTA_FROM'."
+    exit 1
+fi
+
+if [[ "$SHRINK_IMAGE" == true && ! "$SHRINK_HEADROOM" =~ ^[0-9]+[MG]$ ]]; then
+    log_error "Folga inválida para --shrink-headroom: '$SHRINK_HEADROOM'. Use um valor como 512M ou 1G."
+    exit 1
+fi
+
 trap cleanup EXIT INT TERM ERR
 
 log_verbose "Parâmetros de configuração:"
 log_verbose "  CREATE_OVA: $CREATE_OVA"
+log_verbose "  OVA_SIZING_FILE: $OVA_SIZING_FILE"
+log_verbose "  OVA_NODES: $OVA_NODES"
+log_verbose "  OVA_UPLOAD_URL: $OVA_UPLOAD_URL"
+log_verbose "  OVA_KEEP_LOCAL: $OVA_KEEP_LOCAL"
+log_verbose "  EXPORT_FORMATS: ${EXPORT_FORMATS[*]}"
+log_verbose "  DELTA_FROM: $DELTA_FROM"
 log_verbose "  MOUNTPOINT: $MOUNTPOINT"
 log_verbose "  MAXIMUM_SIZE: $MAXIMUM_SIZE"
 log_verbose "  OUTPUT_PATH: $OUTPUT_PATH"
@@ -293,6 +509,15 @@ log_verbose "  USERNAME: $USERNAME"
 log_verbose "  PASSWORD: [HIDDEN]"
 log_verbose "  LICENSE_FILE: $LICENSE_FILE"
 log_verbose "  KEEP_ON_FAILURE: $KEEP_ON_FAILURE"
+log_verbose "  ENABLE_CHECKPOINTS: $ENABLE_CHECKPOINTS"
+log_verbose "  RESUME_BUILD: $RESUME_BUILD"
+log_verbose "  ANALYZE_ROOTFS: $ANALYZE_ROOTFS"
+log_verbose "  DEDUP_ROOTFS: $DEDUP_ROOTFS"
+log_verbose "  DEDUP_PATHS: ${DEDUP_PATHS[*]}"
+log_verbose "  PRUNE_SYSTEM: $PRUNE_SYSTEM"
+log_verbose "  PRUNE_PROFILE: $PRUNE_PROFILE"
+log_verbose "  SHRINK_IMAGE: $SHRINK_IMAGE"
+log_verbose "  SHRINK_HEADROOM: $SHRINK_HEADROOM"
 log_verbose "  CATALOG: $CATALOG"
 log_verbose "  ADDONS: ${ADDONS[*]}"
 
@@ -311,56 +536,101 @@ mkdir -p "$(dirname "$disk_image_path")"
 
 log_info "Um novo disco será criado em $disk_image_path"
 
+if [[ "$DELTA_FROM" == "$disk_image_path" ]]; then
+    log_error "A imagem de origem do delta seria sobrescrita pela nova construção: '$DELTA_FROM'."
+    log_error "Copie a imagem anterior para outro caminho antes de usar --delta-from."
+    exit 1
+fi
+
 if size_less_than "$MAXIMUM_SIZE" "$CATALOG_PREFFERED_SIZE"; then
     log_error "O tamanho máximo especificado ($MAXIMUM_SIZE) é menor que o tamanho preferido do catálogo ($CATALOG_PREFFERED_SIZE)."
     log_error "Considere aumentar o tamanho máximo ou escolher um catálogo diferente."
     exit 1
 fi
 
-log_info "Preparando imagem de disco..."
-diskpart_create_raw_disk "$disk_image_path" "$MAXIMUM_SIZE"
-log_info "Imagem de disco criada em '$disk_image_path'."
+if [[ "$ENABLE_CHECKPOINTS" == true ]]; then
+    # O fingerprint cobre as opções usadas pelas fases e o conteúdo dos scripts do
+    # catálogo e dos perfis de dispositivos; o conteúdo de cada add-on é verificado
+    # individualmente, pois add-ons podem ser acrescentados ao fim da lista ao retomar
+    fingerprint_values=("$CATALOG" "${REGISTRY_META[catalog:$CATALOG:CATALOG_VERSION]:-}"
+        "$(registry_digest catalog "$CATALOG")" "$BOOT_MODE" "$MAXIMUM_SIZE"
+        "$HOSTNAME" "$USERNAME" "$PASSWORD" "$PRUNE_SYSTEM" "$PRUNE_PROFILE")
+    if [[ "$PRUNE_SYSTEM" == true ]]; then
+        fingerprint_values+=("$(cat "$PRUNE_PROFILES_DIR"/* | sha256sum | awk '{print $1}')")
+    fi
+    checkpoint_addons=()
+    for addon in "${ADDONS[@]}"; do
+        checkpoint_addons+=("$addon:$(registry_digest addon "$addon")")
+    done
+    checkpoint_init "$disk_image_path" "$(checkpoint_fingerprint "${fingerprint_values[@]}")" \
+        "$RESUME_BUILD" "${checkpoint_addons[@]}"
+fi
+
+if checkpoint_done disk; then
+    checkpoint_restore
+else
+    log_info "Preparando imagem de disco..."
+    diskpart_create_raw_disk "$disk_image_path" "$MAXIMUM_SIZE"
+    log_info "Imagem de disco criada em '$disk_image_path'."
+fi
 
 device=$(diskpart_setup_loop_device "$disk_image_path")
 log_verbose "Dispositivo loop é: $device"
 diskpart_track_loop_device "$device"
 
-log_info "Formatação e particionamento do disco..."
-if [[ "$BOOT_MODE" == "uefi" ]]; then
-    diskpart_create_image_gpt_layout "$device" false
-elif [[ "$BOOT_MODE" == "bios" ]]; then
-    diskpart_create_image_mbr_layout "$device"
-elif [[ "$BOOT_MODE" == "hybrid" ]]; then
-    diskpart_create_image_gpt_layout "$device" true
+if ! checkpoint_done disk; then
+    log_info "Formatação e particionamento do disco..."
+    if [[ "$BOOT_MODE" == "uefi" ]]; then
+        diskpart_create_image_gpt_layout "$device" false
+    elif [[ "$BOOT_MODE" == "bios" ]]; then
+        diskpart_create_image_mbr_layout "$device"
+    elif [[ "$BOOT_MODE" == "hybrid" ]]; then
+        diskpart_create_image_gpt_layout "$device" true
+    fi
+    checkpoint_save disk
 fi
 
-log_info "Instalando sistema base..."
-
-export CATALOG_INSTALL_ARG_MOUNTPOINT="$MOUNTPOINT"
-export CATALOG_INSTALL_ARG_HOSTNAME="$HOSTNAME"
-export CATALOG_INSTALL_ARG_USERNAME="$USERNAME"
-export CATALOG_INSTALL_ARG_PASSWORD="$PASSWORD"
-export CATALOG_INSTALL_ARG_DEVICE="$device"
-export CATALOG_INSTALL_ARG_BOOTMODE="$BOOT_MODE"
-export CATALOG_INSTALL_ARG_DISKIMAGEPATH="$disk_image_path"
-CATALOG_INSTALL_ARG_SIZE=$(stat -c %s "$disk_image_path")
-export CATALOG_INSTALL_ARG_SIZE
-catalog_install
-
-unset CATALOG_INSTALL_ARG_MOUNTPOINT
-unset CATALOG_INSTALL_ARG_HOSTNAME
-unset CATALOG_INSTALL_ARG_USERNAME
-unset CATALOG_INSTALL_ARG_PASSWORD
-unset CATALOG_INSTALL_ARG_DEVICE
-unset CATALOG_INSTALL_ARG_BOOTMODE
-unset CATALOG_INSTALL_ARG_DISKIMAGEPATH
-unset CATALOG_INSTALL_ARG_SIZE
+if checkpoint_done catalog; then
+    log_info "Catálogo '$CATALOG' já instalado (checkpoint). Montando sistema..."
+    chroot_mount_system "$device" "$MOUNTPOINT"
+    chroot_prepare_environment "$MOUNTPOINT"
+else
+    log_info "Instalando sistema base..."
+
+    export CATALOG_INSTALL_ARG_MOUNTPOINT="$MOUNTPOINT"
+    export CATALOG_INSTALL_ARG_HOSTNAME="$HOSTNAME"
+    export CATALOG_INSTALL_ARG_USERNAME="$USERNAME"
+    export CATALOG_INSTALL_ARG_PASSWORD="$PASSWORD"
+    export CATALOG_INSTALL_ARG_DEVICE="$device"
+    export CATALOG_INSTALL_ARG_BOOTMODE="$BOOT_MODE"
+    export CATALOG_INSTALL_ARG_DISKIMAGEPATH="$disk_image_path"
+    CATALOG_INSTALL_ARG_SIZE=$(stat -c %s "$disk_image_path")
+    export CATALOG_INSTALL_ARG_SIZE
+    catalog_install
+
+    unset CATALOG_INSTALL_ARG_MOUNTPOINT
+    unset CATALOG_INSTALL_ARG_HOSTNAME
+    unset CATALOG_INSTALL_ARG_USERNAME
+    unset CATALOG_INSTALL_ARG_PASSWORD
+    unset CATALOG_INSTALL_ARG_DEVICE
+    unset CATALOG_INSTALL_ARG_BOOTMODE
+    unset CATALOG_INSTALL_ARG_DISKIMAGEPATH
+    unset CATALOG_INSTALL_ARG_SIZE
+
+    checkpoint_save catalog "$MOUNTPOINT"
+fi
 
 addon_count=${#ADDONS[@]}
 if [[ $addon_count -gt 0 ]]; then
     log_info "Aplicando $addon_count add-ons..."
     for addon in "${ADDONS[@]}"; do
+        if checkpoint_done "addon:$addon"; then
+            log_info "Add-on '$addon' já aplicado (checkpoint). Pulando..."
+            continue
+        fi
+
         log_verbose "Sourcing add-on '$addon'..."
+        ADDON_ASSET_OVERLAYS=()
 
         # shellcheck disable=SC1090
         source "$ADDONS_DIR/$addon" || {
@@ -380,6 +650,7 @@ if [[ $addon_count -gt 0 ]]; then
         export ADDON_INSTALL_ARG_SIZE
         export ADDON_INSTALL_ARG_INSTALLED_CATALOG="$CATALOG"
         addon_install
+        overlay_apply "$MOUNTPOINT" "$USERNAME" "${ADDON_ASSET_OVERLAYS[@]}"
 
         unset ADDON_INSTALL_ARG_MOUNTPOINT
         unset ADDON_INSTALL_ARG_HOSTNAME
@@ -390,20 +661,64 @@ if [[ $addon_count -gt 0 ]]; then
         unset ADDON_INSTALL_ARG_DISKIMAGEPATH
         unset ADDON_INSTALL_ARG_SIZE
         unset ADDON_INSTALL_ARG_INSTALLED_CATALOG
+
+        checkpoint_save "addon:$addon" "$MOUNTPOINT"
     done
 else
     log_info "Nenhum add-on especificado. Pulando etapa de add-ons."
 fi
 
+# Após os add-ons, para que pacotes de kernel e firmware instalados ou atualizados por eles
+# também sejam podados
+if [[ "$PRUNE_SYSTEM" == true ]]; then
+    if checkpoint_done prune; then
+        log_info "Módulos e firmwares já removidos (checkpoint). Pulando..."
+    else
+        prune_system "$MOUNTPOINT" "$PRUNE_PROFILE"
+        checkpoint_save prune "$MOUNTPOINT"
+    fi
+fi
+
+if [[ "$ANALYZE_ROOTFS" == true ]]; then
+    rootfs_analyze "$MOUNTPOINT" "$DEDUP_ROOTFS" "${DEDUP_PATHS[@]}"
+fi
+
+if [[ "$SHRINK_IMAGE" == true ]]; then
+    log_info "Instalando payload de first boot para expandir o sistema de arquivos raiz..."
+    if ! chroot_call_logged "$MOUNTPOINT" $APT_GET_COMMAND cloud-guest-utils; then
+        log_error "Falha ao instalar o pacote cloud-guest-utils."
+        exit 1
+    fi
+    overlay_apply "$MOUNTPOINT" "$USERNAME" \
+        "firstboot-manager/grow-rootfs.sh:/opt/firstboot.d/10-grow-rootfs:root:0755"
+fi
+
 log_info "Finalizando imagem..."
 cleanup true
+checkpoint_clear
+
+if [[ "$SHRINK_IMAGE" == true ]] && ! diskpart_shrink_image "$disk_image_path" "$SHRINK_HEADROOM"; then
+    log_error "Falha ao reduzir a imagem '$disk_image_path'."
+    exit 1
+fi
 
 log_info "Imagem do Ubuntu Noble criada com sucesso em '$disk_image_path'."
+if [[ ${#EXPORT_FORMATS[@]} -gt 0 ]]; then
+    diskpart_export_image "$disk_image_path" "${EXPORT_FORMATS[@]}"
+fi
+
+if [[ -n "$DELTA_FROM" ]]; then
+    diskpart_create_delta "$DELTA_FROM" "$disk_image_path" "$disk_image_path.delta"
+fi
+
 if [[ "$CREATE_OVA" == true ]]; then
     ova_output_path="$OUTPUT_PATH/$HOSTNAME.ova"
     log_info "Criando arquivo OVA em '$ova_output_path'..."
     diskpart_img_to_vmdk "$disk_image_path" "$OUTPUT_PATH/$HOSTNAME.vmdk"
-    ova_generate "$HOSTNAME" "$OUTPUT_PATH" "$BOOT_MODE" "$LICENSE_FILE"
+    ova_generate "$HOSTNAME" "$OUTPUT_PATH" "$BOOT_MODE" "$LICENSE_FILE" "$OVA_SIZING_FILE" "$OVA_NODES" \
+        "$OVA_UPLOAD_URL" "$OVA_KEEP_LOCAL"
 
-    log_info "Arquivo OVA criado com sucesso em '$ova_output_path'."
+    if [[ -f "$ova_output_path" ]]; then
+        log_info "Arquivo OVA criado com sucesso em '$ova_output_path'."
+    fi
 fi